@@ -4,7 +4,7 @@ from fastapi import FastAPI, Response
 
 app = FastAPI()
 
-def apicall(lang: str = None, format: str = None, action: str = None, scheme: str = None, docloc: str = None, meta: str = None, doctemplate: str = None, ID: str = None, IDprefix: str = None, reports: str = None):
+def apicall(lang: str = None, format: str = None, action: str = None, scheme: str = None, docloc: str = None, meta: str = None, doctemplate: str = None, ID: str = None, IDprefix: str = None, reports: str = None, timings: str = None):
 
     if format not in ['json', 'yaml', 'html']:
         format = 'json'
@@ -35,6 +35,7 @@ def apicall(lang: str = None, format: str = None, action: str = None, scheme: st
     event["queryStringParameters"]["ID"] = ID
     event["queryStringParameters"]["IDprefix"] = IDprefix
     event["queryStringParameters"]["reports"] = reports
+    event["queryStringParameters"]["timings"] = timings
 
     response = lambda_handler(event, context)
 
@@ -47,16 +48,16 @@ def version():
     return getVersion('threatware')
 
 @app.get("/convert/")
-def convert(scheme: str, docloc: str, lang: str = None, format: str = None, meta: str = None):
+def convert(scheme: str, docloc: str, lang: str = None, format: str = None, meta: str = None, timings: str = None):
     action = "convert"
 
-    return apicall(lang=lang, format=format, action=action, scheme=scheme, docloc=docloc, meta=meta)
+    return apicall(lang=lang, format=format, action=action, scheme=scheme, docloc=docloc, meta=meta, timings=timings)
 
 @app.get("/verify/")
-def verify(scheme: str, docloc: str, doctemplate: str, reports:str = None, lang: str = None, format: str = None, meta: str = None):
+def verify(scheme: str, docloc: str, doctemplate: str, reports:str = None, lang: str = None, format: str = None, meta: str = None, timings: str = None):
     action = "verify"
 
-    return apicall(lang=lang, format=format, action=action, scheme=scheme, docloc=docloc, doctemplate=doctemplate, meta=meta)
+    return apicall(lang=lang, format=format, action=action, scheme=scheme, docloc=docloc, doctemplate=doctemplate, meta=meta, timings=timings)
 
 @app.get("/manage/indexdata")
 def manage_indexdata(ID: str, lang: str = None, format: str = None, meta: str = None):
@@ -83,10 +84,10 @@ def manage_submit(scheme: str, docloc: str, lang: str = None, format: str = None
     return apicall(lang=lang, format=format, action=action, scheme=scheme, docloc=docloc, meta=meta)
 
 @app.get("/measure/")
-def measure(scheme: str, docloc: str, doctemplate: str, lang: str = None, format: str = None, meta: str = None):
+def measure(scheme: str, docloc: str, doctemplate: str, lang: str = None, format: str = None, meta: str = None, timings: str = None):
     action = "measure"
 
-    return apicall(lang=lang, format=format, action=action, scheme=scheme, docloc=docloc, doctemplate=doctemplate, meta=meta)
+    return apicall(lang=lang, format=format, action=action, scheme=scheme, docloc=docloc, doctemplate=doctemplate, meta=meta, timings=timings)
 
 
 if __name__ == "__main__":
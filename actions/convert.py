@@ -4,9 +4,12 @@ Converts a Threat Model document into a model
 """
 
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from utils.error import ConvertError, ProviderError
 from utils.output import FormatOutput
 from convertors import convertors_config
+from convertors.template_cache import TemplateCache
 import convertors.confluence_convertor.convertor
 import convertors.gdoc_convertor.convertor
 from utils.output import FormatOutput
@@ -24,7 +27,7 @@ def _output(config:dict):
     return FormatOutput(config.get("output", {}))
 
 
-def convert(config:dict, execution_env, scheme:dict, doc_location:str, store_doc:bool=True):
+def convert(config:dict, execution_env, scheme:dict, doc_location:str, store_doc:bool=True, cache_template_for:str=None):
 
     logger.info("Entering convert")
     
@@ -32,9 +35,9 @@ def convert(config:dict, execution_env, scheme:dict, doc_location:str, store_doc
 
     try: 
         if scheme['document-storage'] == "confluence":
-            model = convertors.confluence_convertor.convertor.convert(config, execution_env.getConfluenceConnectionCredentials(), scheme, {"id":doc_location}, store_doc)
+            model = convertors.confluence_convertor.convertor.convert(config, execution_env.getConfluenceConnectionCredentials(), scheme, {"id":doc_location}, store_doc, cache_template_for)
         elif scheme['document-storage'] == "googledoc":
-            model = convertors.gdoc_convertor.convertor.convert(config, execution_env.getGoogleCredentials(), scheme, {"id":doc_location}, store_doc)
+            model = convertors.gdoc_convertor.convertor.convert(config, execution_env.getGoogleCredentials(), scheme, {"id":doc_location}, store_doc, cache_template_for)
         else:
             logger.error(f"Unknown document storage type '{scheme['document-storage']}'")
             raise ConvertError("unknown-doc-storage", {"doc_storage":scheme['document-storage']})
@@ -49,7 +52,7 @@ def convert(config:dict, execution_env, scheme:dict, doc_location:str, store_doc
     return output
 
 
-def convert_template(config:dict, execution_env, scheme:dict, doc_location:str):
+def convert_template(config:dict, execution_env, scheme:dict, doc_location:str, used_for:str=None):
 
     logger.info("Entering convert_template")
 
@@ -62,7 +65,9 @@ def convert_template(config:dict, execution_env, scheme:dict, doc_location:str):
             if not doc_location:
                 logger.error("No template document location provided as input or defined in the scheme")
         
-        return convert(config, execution_env, scheme, doc_location, store_doc=False)
+        TemplateCache.init(config)
+
+        return convert(config, execution_env, scheme, doc_location, store_doc=False, cache_template_for=used_for)
     
     except ConvertError as error:
         output.setError(error.text_key, error.template_values)
@@ -71,3 +76,25 @@ def convert_template(config:dict, execution_env, scheme:dict, doc_location:str):
 
     return output
 
+
+def convert_with_template(config:dict, execution_env, scheme:dict, doc_location:str, template_location:str, used_for:str=None):
+    """
+    Converts a document and its template concurrently, as fetching each of them is a round trip to the document storage.
+
+    Returns: The output of converting the template and the output of converting the document (as per convert_template and convert)
+    """
+
+    logger.info("Entering convert_with_template")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Each runs in a copy of this thread's context, so the models are indexed in the same scope (see data.model_index.scope)
+        template_future = executor.submit(contextvars.copy_context().run, convert_template, config, execution_env, scheme, template_location, used_for)
+        doc_future = executor.submit(contextvars.copy_context().run, convert, config, execution_env, scheme, doc_location)
+
+        # The template result is taken first so if both fail, it's the template failure that's reported (as if they were converted in turn)
+        template_output = template_future.result()
+        doc_output = doc_future.result()
+
+    logger.info("Exiting convert_with_template")
+
+    return template_output, doc_output
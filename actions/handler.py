@@ -14,6 +14,7 @@ from utils.error import ThreatwareError
 from utils.request import Request
 from utils.config import ConfigBase
 from utils.output import FormatOutput
+from utils.timings import Timings
 import utils.logging
 from providers import provider
 from language.translate import Translate
@@ -25,6 +26,7 @@ import actions.measure as measure
 from utils.output import FormatOutput, OutputType
 from response.response import Response
 from data.key import key as Key
+from data import model_index
 
 utils.logging.configureLogging()
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -40,12 +42,15 @@ ACTION_MANAGE_SUBMIT = 'manage.submit'
 ACTION_MANAGE_CHECK = 'manage.check'
 ACTION_MEASURE = 'measure'
 
+# Models are indexed for the request, so concurrent requests (e.g. in an API server) don't evict each other's indexes
+@model_index.scope()
 def lambda_handler(event, context):
 
     # Fitler the set of query string parameters to just ones we know about
     if (qsp := event.get("queryStringParameters", {})) is None:
         qsp = {}
     Request.set(qsp)
+    Timings.init(Request.timings)
 
     # Very first thing we need to do is find where all the configuration files are, and if they are not already present, download them.
     # How we do that depends what env we are in.  Providers usually take a config file, but we don't have them yet, so load without config (which limits what methods we can use)
@@ -157,16 +162,16 @@ def lambda_handler(event, context):
 
                 convert_config = convert.config()
                 
-                # Convert the TM template
-                convert_output = convert.convert_template(convert_config, execution_env, schemeDict, Request.doctemplate)
+                # Convert the TM template and the TM document (concurrently)
+                template_convert_output, doc_convert_output = convert.convert_with_template(convert_config, execution_env, schemeDict, Request.docloc, Request.doctemplate, Request.action)
+                convert_output = template_convert_output
                 response = Response(convert_output, force_api_format=True)     # In case convert failed
 
                 if convert_output.getResult() != OutputType.ERROR:
 
                     template_model = convert_output.getDetails()
 
-                    # Convert the TM document
-                    convert_output = convert.convert(convert_config, execution_env, schemeDict, Request.docloc)
+                    convert_output = doc_convert_output
                     response = Response(convert_output, force_api_format=True)     # In case convert failed
 
                     if convert_output.getResult() != OutputType.ERROR:
@@ -257,16 +262,16 @@ def lambda_handler(event, context):
 
                 convert_config = convert.config()
 
-                # Convert the TM template
-                convert_output = convert.convert_template(convert_config, execution_env, schemeDict, Request.doctemplate)
+                # Convert the TM template and the TM document (concurrently)
+                template_convert_output, doc_convert_output = convert.convert_with_template(convert_config, execution_env, schemeDict, Request.docloc, Request.doctemplate, Request.action)
+                convert_output = template_convert_output
                 response = Response(convert_output, force_api_format=True)     # In case convert failed
 
                 if convert_output.getResult() != OutputType.ERROR:
 
                     template_model = convert_output.getDetails()
 
-                    # Convert the TM document
-                    convert_output = convert.convert(convert_config, execution_env, schemeDict, Request.docloc)
+                    convert_output = doc_convert_output
                     response = Response(convert_output)     # In case convert failed
 
                     if convert_output.getResult() != OutputType.ERROR:
@@ -330,6 +335,7 @@ def main():
     parser.add_argument("-v", "--version", action="version", version=version_str)
     parser.add_argument("-l", "--lang", required=False, help="Language code for output texts")
     parser.add_argument("-f", "--format", required=False, help="Format for output, either JSON or YAML", default="json", choices=['json', 'yaml', 'html'])
+    parser.add_argument("--timings", required=False, action="store_true", help="Include the time taken (and counts) of each stage of the action in the output")
 
     subparsers = parser.add_subparsers(dest="action", required=True)
 
@@ -400,6 +406,7 @@ def main():
     event["queryStringParameters"]["ID"] = args.id if "id" in args else None
     event["queryStringParameters"]["IDprefix"] = args.idprefix if "idprefix" in args else None
     event["queryStringParameters"]["reports"] = args.reports if "reports" in args else None
+    event["queryStringParameters"]["timings"] = "true" if args.timings else None
 
     response = lambda_handler(event, context)
 
@@ -5,10 +5,10 @@ Manage a threat model
 
 import logging
 from datetime import datetime
-from dateutil.parser import parse
+from utils import dates
 from utils.output import FormatOutput
 from utils.error import ManageError, StorageError
-from utils.model import assign_row_identifiers, assign_parent_keys
+from utils.model import annotate, assign_row_identifiers
 from data import find
 from utils import match
 from storage.gitrepo import GitStorage
@@ -183,8 +183,7 @@ def check(config:dict, execution_env, location:str, schemeID:str, model:dict, me
     approval_expiry_days = config["check"]["approval-expiry-days"]
 
     try:
-        assign_row_identifiers(model)
-        assign_parent_keys(model)
+        annotate(model)
 
         # Get the Doc ID
         if (docIDtuple := find.key_with_tag(model, "document-id")) is None:
@@ -210,8 +209,10 @@ def check(config:dict, execution_env, location:str, schemeID:str, model:dict, me
 
             # Check if approved version has expired
             if indexentry.approved_date is not None:
-                approvedDate = parse(indexentry.approved_date)
-                if approvedDate is not None and (datetime.now() - approvedDate).days > approval_expiry_days:
+                if (approvedDate := dates.parse(indexentry.approved_date)) is None:
+                    logger.error(f"The approved date '{indexentry.approved_date}' of the threat model could not be parsed as a date")
+                    raise ManageError("approved-date-invalid", {"approved_date":indexentry.approved_date})
+                if (datetime.now() - approvedDate).days > approval_expiry_days:
                     raise ManageError("approved-version-expired", {"approval_expiry_days":approval_expiry_days})
 
             # Get approved version
@@ -223,7 +224,7 @@ def check(config:dict, execution_env, location:str, schemeID:str, model:dict, me
             # Use measure code to find things that don't match between a current TM and the most recent approved version
             #measure_config = measure.config(config.translator)
             # Update the tag prefix to not collide with any other measures configured
-            measure_config["measure-tag"]["prefix"] = "check"
+            measure_config = measure_config | {"measure-tag":measure_config["measure-tag"] | {"prefix":"check"}}
             #measure_output = measure.output(measure_config)
             #measure.distance(measure_config, measure_output, model, approved_model)
             measure_output = distance(measure_config, model, approved_model)
@@ -11,7 +11,8 @@ import logging
 import measure.measure_config as measure_config
 import measure.measure_distance as measure_distance
 from measure.measure_output import MeasureOutput
-from utils.model import assign_row_identifiers, assign_parent_keys
+from utils.model import annotate
+from convertors.template_cache import TemplateCache
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
@@ -28,10 +29,8 @@ def distance(config:dict, doc_model:dict, ref_model:dict):
 
     output = _output(config)
 
-    assign_row_identifiers(doc_model)
-    assign_parent_keys(doc_model)
-    assign_row_identifiers(ref_model)
-    assign_parent_keys(ref_model)
+    annotate(doc_model)
+    annotate(ref_model)
 
     return measure_distance.distances(config, output, doc_model, ref_model)
 
@@ -57,9 +56,9 @@ def distance_to_template(config:dict, execution_env, doc_model:dict, template:di
 
     output = _output(config)
 
-    assign_row_identifiers(doc_model)
-    assign_parent_keys(doc_model)
-    assign_row_identifiers(template)
-    assign_parent_keys(template)
+    annotate(doc_model)
+    annotate(template)
+    # So the next measure using this template doesn't have to annotate it again
+    TemplateCache.update(template)
 
     return measure_distance.distances(config, output, doc_model, template)
\ No newline at end of file
@@ -7,10 +7,12 @@ import logging
 from utils.error import VerifyError
 from utils.output import FormatOutput
 from utils import match
+from utils.timings import Timings
 from verifiers.verifiers_config import VerifiersConfig
 from verifiers.threat_coverage import ThreatCoverage
 from verifiers.verifiers_report import VerifiersReport
 from verifiers.verifiers import Verifiers
+from convertors.template_cache import TemplateCache
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -41,6 +43,8 @@ def verify(config:VerifiersConfig, threatmodel:dict, tm_template:dict):
         verifiers = Verifiers(config)
 
         issues = verifiers.verify(threatmodel, tm_template)
+        # So the next verify using this template doesn't have to annotate it again
+        TemplateCache.update(tm_template)
 
         if len(issues) == 0:
             output.setSuccess("success-no-issues", {}, issues)
@@ -90,13 +94,15 @@ def report(config:VerifiersConfig, threatmodel:dict, issues:list, verify_reports
 
     try:
         
-        coverage = _coverage(config, threatmodel)
+        with Timings.stage("verify.report"):
 
-        show_asset_report, show_control_report = _reports_to_show(verify_reports)
+            coverage = _coverage(config, threatmodel)
 
-        verifiers_report = VerifiersReport(config, show_asset_report, show_control_report)
+            show_asset_report, show_control_report = _reports_to_show(verify_reports)
 
-        verifiers_report.report(issues, coverage)
+            verifiers_report = VerifiersReport(config, show_asset_report, show_control_report)
+
+            verifiers_report.report(issues, coverage)
 
         if len(issues) == 0:
             output.setSuccess("success-no-issues", {}, verifiers_report)
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 
 import logging
+import threading
 from atlassian import Confluence
 from requests import HTTPError
 from utils.error import ConvertError
+from utils.cache import ObjectCache
 import unicodedata
 
 import utils.logging
@@ -57,12 +59,70 @@ def exists(confluence, page_id):
 
     return True
 
-def history(confluence, page_id):
+def history(confluence, page_id, limit:int = None):
+    # Versions are returned newest first
     url = "rest/api/content/{}/version?expand=content".format(page_id)
+    if limit is not None:
+        url = url + "&limit={}".format(limit)
     return confluence.get(url)
 
+def latest_version(confluence, page_id):
+    """
+    Returns the version number of the page, or None if it can't be found.  Raises ConvertError 'not-found' if the page
+    doesn't exist, so the version can be requested instead of checking the page exists.
+    """
+
+    try:
+        return history(confluence, page_id, limit=1)['results'][0]['number']
+    except HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            logger.error(e)
+            raise ConvertError("not-found", {"ID":page_id, "url":e.response.url})
+        logger.debug(f"Could not get the version of page '{page_id}'. err='{e}'")
+        return None
+    except Exception as e:
+        logger.debug(f"Could not get the version of page '{page_id}'. err='{e}'")
+        return None
+
+# Bounded in memory and on disk, as pages can be large (and the temp directory can be small and shared)
+PAGE_CACHE_MEMORY_ENTRIES = 4
+PAGE_CACHE_DISK_BYTES = 64 * 1024 * 1024
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+def _cache() -> ObjectCache:
+    global _page_cache
+
+    # A document and its template can be read on different threads
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = ObjectCache("confluence-pages", max_entries=PAGE_CACHE_MEMORY_ENTRIES, max_disk_bytes=PAGE_CACHE_DISK_BYTES)
+        return _page_cache
+
 def read(confluence, page_id, version=''):
+    """
+    Returns the (view) body of the page.
+    
+    Pages are cached (on disk) by page id and version, so if a version isn't requested a cheap request for the latest version
+    number of the page is made, and the body is only downloaded if that version isn't cached.
+    """
+
+    if not version and (version := latest_version(confluence, page_id)) is None:
+        version = ''
+
+    cache_key = None
+    if version:
+        cache_key = (getattr(confluence, "url", ""), str(page_id), str(version))
+        if (document := _cache().get(cache_key)) is not None:
+            logger.debug(f"Using cached version '{version}' of page '{page_id}'")
+            return document
     
     page = confluence.get_page_by_id(page_id, expand='body.view', status=None, version=version)
 
-    return unicodedata.normalize("NFKD", page['body']['view']['value'])
\ No newline at end of file
+    document = unicodedata.normalize("NFKD", page['body']['view']['value'])
+
+    if cache_key is not None:
+        _cache().put(cache_key, document)
+
+    return document
\ No newline at end of file
@@ -11,27 +11,54 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from response.response import Response
+from convertors.template_cache import TemplateCache
+from utils.timings import Timings
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
-def convert(config:dict, connection:dict, mapping:dict, doc_identifers:dict, store_doc:bool):
+def convert(config:dict, connection:dict, mapping:dict, doc_identifers:dict, store_doc:bool, cache_template_for:str = None):
 
-    # Establish connection to document location
-    doc_store = reader.connect(connection)
+    doc_id = doc_identifers.get('id', '')
 
-    # TODO Check the document exists
-    
-    # Read the document into a string
-    document = reader.read(doc_store, doc_identifers.get('id', ''))
+    with Timings.stage("convert.fetch", document=doc_id):
 
-    # Store the string
-    if store_doc:
-        Response.setDocument(document)
+        # Establish connection to document location
+        doc_store = reader.connect(connection)
 
-    # Read the document as html xml element
-    # This will return an lxml element at the root node which is the 'html' tag
-    query_document = query.get_document(document, mapping)
+        cache_key = None
+        doc_version = ''
+        if cache_template_for is not None and TemplateCache.enabled():
+            # Templates rarely change, so only download and convert a template if this version of it isn't cached
+            doc_version = reader.latest_version(doc_store, doc_id) or ''
+            cache_key = TemplateCache.key(config, mapping, doc_id, doc_version or None, cache_template_for)
+            if (template_model := TemplateCache.get(cache_key)) is not None:
+                Timings.count("template-cache-hits")
+                return template_model
 
-    # Convert the document
-    return doc_to_model(config, query_document, mapping)
+        # TODO Check the document exists
+
+        # Read the document into a string
+        document = reader.read(doc_store, doc_id, doc_version)
+
+        # Store the string
+        if store_doc:
+            Response.setDocument(document)
+
+    with Timings.stage("convert.parse", document=doc_id):
+
+        # Read the document as html xml element
+        # This will return an lxml element at the root node which is the 'html' tag
+        query_document = query.get_document(document, mapping)
+
+    with Timings.stage("convert.map", document=doc_id):
+
+        # Convert the document
+        model = doc_to_model(config, query_document, mapping)
+
+    with Timings.stage("convert.post-process", document=doc_id):
+
+        if cache_key is not None:
+            TemplateCache.put(cache_key, model)
+
+    return model
@@ -2,6 +2,7 @@
 
 import os, io
 import logging
+import threading
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 from googleapiclient.errors import HttpError
@@ -12,6 +13,7 @@ from google.oauth2.credentials import Credentials
 from google.oauth2.service_account import Credentials as SvcAcctCredentials
 from utils.error import ConvertError
 from utils.config import ConfigBase
+from utils.cache import ObjectCache
 import httplib2
 
 import utils.logging
@@ -85,7 +87,58 @@ def history(confluence, page_id):
     
     return None
 
+def latest_version(service, doc_id):
+    """ 
+    Returns a version for the document that changes whenever the document changes (from the document metadata), or None if it 
+    can't be found
+    """
+
+    try:
+        metadata = service.files().get(fileId=doc_id, fields='headRevisionId,modifiedTime,version').execute()
+    except Exception as e:
+        logger.debug(f"Could not get the metadata of document '{doc_id}'. err='{e}'")
+        return None
+
+    # Only files with binary content have a headRevisionId, Google Docs have a version and modifiedTime
+    if (revision_id := metadata.get('headRevisionId')) is not None:
+        return revision_id
+    if metadata.get('version') is None and metadata.get('modifiedTime') is None:
+        return None
+    return f"{metadata.get('version')}@{metadata.get('modifiedTime')}"
+
+# Bounded in memory and on disk, as exported documents can be large
+EXPORT_CACHE_MEMORY_ENTRIES = 4
+EXPORT_CACHE_DISK_BYTES = 64 * 1024 * 1024
+
+_export_cache = None
+_export_cache_lock = threading.Lock()
+
+def _cache() -> ObjectCache:
+    global _export_cache
+
+    # A document and its template can be read on different threads
+    with _export_cache_lock:
+        if _export_cache is None:
+            _export_cache = ObjectCache("gdoc-exports", max_entries=EXPORT_CACHE_MEMORY_ENTRIES, max_disk_bytes=EXPORT_CACHE_DISK_BYTES)
+        return _export_cache
+
 def read(service, doc_id, version=''):
+    """
+    Returns the document exported as HTML.
+
+    Exports are cached by document id and version, so if a version (see latest_version) isn't passed in the document metadata
+    is requested, and the document is only exported if that version isn't cached.
+    """
+
+    if not version and (version := latest_version(service, doc_id)) is None:
+        version = ''
+
+    cache_key = None
+    if version:
+        cache_key = (str(doc_id), str(version))
+        if (document := _cache().get(cache_key)) is not None:
+            logger.debug(f"Using cached export of version '{version}' of document '{doc_id}'")
+            return document
     
     try: 
         request = service.files().export_media(fileId=doc_id, mimeType='text/html')
@@ -105,5 +158,7 @@ def read(service, doc_id, version=''):
             raise ConvertError("not-found", {"ID":doc_id, "url":e.uri})
         raise
 
-    return document
+    if cache_key is not None:
+        _cache().put(cache_key, document)
 
+    return document
@@ -3,6 +3,7 @@
 import logging
 from data.data_config import DataConfig
 import data.value
+from schemes.schemes import Scheme
 import convertors.html_convertor.query as query
 
 import utils.logging
@@ -16,7 +17,11 @@ def doc_to_model(config:dict, document:dict, mapping:dict):
         
         DataConfig.init(config.get("data", {}))
 
-        tm = data.value.parse(mapping['map'], document)
+        # Schemes loaded by schemes.load_scheme have their 'map' compiled
+        if isinstance(mapping, Scheme) and (map_plan := mapping.map_plan()) is not None:
+            tm = map_plan.run(document)
+        else:
+            tm = data.value.parse(mapping['map'], document)
 
     except BaseException as err:
         logger.error(f"Unexpected err='{err}', type='{type(err)}'")
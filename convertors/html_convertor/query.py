@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
 import logging
+from functools import lru_cache
 from lxml import etree
 import lxml.html
 from lxml.etree import XPathError, XPathEvalError
 #from lxml.html.clean import clean_html
-from html_table_parser import HTMLTableParser
+from convertors.html_convertor.table import TableExtractor, expand_spans
 #from html_table_extractor.extractor import Extractor
 from utils import match
 from utils.property_str import pstr
@@ -22,7 +23,11 @@ PROCESS_IGNORE_COLS = "ignore-cols"
 PROCESS_REMOVE_HEADER_ROW = 'remove-header-row'
 PROCESS_REMOVE_ROWS_IF_EMPTY = "remove-rows-if-empty"
 PROCESS_SPLIT_TYPE = "split-type"
+PROCESS_EXPAND_SPANS = "expand-spans"
 HTML2TEXT_OPTIONS = "html2text-options"
+# Compiled versions of query configuration values are stored under this key by compile_query
+COMPILED = "compiled"
+VALUE_ELEMENT_XPATH = "value-element-xpath"
 HTML2TEXT_ALLOWLIST = [
     "unicode_snob",
     "escape_snob",
@@ -59,6 +64,97 @@ HTML2TEXT_ALLOWLIST = [
     "include_sup_sub"
 ]
 
+@lru_cache(maxsize=512)
+def compile_xpath(expression:str):
+    """ Returns the compiled XPath expression, or None if it does not compile (so evaluating it reports the error as usual) """
+
+    try:
+        return etree.XPath(expression)
+    except XPathError:
+        return None
+
+def compile_query(query_cfg:dict) -> dict:
+    """ Returns a copy of the query configuration with its XPath expressions compiled """
+
+    compiled = {}
+    if isinstance(query := query_cfg.get(XPATH_FIELD), str):
+        if (xpath := compile_xpath(query)) is not None:
+            compiled[XPATH_FIELD] = xpath
+        if query_cfg.get("type") == "html-text" and (xpath := compile_xpath(_value_element_query(query))) is not None:
+            compiled[VALUE_ELEMENT_XPATH] = xpath
+
+    return {**query_cfg, COMPILED:compiled}
+
+def _xpath(document, query_cfg:dict, query:str = None, compiled_field:str = XPATH_FIELD):
+    """ Evaluates the query (by default the xpath of the query configuration), using the compiled version if there is one """
+
+    if (compiled := query_cfg.get(COMPILED, {}).get(compiled_field)) is not None:
+        return compiled(document)
+
+    return document.xpath(query if query is not None else query_cfg[XPATH_FIELD])
+
+def _value_element_query(query:str) -> str:
+    # Try to strip away the xpath path that makes the result a string to get to the element that contains the string
+    if query.endswith("//text()"):
+        query = query[:-8]
+    if query.endswith("/text()"):
+        query = query[:-7]
+    elif "/@" in query:
+        query = query[0:query.rfind("/@")]
+
+    return query
+
+def _names(names) -> set:
+    # Pre-process values can be a single name or a list of names
+    if not names:
+        return set()
+    if isinstance(names, str):
+        return {names}
+    return set(names)
+
+def _preprocess_element(element, attributes_to_strip:set, elements_to_strip:set, tags_to_strip:set):
+    """
+    Strips attributes (from the element and its descendants), and elements and tags (from its descendants), in one walk of the element.
+
+    This has the same result as calling etree.strip_attributes, etree.strip_elements and etree.strip_tags in that order, except
+    that the text of stripped tags is merged with the text around it.  etree.strip_tags can leave adjacent text nodes in the
+    tree, which breaks XPath queries like text()='...' (that previously required the document to be serialised and re-parsed).
+    """
+
+    strip_all_elements = "*" in elements_to_strip
+    strip_all_tags = "*" in tags_to_strip
+
+    elements_to_remove = []
+    tags_to_drop = []
+
+    stack = [(element, True)]
+    while stack:
+        node, is_root = stack.pop()
+        if not isinstance(node.tag, str):
+            # Comments and processing instructions are not stripped
+            continue
+
+        if not is_root:
+            # Elements are stripped along with all their content, so there is no need to look at their descendants
+            if strip_all_elements or node.tag in elements_to_strip:
+                elements_to_remove.append(node)
+                continue
+            if strip_all_tags or node.tag in tags_to_strip:
+                tags_to_drop.append(node)
+
+        for attribute in attributes_to_strip:
+            node.attrib.pop(attribute, None)
+
+        stack.extend((child, False) for child in reversed(node))
+
+    for node in elements_to_remove:
+        # The tail of the element is removed with it
+        node.getparent().remove(node)
+
+    for node in tags_to_drop:
+        # Merges the text of the tag with the text around it, and moves its children to its parent
+        node.drop_tag()
+
 def get_document(document_str, mapping):
 
     document = lxml.html.document_fromstring(document_str)
@@ -70,28 +166,22 @@ def get_document(document_str, mapping):
 
             try:
                 # Navigate to the <table> element
-                selection = document.xpath(selector)
+                if (compiled_selector := compile_xpath(selector)) is not None:
+                    selection = compiled_selector(document)
+                else:
+                    selection = document.xpath(selector)
             except XPathError:
                 logger.warning(f"Pre-process selector '{selector}' caused an error")
                 continue
+
+            # Order here matters, attributes are stripped first because that is irresptive of tags or elements, and elements 
+            # before tags because we may want to strip all tags and so if we did tags first we couldn't strip the elements
+            attributes_to_strip = _names(processor.get("strip-attributes", None))
+            elements_to_strip = _names(processor.get("strip-elements", None))
+            tags_to_strip = _names(processor.get("strip-tags", None))
             
             for ele in selection:
-                # Order here matters, do attributes first because that is irresptive of tags or elements
-                if attributes_to_strip := processor.get("strip-attributes", None):
-                    etree.strip_attributes(ele, attributes_to_strip)
-                # Do elements before tags because we may want to strip all tags and so if we did tags first we couldn't strip the elements
-                if elements_to_strip := processor.get("strip-elements", None):
-                    etree.strip_elements(ele, elements_to_strip)
-                if tags_to_strip := processor.get("strip-tags", None):
-                    etree.strip_tags(ele, tags_to_strip)
-                
-                
-
-    # This is a hack.  For reasons unknown XPath queries start failing for no obvious reason
-    # once strip_* methods are called.  So we reload the processed XML from a string.  Lame.
-    new_doc_bstr = lxml.html.tostring(document, encoding='unicode')
-    new_doc_str = new_doc_bstr
-    document = lxml.html.document_fromstring(new_doc_str)
+                _preprocess_element(ele, attributes_to_strip, elements_to_strip, tags_to_strip)
 
     return document
 
@@ -102,7 +192,7 @@ def get_document_section(document, query_cfg):
         return None
 
     try:
-        section_list = document.xpath(query_cfg[XPATH_FIELD])
+        section_list = _xpath(document, query_cfg)
     except XPathError:
         logger.warning(f"XPath query '{query_cfg[XPATH_FIELD]}' caused an error")
         section_list = []
@@ -122,7 +212,7 @@ def get_document_list_items(document, query_cfg):
         return []
 
     try:
-        list_items = document.xpath(query_cfg[XPATH_FIELD])
+        list_items = _xpath(document, query_cfg)
     except XPathError:
         logger.warning(f"XPath query '{query_cfg[XPATH_FIELD]}' caused an error")
         list_items = []
@@ -137,7 +227,7 @@ def get_document_value(document, query_cfg) -> str:
         return None
 
     try:
-        value_list = document.xpath(query_cfg[XPATH_FIELD])
+        value_list = _xpath(document, query_cfg)
     except XPathError:
         logger.warning(f"XPath query '{query_cfg[XPATH_FIELD]}' caused an error")
         value_list = []
@@ -156,16 +246,10 @@ def get_document_value(document, query_cfg) -> str:
     else:
         # It's a string, so we can't extract a location from it.  Try to strip away the xpath path that makes the result a string to get to the
         # element that contains the string.
-        query = query_cfg[XPATH_FIELD]
-        if query.endswith("//text()"):
-            query = query[:-8]
-        if query.endswith("/text()"):
-            query = query[:-7]
-        elif "/@" in query:
-            query = query[0:query.rfind("/@")]
+        query = _value_element_query(query_cfg[XPATH_FIELD])
         
         try:
-            value_element = document.xpath(query)
+            value_element = _xpath(document, query_cfg, query, VALUE_ELEMENT_XPATH)
         except (XPathError, XPathEvalError):
             logger.warning(f"XPath query '{query}' caused an error")
             value_list = []
@@ -234,24 +318,6 @@ def _remove_rows_if_empty(proc_def, table_data):
 
     return new_table_data
 
-def get_table_xpaths(table_element):
-    row_xpaths = []
-    roottree = table_element.getroottree()
-    rows = table_element.xpath('.//tr')
-    
-    for row_index, row in enumerate(rows):
-        col_xpaths = []
-        cells = row.xpath('.//td | .//th')
-        for cell_index, cell in enumerate(cells):
-            # Since the cell element could be a td or th, we must make sure we get the correct xpath
-            #cell_xpath = f"{table_element.getroottree().getpath(table_element)}//tr[{row_index + 1}]//{cell.tag}[{cell_index + 1}]"
-            cell_xpath = roottree.getpath(cell)    # This is dangerous though as pre-processing may make the xpath here invalid when applied to the original document
-            col_xpaths.append(cell_xpath)
-        
-        row_xpaths.append(col_xpaths)
-    
-    return row_xpaths
-
 def get_document_row_table(document, query_cfg):
 
     if not query_key_defined(query_cfg, XPATH_FIELD):
@@ -259,7 +325,7 @@ def get_document_row_table(document, query_cfg):
 
     try:
         # Navigate to the <table> element
-        table_list = document.xpath(query_cfg[XPATH_FIELD])
+        table_list = _xpath(document, query_cfg)
     except XPathError:
         logger.warning(f"XPath query '{query_cfg[XPATH_FIELD]}' caused an error")
         table_list = []
@@ -272,69 +338,20 @@ def get_document_row_table(document, query_cfg):
 
     table_ele = table_list[0]
 
-    # Get the XPath to each table element
-    table_xpaths = get_table_xpaths(table_ele)
-
     # For future reference:
     #  'strip_tags' will remove the element tag and attributes but not the content
     #  'strip_elements' will remove everything, tag, attributes and content
 
-    # Parsing a table is much easier if we remove HTML elements that just style the output, and since the output of
-    # this method is no longer XML, we know subsequent queries don't rely on these elements.
-    # Stripping span doesn't affect content (and Google Docs have A LOT of span elements)
-    #etree.strip_tags(table_ele, "span")
-    # Reluctantly removing 'superscript' elements.  It seems Google Docs will add single letter superscript to elements
-    # when you download the doc as HTML, where that text is hihglight as part of a comment.  Lesser of two evils is to 
-    # not support 'superscript' elements (as we have to allow a document with comments to be verified)
-    #etree.strip_elements(table_ele, "sup")
-
-    # When we call HTMLTableParser it will strip links i.e. <a> and replace them with data_separator, which is /n, 
-    # this causes problems because if the link is in the middle of text it introduces a /n which messes up formatting.
-    # We don't want to change data_separator because actual html breaks need to be preserved.  So we just strip links,
-    # which is fine because we can't store them anyway and they should affect validation
-    #etree.strip_tags(table_ele, "a")
-
-    ## Removing this code as using HTMLTableParser with data_separator='\n' should have the same affecet
-    # Stripping attributes of <p> elements doesn't affect content, but we leave them in because they are usually used
-    # like newlines, which is what we replace them with further down.
-    #for ele in table_ele.findall('.//p'):
-    #for ele in table_ele.findall('.'):
-    #    etree.strip_attributes(ele, "style")
-
-    # Extract as string
-    table_bstr = lxml.html.tostring(table_ele, encoding='unicode')
-
-    ## TODO maybe use lxml.html.clean.clean_html in the future, but need to check how it handles imperfect HTML (I'm looking at you Confluence)
-    #table_bstr = clean_html(table_bstr)
-    
-    ## Removing this code as using HTMLTableParser with data_separator='\n' should have the same affecet
-    # HTMLTableParser will strip all tags from table entries, but sometimes that information is relevant e.g. <p></p> as newlines
-    # This doesn't always work.  The '\n' need to be adjacent to actual text.  If the p-tags surround a <a> for instance then the '\n' is removed by HTMLTableParser
-    #table_str = table_bstr.replace("</p><p>", "<a>\n</a>")
-    #table_str = table_bstr.replace("</p><p>", "</p>\n<p>")
-    table_str = table_bstr
-
-    # Would like to use this libary, but it doesn't support changing the separator character.
-    # extractor = Extractor(table_str)
-    # extractor.parse()
-    # table_output = extractor.return_list()
-
-    # Non-breaking spaces cause string matching issues (usually from cut & paste from somewhere else).  So let's replace those with normal spaces.
-    table_str = table_str.replace("\xa0", " ")
-
-    # Parse as table
-    # Tags in cells are stripped and the tags text content is joined using data_separator
-    # HTMLTableParser defaults to decode_html_entities=False, but we want to keep those characters e.g. &
-    p = HTMLTableParser(data_separator='\n', decode_html_entities=True)
-    #p = HTMLTableParser(data_separator=' ')
-
-    p.feed(table_str)
-
-    if len(p.tables) != 1:
+    # Tags in cells are stripped and the text content is joined using '\n' (so html breaks are preserved), and the XPath to each 
+    # table cell is recorded, all in one walk of the table element.
+    extractor = TableExtractor(data_separator='\n').extract(table_ele)
+
+    if len(extractor.tables) != 1:
         logger.warning("Table parser returned more than 1 table, only using first")
     
     # Return list of lists.  There is only 1 table so only the first is returned
-    table_output = p.tables[0]
+    table_output = extractor.tables[0]
+    table_xpaths = extractor.row_xpaths
 
     # Combine the XPath to each table cell wit the value in each table cell
     table_values = table_output
@@ -359,6 +376,10 @@ def get_document_row_table(document, query_cfg):
             #table_output[row_index][col_index] = {"location":col_xpath, "value":value}
             table_output[row_index][col_index] = pstr(value, properties={"location":col_xpath})
 
+    if query_cfg.get(PROCESS_EXPAND_SPANS, False):
+        # Repeat the values of cells that span rows/columns, so every row has a value for every column
+        table_output = expand_spans(table_output, extractor.table_spans[0])
+
     if query_cfg.get(PROCESS_REMOVE_HEADER_ROW, False):
         table_output = table_output[1:]
 
@@ -442,7 +463,7 @@ def _get_element(document, query_cfg) -> str:
         return None
 
     try:
-        value_list = document.xpath(query_cfg[XPATH_FIELD])
+        value_list = _xpath(document, query_cfg)
     except XPathError:
         logger.warning(f"XPath query '{query_cfg[XPATH_FIELD]}' caused an error")
         value_list = []
@@ -493,7 +514,7 @@ def get_text_section(document, query_cfg):
         return None
 
     try: 
-        nodes = document.xpath(query_cfg[XPATH_FIELD])
+        nodes = _xpath(document, query_cfg)
     except XPathError:
         logger.warning(f"XPath query '{query_cfg[XPATH_FIELD]}' caused an error")
         nodes = []
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Extracts the values (and locations) of table cells directly from an lxml tree
+"""
+
+import logging
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+class TableExtractor:
+    """
+    Extracts tables from an lxml element in a single walk of the element.
+
+    The values extracted are the same as serialising the element and parsing it with an HTML table parser (which is how
+    tables used to be extracted) i.e. the text in a cell is stripped and joined with the data separator, non-breaking spaces
+    are replaced with spaces, a row is added to the current table when a 'tr' ends and the current table is added to the
+    tables when a 'table' ends (so nested tables share rows with the table they are in).  The same walk records the XPath of
+    every 'td'/'th' under each 'tr' (in document order), and the rowspan/colspan of every cell.
+    """
+
+    def __init__(self, data_separator:str = '\n'):
+
+        self.data_separator = data_separator
+
+        self.tables = []
+        self.table_spans = []
+        self.row_xpaths = []
+
+        self._in_td = False
+        self._in_th = False
+        self._current_table = []
+        self._current_table_spans = []
+        self._current_row = []
+        self._current_row_spans = []
+        self._current_cell = []
+        self._current_cell_spans = (1, 1)
+        self._open_row_xpaths = []
+
+    def extract(self, element):
+
+        roottree = element.getroottree()
+
+        stack = [(element, False)]
+        while stack:
+            node, closing = stack.pop()
+
+            if closing:
+                self._end(node)
+                self._data(node.tail)
+                continue
+
+            if not isinstance(node.tag, str):
+                # Comments and processing instructions only split the text around them
+                self._data(node.tail)
+                continue
+
+            self._start(node, roottree)
+            self._data(node.text)
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node))
+
+        return self
+
+    def _start(self, node, roottree):
+
+        if node.tag == "td":
+            self._in_td = True
+        elif node.tag == "th":
+            self._in_th = True
+        elif node.tag == "tr":
+            row_xpath = []
+            self.row_xpaths.append(row_xpath)
+            self._open_row_xpaths.append(row_xpath)
+
+        if node.tag in ["td", "th"]:
+            self._current_cell_spans = (_span(node, "rowspan"), _span(node, "colspan"))
+            cell_xpath = roottree.getpath(node)
+            # A cell is part of every row it is nested in
+            for row_xpath in self._open_row_xpaths:
+                row_xpath.append(cell_xpath)
+
+    def _data(self, data:str):
+
+        if data and (self._in_td or self._in_th):
+            # Non-breaking spaces cause string matching issues (usually from cut & paste from somewhere else)
+            self._current_cell.append(data.replace("\xa0", " ").strip())
+
+    def _end(self, node):
+
+        if node.tag == "td":
+            self._in_td = False
+        elif node.tag == "th":
+            self._in_th = False
+
+        if node.tag in ["td", "th"]:
+            self._current_row.append(self.data_separator.join(self._current_cell).strip())
+            self._current_row_spans.append(self._current_cell_spans)
+            self._current_cell = []
+        elif node.tag == "tr":
+            self._current_table.append(self._current_row)
+            self._current_table_spans.append(self._current_row_spans)
+            self._current_row = []
+            self._current_row_spans = []
+            if self._open_row_xpaths:
+                self._open_row_xpaths.pop()
+        elif node.tag == "table":
+            self.tables.append(self._current_table)
+            self.table_spans.append(self._current_table_spans)
+            self._current_table = []
+            self._current_table_spans = []
+
+def _span(node, attribute:str) -> int:
+
+    try:
+        return max(int(node.get(attribute, 1)), 1)
+    except ValueError:
+        return 1
+
+def expand_spans(table:list, spans:list) -> list:
+    """ Returns the table with cells that span rows/columns repeated in every row/column they span """
+
+    expanded = []
+    # Cells from rows above that span into later rows, by column index, as [value, rows remaining]
+    pending = {}
+
+    for row, row_spans in zip(table, spans):
+        expanded_row = []
+        cells = iter(zip(row, row_spans))
+        col_index = 0
+        while True:
+            if col_index in pending:
+                value, remaining = pending[col_index]
+                expanded_row.append(value)
+                if remaining == 1:
+                    del pending[col_index]
+                else:
+                    pending[col_index] = (value, remaining - 1)
+                col_index += 1
+                continue
+            if (cell := next(cells, None)) is None:
+                if pending and col_index < max(pending.keys()):
+                    # Cells spanning into this row from above, beyond the cells of this row, so this column is empty
+                    expanded_row.append("")
+                    col_index += 1
+                    continue
+                break
+            value, (rowspan, colspan) = cell
+            for _ in range(colspan):
+                expanded_row.append(value)
+                if rowspan > 1:
+                    pending[col_index] = (value, rowspan - 1)
+                col_index += 1
+        expanded.append(expanded_row)
+
+    return expanded
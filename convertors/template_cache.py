@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Cache of converted templates, so verify/measure don't download and convert a template that hasn't changed
+"""
+
+import logging
+import json
+from data import model_index
+from schemes.schemes import Scheme
+from utils.cache import LRUCache, ObjectCache, DEFAULT_MAX_DISK_BYTES
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+class TemplateCache:
+    """
+    Caches template models by scheme, template document id, the version of the template document and the action using the template.
+
+    The tag index of a template (see data.model_index) is cached with the template, along with the annotations verify adds to
+    the template (see utils.model.annotate and Verifiers.assign_template_pre_approved), so a cached template needs neither
+    converting or annotating.
+    """
+
+    _config:str = None
+    _cache:ObjectCache = None
+    # The cache key (and index marks) of the templates returned by the cache, by id() of the template model
+    _model_keys = LRUCache(8)
+
+    @classmethod
+    def init(cls, config:dict = {}):
+
+        cache_config = config.get("template-cache", {})
+        if (config_str := json.dumps(cache_config, sort_keys=True)) == cls._config:
+            return
+        cls._config = config_str
+
+        if not cache_config.get("enabled", True):
+            cls._cache = None
+            return
+
+        cls._cache = ObjectCache("templates",
+                                 max_entries=cache_config.get("memory-entries", 8),
+                                 directory=cache_config.get("directory", None),
+                                 disk=cache_config.get("disk", True),
+                                 max_disk_bytes=cache_config.get("disk-bytes", DEFAULT_MAX_DISK_BYTES))
+        cls._model_keys.clear()
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls._cache is not None
+
+    @classmethod
+    def key(cls, config:dict, scheme:dict, doc_id:str, version, used_for:str) -> tuple:
+        """ 
+        Returns the key to cache a template under, or None if the template can't be cached.
+
+        Actions annotate templates differently, so a template is cached separately for each action it is used_for.
+        """
+
+        if cls._cache is None or version is None or not isinstance(scheme, Scheme):
+            return None
+
+        # The convertor config changes how a document is converted, so it's part of the key
+        return (scheme.cache_key, doc_id, str(version), json.dumps(config.get("data", {}), sort_keys=True, default=str), used_for)
+
+    @classmethod
+    def get(cls, cache_key:tuple) -> dict:
+
+        if cache_key is None or cls._cache is None:
+            return None
+
+        if (cached := cls._cache.get(cache_key)) is None:
+            logger.debug(f"Template '{cache_key[1]}' version '{cache_key[2]}' is not cached")
+            return None
+
+        template_model, template_index = cached
+        if template_index is not None:
+            model_index.attach(template_model, template_index)
+        cls._remember(cache_key, template_model)
+        logger.debug(f"Using cached template '{cache_key[1]}' version '{cache_key[2]}'")
+
+        return template_model
+
+    @classmethod
+    def put(cls, cache_key:tuple, template_model:dict):
+
+        if cache_key is None or cls._cache is None:
+            return
+
+        cls._cache.put(cache_key, (template_model, model_index.get_index(template_model)))
+        cls._remember(cache_key, template_model)
+
+    @classmethod
+    def update(cls, template_model:dict):
+        """ Caches the template again if it has been annotated since it was cached """
+
+        if (remembered := cls._model_keys.get(id(template_model))) is None or remembered[0] is not template_model:
+            return
+
+        _, cache_key, marks = remembered
+        if (template_index := model_index.get_index(template_model)) is None or template_index.marks == marks:
+            return
+
+        cls.put(cache_key, template_model)
+
+    @classmethod
+    def _remember(cls, cache_key:tuple, template_model:dict):
+
+        template_index = model_index.get_index(template_model)
+        marks = set(template_index.marks) if template_index is not None else None
+        cls._model_keys.put(id(template_model), (template_model, cache_key, marks))
@@ -1,23 +1,35 @@
 import logging
 import re
+from data import model_index
+from utils.timings import Timings
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
 def key_with_tag(model, tag:str):
 
+    Timings.count("tag-lookups")
+    return _key_with_tag(model, tag)
+
+def _key_with_tag(model, tag:str):
+
+    if (index := model_index.lookup(model)) is not None:
+        if entries := index.entries_with_tag(model, tag):
+            return entries[0].key, entries[0].value
+        return None, None
+
     if isinstance(model, dict):
         for dict_key, dict_value in model.items():
             if dict_key.hasTag(tag):
                 return dict_key, dict_value
             if isinstance(dict_value, dict) or isinstance(dict_value, list):
-                found_key, found_value = key_with_tag(dict_value, tag)
+                found_key, found_value = _key_with_tag(dict_value, tag)
                 if found_key is not None:
                     return found_key, found_value
     
     if isinstance(model, list):
         for list_entry in model:
-            found_key, found_value = key_with_tag(list_entry, tag)
+            found_key, found_value = _key_with_tag(list_entry, tag)
             if found_key is not None:
                 return found_key, found_value
 
@@ -26,6 +38,16 @@ def key_with_tag(model, tag:str):
 # Return a list of tuples (key,value) for all keys with the tag
 def keys_with_tag(model, tag:str):
 
+    keys_list = _keys_with_tag(model, tag)
+    Timings.count("tag-lookups")
+    Timings.count("tagged-keys", len(keys_list))
+    return keys_list
+
+def _keys_with_tag(model, tag:str):
+
+    if (index := model_index.lookup(model)) is not None:
+        return [(entry.key, entry.value) for entry in index.entries_with_tag(model, tag)]
+
     keys_list = []
 
     if isinstance(model, dict):
@@ -33,11 +55,11 @@ def keys_with_tag(model, tag:str):
             if dict_key.hasTag(tag):
                 keys_list.append((dict_key, dict_value))
             if isinstance(dict_value, dict) or isinstance(dict_value, list):
-                keys_list.extend(keys_with_tag(dict_value, tag))
+                keys_list.extend(_keys_with_tag(dict_value, tag))
     
     if isinstance(model, list):
         for list_entry in model:
-            keys_list.extend(keys_with_tag(list_entry, tag))
+            keys_list.extend(_keys_with_tag(list_entry, tag))
 
     return keys_list
 
@@ -51,6 +73,16 @@ def keys_with_tag_matching_regex(model, regex_str:str, compiled_regex = None):
     if compiled_regex is None:
          compiled_regex = re.compile(regex_str)
 
+    keys_list = _keys_with_tag_matching_regex(model, regex_str, compiled_regex)
+    Timings.count("tag-lookups")
+    Timings.count("tagged-keys", len(keys_list))
+    return keys_list
+
+def _keys_with_tag_matching_regex(model, regex_str:str, compiled_regex):
+
+    if (index := model_index.lookup(model)) is not None:
+        return [(entry.key, entry.value) for entry in index.entries_with_tag_matching_regex(model, compiled_regex)]
+
     keys_list = []
 
     if isinstance(model, dict):
@@ -60,10 +92,10 @@ def keys_with_tag_matching_regex(model, regex_str:str, compiled_regex = None):
                     keys_list.append((dict_key, dict_value))
                     break   # We only capture 1 tag.
             if isinstance(dict_value, dict) or isinstance(dict_value, list):
-                keys_list.extend(keys_with_tag_matching_regex(dict_value, regex_str, compiled_regex))
+                keys_list.extend(_keys_with_tag_matching_regex(dict_value, regex_str, compiled_regex))
     
     if isinstance(model, list):
         for list_entry in model:
-            keys_list.extend(keys_with_tag_matching_regex(list_entry, regex_str, compiled_regex))
+            keys_list.extend(_keys_with_tag_matching_regex(list_entry, regex_str, compiled_regex))
 
     return keys_list
\ No newline at end of file
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import logging
+from functools import partial
 import convertors.html_convertor.query
 import utils.text_query
 import utils.value_query
@@ -30,37 +31,51 @@ def _process_query(query_def, input):
     logger.error(f"Could not process query of type '{query_type}'")
     return None
 
-# The output of processing content is always a list or value
-def parse(get_data_def, input):
+def _compile_query(query_def):
+    """ Returns a callable that runs the query, with the query function and its compiled configuration already bound """
 
-    logger.debug(f"Entering get.parse to process {get_data_def}")
+    query_type = query_def.get("type")
 
-    get_data_defs = []
+    for dispatch_table, compile_query in [(convertors.html_convertor.query.html_dispatch_table, convertors.html_convertor.query.compile_query),
+                                          (utils.text_query.text_dispatch_table, utils.text_query.compile_query),
+                                          (utils.value_query.value_dispatch_table, utils.value_query.compile_query)]:
+        if query_type in dispatch_table:
+            return partial(dispatch_table[query_type], query_cfg = compile_query(query_def))
+
+    # Running the query will report the error
+    return partial(_process_query, query_def)
+
+def _get_data_defs(get_data_def) -> list:
 
     if isinstance(get_data_def, dict) and get_data_def:
         # We have just 1 query
-        #if (query := get_data_def.get("query")):    # If None is returned then it evaluates to False
-        get_data_defs.append(get_data_def)
+        return [get_data_def]
     elif isinstance(get_data_def, list) and get_data_def:
-        get_data_defs = get_data_def
+        return get_data_def
+
+    return []
+
+def compile_get_data(get_data_def) -> list:
+    """ Returns a list of callables that run the queries of a get-data definition, see run() """
+
+    return [_compile_query(query_def.get("query", {})) for query_def in _get_data_defs(get_data_def)]
+
+def run(compiled_queries:list, input):
+    """ Runs the queries compiled by compile_get_data, each on the output of the previous one """
 
-    # Process each query.  Note, if we have no queries, we return the input
-    logger.debug(f"Executing {len(get_data_defs)} queries")
     data = input
-    for query_def in get_data_defs:
-        data = _process_query(query_def.get("query", {}), data)
-        # data_value = data
-        # if isinstance(data, dict) and "value" in data:
-        #     data_value = data["value"]
-        
-        # new_data = _process_query(query_def.get("query", {}), data_value)
+    for compiled_query in compiled_queries:
+        data = compiled_query(data)
 
-        # if isinstance(data, dict) and "value" in data:
-        #     data["value"] = new_data
-        # else:
-        #     data = new_data
+    return data
+
+# The output of processing content is always a list or value
+def parse(get_data_def, input):
+
+    logger.debug(f"Entering get.parse to process {get_data_def}")
 
+    data = run(compile_get_data(get_data_def), input)
 
     logger.debug(f"Leaving get.parse having processed {get_data_def}")
 
-    return data
\ No newline at end of file
+    return data
@@ -1,12 +1,38 @@
 #!/usr/bin/env python3
 
 import logging
+import sys
+import threading
 from utils.load_yaml import yaml_register_class
 from enum import Enum
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+# Callables that are told whenever a tag is added to a key e.g. so an index of tagged keys can be kept up to date.  Models
+# can be tagged on one thread while listeners are added on another, so the listeners are replaced (under a lock) rather
+# than changed, and addTag iterates the listeners as they were when it started.
+_tag_listeners = ()
+_tag_listeners_lock = threading.Lock()
+
+def add_tag_listener(listener):
+    global _tag_listeners
+    with _tag_listeners_lock:
+        if listener not in _tag_listeners:
+            _tag_listeners = _tag_listeners + (listener,)
+
+def remove_tag_listener(listener):
+    global _tag_listeners
+    with _tag_listeners_lock:
+        if listener in _tag_listeners:
+            _tag_listeners = tuple(existing for existing in _tag_listeners if existing != listener)
+
+def _intern(value):
+    # Key names and tags repeat across every row of a table, so share one copy of each (only exact str can be interned)
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
 class KeySerialiseType(Enum):
     NO_TAGS_PROPERTIES = 0
     TAGS = 1
@@ -14,6 +40,10 @@ class KeySerialiseType(Enum):
 
 
 class key:
+    # Models have a lot of keys, so keys are kept compact.  Tags are stored as the keys of a dict (an ordered set) and 
+    # properties are only allocated when the first property is added.
+    __slots__ = ("name", "_tags", "_properties")
+
     yaml_tag = u'!Key'
     
     serialise_type:KeySerialiseType = KeySerialiseType.TAGS_PROPERTIES
@@ -21,47 +51,76 @@ class key:
     def __init__(self, name:str, tags:list = None):
         # Fun python fact, don't have default value be something you want to change e.g. list, 
         # because default values are initialised once so all class instances will share them
-        self.name = name
+        self.name = _intern(name)
         if tags is None:
-            self.tags = list()
+            self._tags = {}
         else:   
-            self.tags = list(tags)  # This is apparently key otherwise we will edit the passed in list 
-        self.properties = {}
+            self._tags = dict.fromkeys(_intern(tag) for tag in tags)  # This is apparently key otherwise we will edit the passed in list 
+        self._properties = None
 
         yaml_register_class(key)
 
+    @property
+    def tags(self) -> list:
+        return list(self._tags)
+
+    @property
+    def properties(self) -> dict:
+        if self._properties is None:
+            self._properties = {}
+        return self._properties
+
     def copy(obj):
         if isinstance(obj, key):
-            return key(obj.name, obj.tags)
+            return key(obj.name, obj._tags)
         return None
 
     def addTag(self, tag:str):
-        if not tag in self.tags:
-            self.tags.append(tag)
+        if not tag in self._tags:
+            self._tags[_intern(tag)] = None
+            for listener in _tag_listeners:
+                listener(self, tag)
 
     def addTags(self, tags:list):
         for tag in tags:
             self.addTag(tag)
 
     def hasTag(self, tag):
-        return tag in self.tags
+        return tag in self._tags
 
     def getTags(self):
-        return self.tags
+        # A view of the tags, in the order they were added
+        return self._tags.keys()
 
     def addProperty(self, property_name, property_value):
         if property_name is not None and isinstance(property_name, str) and property_name != "":
-            self.properties[property_name] = property_value
+            if self._properties is None:
+                self._properties = {}
+            self._properties[property_name] = property_value
 
     def getProperty(self, property_name):
-        return self.properties.get(property_name, None)
+        if self._properties is None:
+            return None
+        return self._properties.get(property_name, None)
 
     def __str__(self):
         return self.name
-    
-    # def __getstate__(self):
-    #     # To customise jsonpickle output
-    #     return {"name":self.__str__()}
+
+    def __reduce__(self):
+        # A key is hashed by name, so when unpickling the name must be set before the key's properties, as they can refer to
+        # dicts the key is in (e.g. the 'row' property)
+        return (key, (self.name, self.tags), {"properties":self._properties})
+
+    def __getstate__(self):
+        # Keys are serialised (e.g. by jsonpickle) as if they had a name, tags and properties attribute
+        return {"name":self.name, "tags":self.tags, "properties":self._properties if self._properties is not None else {}}
+
+    def __setstate__(self, state:dict):
+        if "name" in state:
+            self.name = _intern(state["name"])
+        if "tags" in state:
+            self._tags = dict.fromkeys(_intern(tag) for tag in state["tags"])
+        self._properties = state.get("properties") or None
 
     # jsonpickle has a parameter 'keys' (by default False) that when it comes across non-string dictionary keys, like how we use this class, it will call
     # repr() on the object to get a string version.
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Index of the tagged keys in a model, so tag lookups don't have to walk the whole model
+"""
+
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from bisect import bisect_left
+from data.key import add_tag_listener, remove_tag_listener
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+# Models are built per request, and requests attach their indexes in a scope (see scope), so only a handful of indexes are
+# attached outside of a scope.  Keeping those bounded stops a long running process from holding on to every model it has
+# ever indexed.
+MAX_ATTACHED_INDEXES = 8
+
+class IndexEntry:
+    """ A key in an indexed model, along with where it was found """
+
+    __slots__ = ("order", "key", "parent", "path")
+
+    def __init__(self, order:int, entry_key, parent:dict, path:tuple):
+        self.order = order
+        self.key = entry_key
+        self.parent = parent
+        self.path = path
+
+    @property
+    def value(self):
+        # Read the value from the parent so an index never hands out a value that has since been replaced
+        return self.parent[self.key]
+
+class ModelIndex:
+    """
+    Maps tags to the keys in a model that have them.
+
+    Entries for a tag are kept in the order a depth first walk of the model would find them, and every dict/list in the
+    model records the range of entries beneath it, so a lookup on any part of the model returns exactly what walking
+    that part of the model would return.  Tags added to keys in the model after the index is built are picked up
+    (via data.key tag listeners) while the index is attached.  The index does not track structural changes to the
+    model, so detach (or re-attach) it if the model's dicts/lists are changed.
+    """
+
+    def __init__(self, model = None, build:bool = True):
+
+        self.model = model
+        self.marks = set()
+        # Anything derived from the tags in the model (e.g. lookup tables built by verifiers) can be stored here, and
+        # it is cleared whenever a tag is added to a key in the model
+        self.derived = {}
+        # The names of the derived entries that are kept when the index is pickled (e.g. when a template is cached), which
+        # must only refer to things in the model (and not e.g. config)
+        self.persisted = set()
+
+        self._tag_entries = {}
+        self._tag_orders = {}
+        self._key_entries = {}
+        self._spans = {}
+        self._regex_matches = {}
+        self._next_order = 0
+
+        if model is not None and build:
+            self._build(model)
+
+    def __getstate__(self):
+        # Containers and keys are looked up by id(), which is different once unpickled, so store them without the ids
+        state = self.__dict__.copy()
+        state["_spans"] = [span for span in self._spans.values() if span is not None]
+        state["_key_entries"] = list(self._key_entries.values())
+        state["derived"] = {name:value for name, value in self.derived.items() if name in self.persisted}
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault("persisted", set())
+        state["_spans"] = {id(span[0]):span for span in state["_spans"]}
+        state["_key_entries"] = {id(entry.key):entry for entry in state["_key_entries"]}
+        self.__dict__.update(state)
+
+    # open_container, add_key and close_container allow an index to be built by something else that is walking the model
+    # depth first (e.g. utils.model.annotate), rather than walking the model again just to build the index
+    def open_container(self, container):
+        if id(container) in self._spans:
+            # The same dict/list appears in the model more than once, so there is no single range of entries for it.
+            # Lookups on it fall back to walking the model.
+            self._spans[id(container)] = None
+            return
+        self._spans[id(container)] = [container, self._next_order, None]
+
+    def close_container(self, container):
+        if (span := self._spans.get(id(container))) is not None and span[2] is None:
+            span[2] = self._next_order
+
+    def add_key(self, entry_key, parent:dict, path:tuple):
+
+        entry = IndexEntry(self._next_order, entry_key, parent, path)
+        self._next_order += 1
+        self._key_entries[id(entry_key)] = entry
+        for tag in entry_key.getTags():
+            self._tag_entries.setdefault(tag, []).append(entry)
+            self._tag_orders.setdefault(tag, []).append(entry.order)
+
+    def _build(self, model):
+
+        if not isinstance(model, (dict, list)):
+            return
+
+        self.open_container(model)
+        stack = [(model, _children(model), ())]
+        while stack:
+            container, children, path = stack[-1]
+            for child_key, child_value in children:
+                child_path = path + (child_key,)
+                if isinstance(container, dict):
+                    self.add_key(child_key, container, child_path)
+                if isinstance(child_value, (dict, list)):
+                    self.open_container(child_value)
+                    stack.append((child_value, _children(child_value), child_path))
+                    break
+            else:
+                self.close_container(container)
+                stack.pop()
+
+    def _range(self, container):
+
+        if (span := self._spans.get(id(container))) is None or span[0] is not container or span[2] is None:
+            return None
+        return span[1], span[2]
+
+    def covers(self, container) -> bool:
+        return self._range(container) is not None
+
+    def _entries_in_range(self, tag_orders:list, tag_entries:list, container) -> list:
+
+        start, end = self._range(container)
+        return tag_entries[bisect_left(tag_orders, start):bisect_left(tag_orders, end)]
+
+    def entries_with_tag(self, container, tag:str) -> list:
+        """ Returns the IndexEntry for every key with the tag in the container (which must be covered by this index) """
+
+        if (tag_entries := self._tag_entries.get(tag)) is None:
+            return []
+        return self._entries_in_range(self._tag_orders[tag], tag_entries, container)
+
+    def entries_with_tag_matching_regex(self, container, compiled_regex) -> list:
+        """ Returns the IndexEntry for every key with a tag matching the regex in the container (which must be covered by this index) """
+
+        # Keyed by the compiled regex, as regexes with the same pattern can have different flags
+        if (matches := self._regex_matches.get(compiled_regex)) is None:
+            entries = {}
+            for tag, tag_entries in self._tag_entries.items():
+                if compiled_regex.search(tag) is not None:
+                    for entry in tag_entries:
+                        entries[entry.order] = entry
+            ordered = sorted(entries.values(), key = lambda entry: entry.order)
+            matches = ([entry.order for entry in ordered], ordered)
+            self._regex_matches[compiled_regex] = matches
+
+        return self._entries_in_range(matches[0], matches[1], container)
+
+    def key_order(self, entry_key) -> int:
+        """ Returns the position of the key in a depth first walk of the model, or None if the key isn't in the model """
+
+        if (entry := self._key_entries.get(id(entry_key))) is None or entry.key is not entry_key:
+            return None
+        return entry.order
+
+    def keys_by_order(self) -> dict:
+        """ Returns the keys in the model by their position in a depth first walk of the model (see key_order) """
+
+        return {entry.order:entry.key for entry in self._key_entries.values()}
+
+    def tag_added(self, tagged_key, tag:str):
+        """ Listener for data.key, so tags added to a key in the model are added to the index """
+
+        if (entry := self._key_entries.get(id(tagged_key))) is None or entry.key is not tagged_key:
+            return
+
+        tag_orders = self._tag_orders.setdefault(tag, [])
+        position = bisect_left(tag_orders, entry.order)
+        tag_orders.insert(position, entry.order)
+        self._tag_entries.setdefault(tag, []).insert(position, entry)
+
+        self._regex_matches.clear()
+        self.derived.clear()
+
+def _children(container):
+    if isinstance(container, dict):
+        return iter(container.items())
+    return enumerate(container)
+
+
+class _Attached:
+    """ Indexes attached to models, by the id of the model """
+
+    def __init__(self, max_indexes:int = None):
+        self.indexes = {}
+        self.max_indexes = max_indexes
+
+# Indexes attached outside of a scope are shared by the whole process, so only the most recently attached are kept
+_process_attached = _Attached(MAX_ATTACHED_INDEXES)
+# Indexes attached within a scope (e.g. a request), which threads inherit if they run in a copy of the scope's context
+_scope_attached = contextvars.ContextVar("attached_indexes", default=None)
+# Indexes are attached and detached by the threads fetching a document and its template
+_attached_indexes_lock = threading.RLock()
+# The same index (e.g. of a cached template) can be attached in more than one scope, so it listens for tags until it is
+# detached from all of them.  id(index) -> [index, number of times attached]
+_listening = {}
+
+def _attached() -> _Attached:
+    if (attached := _scope_attached.get()) is not None:
+        return attached
+    return _process_attached
+
+@contextmanager
+def scope():
+    """
+    Indexes attached within the scope (e.g. handling a request) are only used within it (including by threads run in a
+    copy of its context, see contextvars.copy_context), and are detached when it ends.  Can be used as a decorator.
+    """
+
+    token = _scope_attached.set(_Attached())
+    try:
+        yield
+    finally:
+        attached = _scope_attached.get()
+        _scope_attached.reset(token)
+        with _attached_indexes_lock:
+            for model, _ in list(attached.indexes.values()):
+                _detach(attached, model)
+
+def _listen(index:ModelIndex):
+
+    if (listening := _listening.get(id(index))) is not None and listening[0] is index:
+        listening[1] += 1
+        return
+    _listening[id(index)] = [index, 1]
+    add_tag_listener(index.tag_added)
+
+def _stop_listening(index:ModelIndex):
+
+    if (listening := _listening.get(id(index))) is None or listening[0] is not index:
+        return
+    listening[1] -= 1
+    if listening[1] == 0:
+        del _listening[id(index)]
+        remove_tag_listener(index.tag_added)
+
+def _detach(attached:_Attached, model):
+
+    if (attached_index := attached.indexes.get(id(model))) is not None and attached_index[0] is model:
+        del attached.indexes[id(model)]
+        _stop_listening(attached_index[1])
+
+def attach(model, index:ModelIndex = None) -> ModelIndex:
+    """
+    Builds (or uses the given) index for the model, which data.find will then use for lookups in the model.  The index is
+    attached for the current scope (see scope), or if there isn't one, for the process.
+    """
+
+    if index is None:
+        index = ModelIndex(model)
+
+    with _attached_indexes_lock:
+        attached = _attached()
+        _detach(attached, model)
+        if attached.max_indexes is not None and len(attached.indexes) >= attached.max_indexes:
+            # Evict the index that was attached first
+            _, (oldest_model, _) = next(iter(attached.indexes.items()))
+            _detach(attached, oldest_model)
+
+        attached.indexes[id(model)] = (model, index)
+        _listen(index)
+
+    return index
+
+def detach(model):
+    """ Stops using an index for the model (e.g. because the model has been structurally changed) """
+
+    with _attached_indexes_lock:
+        _detach(_attached(), model)
+
+def get_index(model) -> ModelIndex:
+    """ Returns the index attached to the model, or None """
+
+    if (attached_index := _attached().indexes.get(id(model))) is not None and attached_index[0] is model:
+        return attached_index[1]
+    return None
+
+def lookup(container) -> ModelIndex:
+    """ Returns an attached index that covers the container (a model or any dict/list in it), or None """
+
+    attached = _attached()
+    if not attached.indexes or not isinstance(container, (dict, list)):
+        return None
+
+    with _attached_indexes_lock:
+        attached_indexes = list(attached.indexes.values())
+
+    for _, index in attached_indexes:
+        if index.covers(container):
+            return index
+
+    return None
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Compiles the 'map' of a scheme into a plan, so converting a document doesn't re-interpret the scheme.  data.value and data.map
+run their definitions as plans too.
+"""
+
+import logging
+import data.get
+import data.output
+from data.key import key as Key
+from utils.property_str import pstr
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+class ValuePlan:
+    """
+    The compiled equivalent of a value definition (i.e. get-data, map-data and output-data).
+
+    A plan is compiled the first time it is run (so problems with a definition are reported when the definition is reached,
+    as data.value.parse does), or all at once by compile_plan.
+    """
+
+    def __init__(self, value_def:dict):
+
+        self.value_def = value_def
+        self.empty = not value_def
+        self.compiled = False
+
+    def compile(self):
+        """ Compiles this value definition (but not the value definitions of its keys) """
+
+        if self.compiled or self.empty:
+            return
+
+        self.queries = data.get.compile_get_data(self.value_def.get("get-data", {}))
+        self.map_data_def = self.value_def.get("map-data", [])
+        # The keys are compiled when there is something to map to them
+        self.key_plans = None
+        self.output_data_def = self.value_def.get("output-data", {})
+        self.compiled = True
+
+    def get_key_plans(self) -> list:
+
+        if self.key_plans is None:
+            self.key_plans = [KeyPlan(key_value) for key_value in self.map_data_def]
+        return self.key_plans
+
+    def compile_all(self):
+        """ Compiles this value definition and the value definitions of all its keys """
+
+        self.compile()
+        if not self.empty and self.map_data_def:
+            for key_plan in self.get_key_plans():
+                key_plan.value_plan.compile_all()
+
+    def run(self, input):
+
+        logger.debug(f'Entering: value_def = {self.value_def.keys() if self.value_def else None}')
+
+        if self.empty:
+            # There is nothing defined to change the input, so we can just return the input
+            return input
+
+        self.compile()
+
+        # If there is a get-data section use that to extract the data we want to map
+        data_value = data.get.run(self.queries, input)
+
+        # If there is no mapping, then we just return the value
+        if not self.map_data_def:
+            logger.debug("No map_data so directly passing output of get-data to output-data")
+            output = data_value
+        elif isinstance(data_value, list):
+            # If get-data returned a list then each item in the list needs to be mapped
+            logger.debug(f"A list of {len(data_value)} data inputs will be mapped")
+            output = [map_keys(self.get_key_plans(), list_item) for list_item in data_value]
+        else:
+            output = map_keys(self.get_key_plans(), data_value)
+
+        output = data.output.process(self.output_data_def, output)
+
+        logger.debug(f'Leaving: value_def = {self.value_def.keys()}')
+
+        return output
+
+class KeyPlan:
+    """ The compiled equivalent of a map-data entry, creates the key and the value it maps to """
+
+    def __init__(self, key_value:dict):
+
+        key_def = key_value["key"]
+        if isinstance(key_def, str):
+            self.name, self.section, self.tags = key_def, None, None
+        elif isinstance(key_def, dict):
+            self.name = key_def["name"]
+            self.section = key_def.get("section")
+            self.tags = key_def.get("tags") if isinstance(key_def.get("tags"), list) else None
+        else:
+            raise TypeError(f"The key {key_def} must be a name or a dict with a 'name' key")
+
+        self.value_plan = ValuePlan(key_value["value"])
+
+    def new_key(self) -> Key:
+
+        new_key = Key(self.name)
+        if self.section is not None:
+            # Record a friendly section name for this key, if one exists e.g. a table name
+            new_key.addProperty("section", self.section)
+        if self.tags is not None:
+            new_key.addTags(self.tags)
+
+        return new_key
+
+def map_keys(key_plans:list, input) -> dict:
+    """ Creates the key of each key plan, mapped to the value its value plan gives for the input """
+
+    logger.debug(f'Entering: Key count = {len(key_plans)}, data count = {len(input) if isinstance(input, list) else 1}')
+
+    output = {}
+
+    for key_plan in key_plans:
+
+        key_def = key_plan.new_key()
+        logger.debug(f"Mapping data to '{key_def}'")
+
+        value = key_plan.value_plan.run(input)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            # Values can be large (e.g. whole tables), so are only formatted when they will be logged
+            logger.debug(f"Mapping '{key_def}':'{value}'")
+
+        # The value might have additional information we need to store against the key
+        if isinstance(value, pstr):
+            for dict_key, dict_value in value.properties.items():
+                key_def.addProperty(dict_key, dict_value)
+            output[key_def] = value.to_str()
+        else:
+            output[key_def] = value
+
+        if key_def.getProperty("section") is not None:
+            # Let the key reference the value for these high level sections. Makes searching sections e.g. tables, easier given only a tagged key.
+            if isinstance(value, pstr):
+                key_def.addProperty("value", value.to_str())
+            else:
+                key_def.addProperty("value", value)
+
+    logger.debug(f'Leaving: Key count = {len(key_plans)}, data count = {len(input) if isinstance(input, list) else 1}')
+
+    return output
+
+def compile_plan(value_def:dict) -> ValuePlan:
+    """
+    Compiles a value definition (e.g. the 'map' of a scheme) into a plan.
+
+    Returns None if the definition could not be compiled, in which case it should be interpreted by data.value.parse, which will
+    report any problems with the definition if and when they are reached.
+    """
+
+    try:
+        plan = ValuePlan(value_def)
+        plan.compile_all()
+        return plan
+    except Exception as err:
+        logger.warning(f"Could not compile scheme map, it will be interpreted instead. err='{err}'")
+        return None
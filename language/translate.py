@@ -3,11 +3,13 @@
 Translate class responsible for localisation
 """
 
+import re
 import logging
 from pathlib import Path
+from functools import lru_cache
 from utils import match
 from utils.config import ConfigBase
-from utils.load_yaml import yaml_file_to_str, yaml_str_to_dict, yaml_file_to_dict
+from utils.load_yaml import yaml_file_to_str, yaml_str_to_dict, yaml_config_file_to_dict, load_file_once, freeze
 from utils.request import Request
 
 import utils.logging
@@ -19,6 +21,14 @@ env = Environment(
     autoescape=select_autoescape()
 )
 
+@lru_cache(maxsize=4096)
+def _compile(source:str):
+    # Texts come from config, so there are only so many of them, and compiling a template is much slower than rendering it
+    return env.from_string(source)
+
+# A Jinja expression or statement that refers to the request
+_REFERS_TO_REQUEST = re.compile(r"\{[{%][^}%]*\brequest\b")
+
 TRANSLATE_CONFIG_YAML = "translate.yaml"
 TRANSLATE_CONFIG_YAML_PATH = str(Path(__file__).absolute().parent.joinpath(TRANSLATE_CONFIG_YAML))
 
@@ -39,7 +49,7 @@ class Translate:
         cls.global_context = {"request": Request.get()}
         languageCode = Request.lang
 
-        yaml_config_dict = yaml_file_to_dict(ConfigBase.getConfigPath(TRANSLATE_CONFIG_YAML_PATH))
+        yaml_config_dict = yaml_config_file_to_dict(ConfigBase.getConfigPath(TRANSLATE_CONFIG_YAML_PATH))
 
         if languageCode is None or languageCode == "":
             languageCode = cls.defLanguageCode
@@ -52,17 +62,20 @@ class Translate:
 
         cls.languageCode = languageCode
         cls.translations = yaml_config_dict.get(cls.languageCode, {})
+        # Localised texts can depend on the request, so are only cached for a request
+        cls._cache = {}
 
     @classmethod
     def localise(cls, texts:dict, texts_key:str = None, context:dict = {}, cache_key = None, ignore_format:bool = False):
 
         # localise is expensive to call a lot, so cache context free values.  This is fine as language does not change per execution
+        output_cache_key = None
         if context is None or len(context) == 0:
-            if cache_key is None:
-                # TODO making texts hashable via str(texts) is one way, there might be faster other ways e.g. frozenset
-                cache_key = str(texts)
-            if (cached_value := cls._cache.get((cache_key, texts_key, ignore_format), None)) is not None:
-                return cached_value
+            # Texts are read from config and not changed, so without a cache_key they are identified by identity.  The texts are
+            # cached along with the output, so their id() can't be reused by other texts.
+            output_cache_key = (cache_key if cache_key is not None else id(texts), texts_key, ignore_format)
+            if (cached := cls._cache.get(output_cache_key, None)) is not None and (cache_key is not None or cached[0] is texts):
+                return cached[1]
 
         if texts is None or len(texts) == 0:
             logger.error("Translate requires a dict of texts to localise from, but an empty dict was provided.")
@@ -108,29 +121,42 @@ class Translate:
                 logger.warning(f"The localised texts didn't have a format entry matching '{format}' or the default '{cls.defOutputFormatKey}'.")
                 
         if isinstance(textsLanguageText, str):
-            output = env.from_string(textsLanguageText).render(context | cls.translations | cls.global_context)
+            output = _compile(textsLanguageText).render(context | cls.translations | cls.global_context)
         elif isinstance(textsLanguageText, list):
             output = []
             for textsLanguageTextEntry in textsLanguageText:
                 # Assume all entries are strings
-                output.append(env.from_string(textsLanguageTextEntry).render(context | cls.translations | cls.global_context))
+                output.append(_compile(textsLanguageTextEntry).render(context | cls.translations | cls.global_context))
         else:
             logger.warning(f"Unsupported type '{type(textsLanguageText)}' passed to method.  Returning un-localised value.")
             output = textsLanguageText
 
-        if context is None or len(context) == 0:
-            cls._cache[(cache_key, texts_key, ignore_format)] = output
+        if output_cache_key is not None:
+            cls._cache[output_cache_key] = (texts, output)
 
         return output
 
     @classmethod
     def localiseYamlFile(cls, filepath:Path) -> dict:
+        """
+        Returns the YAML file, rendered (as a Jinja template) in the current language.  Each version of the file is only
+        rendered once per language, and shared (as a FrozenDict), so files can't refer to the request.
+        """
+
+        return load_file_once(filepath, cls._localiseYamlFile, ("localised", cls.languageCode))
+
+    @classmethod
+    def _localiseYamlFile(cls, filepath:str, mtime:int) -> dict:
 
         yaml_str = yaml_file_to_str(filepath)
 
-        localised_yaml_str = env.from_string(yaml_str).render(cls.translations | cls.global_context)
+        if _REFERS_TO_REQUEST.search(yaml_str):
+            logger.warning(f"The config file '{filepath}' refers to 'request', which config files can no longer do (it will be rendered with an empty request)")
+
+        # Not rendered with the request (in global_context), as the rendered file is shared by every request, so the request is empty
+        localised_yaml_str = env.from_string(yaml_str).render(cls.translations | {"request":{}})
 
-        return yaml_str_to_dict(localised_yaml_str)
+        return freeze(yaml_str_to_dict(localised_yaml_str))
 
     @classmethod
     def getTranslation(cls, key:str):
@@ -12,6 +12,7 @@ import data
 import measure.measure_config as manage_config
 from measure.measure_output import MeasureOutput
 from measure.measure_output import Measurement
+from measure import measure_similarity
 from data import find
 from utils import keymaster, match
 
@@ -169,6 +170,74 @@ def _get_rows_of_measured_key_values(config, data_tag_value, base_tag_tuple):
 
     return rows
 
+def _row_matches(this_row:list, other_row:list) -> bool:
+    """ Returns True if every measured value in this_row matches a value in the column of the same name in other_row """
+
+    # For every measure tag value in this_row
+    for this_key, this_value in this_row:
+
+        # We want to know if this_value matches a other_value
+        col_match_found = False
+        for other_key, other_value in other_row:
+            # The same tag could be used in multiple columns, so make sure we are comparing matching columns
+            if this_key.name == other_key.name:
+                # Check if the other_value is a match (partial matches are made later, see 'similarity' in measure_config.yaml)
+                if match.equals(this_value, other_value):
+                    col_match_found = True
+                    break
+
+        if not col_match_found:
+            return False
+
+    return True
+
+class _RowIndex:
+    """
+    Rows of measured key values, indexed by the canonical form of each value in each column, so a row can be matched
+    (as per _row_matches) without comparing it to every row.
+    """
+
+    def __init__(self, rows:list):
+
+        self.rows = rows
+        # Positions of the rows by (column name, canonical value)
+        self.by_value = {}
+        # Rows can only be indexed if all their values are strings (or lists of strings)
+        self.indexed = True
+
+        for position, row in enumerate(rows):
+            for key, value in row:
+                for column_value in (value if isinstance(value, list) else [value]):
+                    if (canonical_value := match.canonical(column_value)) is None:
+                        self.indexed = False
+                        self.by_value = {}
+                        return
+                    self.by_value.setdefault((key.name, canonical_value), set()).add(position)
+
+    def matching_positions(self, this_row:list) -> set:
+        """ Returns the positions of the rows that match this_row """
+
+        canonical_values = [match.canonical(this_value) for _, this_value in this_row]
+        if not self.indexed or None in canonical_values:
+            return {position for position, other_row in enumerate(self.rows) if _row_matches(this_row, other_row)}
+
+        if len(this_row) == 0:
+            return set(range(len(self.rows)))
+
+        # A row matches if it's in the rows for every (column name, value) of this_row
+        positions = sorted((self.by_value.get((this_key.name, canonical_value), set()) for (this_key, _), canonical_value in zip(this_row, canonical_values)), key=len)
+        matching = set(positions[0])
+        for column_positions in positions[1:]:
+            if not matching:
+                break
+            matching &= column_positions
+
+        return matching
+
+    def has_match(self, this_row:list) -> bool:
+        """ Returns True if any of the rows match this_row """
+        return len(self.matching_positions(this_row)) > 0
+
 def distance(config:dict, measurement:Measurement, data_tag, base_tag_tuple, this_model:dict, other_model:dict):
 
     _, this_data_tag_value = find.key_with_tag(this_model, data_tag)
@@ -181,39 +250,25 @@ def distance(config:dict, measurement:Measurement, data_tag, base_tag_tuple, thi
 
     measurement.addCount(len(other_rows))
 
-    # These loops look through this_model for values that don't exist (are extra), compared to the other_model
+    # Look through this_model for values that don't exist (are extra), compared to the other_model
+    other_rows_index = _RowIndex(other_rows)
+    unmatched_rows = []
+    matched_positions = set()
     for this_row in this_rows:
-        
-        match_found = False
-        for other_row in other_rows:
-            # Go through every other_row, looking for match
-            row_match_found = True
-        
-            # For every measure tag value in this_row
-            for this_key, this_value in this_row:
-        
-                # We want to know if this_value matches a other_value
-                col_match_found = False
-                for other_key, other_value in other_row:
-                    # The same tag could be used in multiple columns, so make sure we are comparing matching columns
-                    if this_key.name == other_key.name:
-                        # Check if the other_value is a match
-                        # TODO account for partial matches
-                        if match.equals(this_value, other_value):
-                            col_match_found = True
-                            break
-
-                if not col_match_found:
-                    row_match_found = False
-                    break
+        if matching_positions := other_rows_index.matching_positions(this_row):
+            matched_positions |= matching_positions
+        else:
+            unmatched_rows.append(this_row)
 
-            if row_match_found:
-                match_found = True
-                break
-        
-        if not match_found:
-            # Add the 'this' value to the measurement, as it's value was not found in 'other'
-            measurement.addDistance(this_row)
+    similarity_config = config.get("similarity", {}) or {}
+    if similarity_config.get("enabled", False) and len(unmatched_rows) > 0:
+        # Rows that aren't equal to any row may still be a reworded version of a row that nothing was equal to
+        other_unmatched_rows = [other_row for position, other_row in enumerate(other_rows) if position not in matched_positions]
+        unmatched_rows = measure_similarity.unmatched_rows(similarity_config, unmatched_rows, other_unmatched_rows)
+
+    for this_row in unmatched_rows:
+        # Add the 'this' value to the measurement, as it's value was not found in 'other'
+        measurement.addDistance(this_row)
 
     return
 
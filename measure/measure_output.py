@@ -26,7 +26,7 @@ class Measurement:
 
         template_text_file = config.get("output").get("template-text-file")
 
-        self.templated_texts = utils.load_yaml.yaml_file_to_dict(template_text_file).get("output-texts")
+        self.templated_texts = utils.load_yaml.yaml_config_file_to_dict(template_text_file).get("output-texts")
         self.config = config
         self.this_model_title = this_model_title
         self.this_model_version = this_model_version
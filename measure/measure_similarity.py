@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Scores how similar rows of measured values are, so a row that has been reworded can still be matched to its original row
+
+Uses NumPy (the optional 'similarity' extra) to score all pairs of rows at once if it is installed, otherwise rows are scored
+one pair at a time, which is much slower so fewer rows are compared.  Either way rows are paired by an assignment (the
+Hungarian algorithm), so the same rows are paired whether or not NumPy is installed.
+"""
+
+import re
+import math
+import logging
+from collections import Counter
+from utils import match
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NGRAM = 3
+DEFAULT_MAX_ROWS = 1000
+DEFAULT_MAX_ROWS_WITHOUT_NUMPY = 200
+# Scores are rounded (to this many parts) before pairing, so the tiny differences between NumPy and Python arithmetic can't change the pairs
+_PAIRING_SCALE = 10**9
+# The number of n-grams counted in a dense matrix at a time when scoring with NumPy
+_VOCABULARY_CHUNK = 1024
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _column_text(row:list, column_name:str) -> str:
+
+    texts = []
+    for key, value in row:
+        if key.name != column_name:
+            continue
+        for column_value in (value if isinstance(value, list) else [value]):
+            if (canonical_value := match.canonical(column_value)) is None:
+                canonical_value = str(column_value).casefold().strip()
+            texts.append(canonical_value)
+
+    return _WHITESPACE.sub(" ", " ".join(texts)).strip()
+
+def _ngrams(text:str, ngram:int) -> Counter:
+    """ The character n-grams of the text (padded with a space each side, so short words still have n-grams) """
+
+    if text == "":
+        return Counter()
+    padded = f" {text} "
+    if len(padded) <= ngram:
+        return Counter([padded])
+    return Counter(padded[start:start + ngram] for start in range(len(padded) - ngram + 1))
+
+def _column_names(rows:list) -> list:
+
+    column_names = {}
+    for row in rows:
+        for key, _ in row:
+            column_names.setdefault(key.name, None)
+    return list(column_names)
+
+def _cosine(grams:Counter, grams_norm:float, other_grams:Counter, other_grams_norm:float) -> float:
+
+    if grams_norm == 0 or other_grams_norm == 0:
+        # Empty values are the same as each other, and nothing like anything else
+        return 1.0 if grams_norm == other_grams_norm else 0.0
+    if len(grams) > len(other_grams):
+        grams, other_grams = other_grams, grams
+    return sum(count * other_grams.get(gram, 0) for gram, count in grams.items()) / (grams_norm * other_grams_norm)
+
+def _norm(grams:Counter) -> float:
+    return math.sqrt(sum(count * count for count in grams.values()))
+
+def _column_similarity_python(grams_list:list, other_grams_list:list) -> list:
+
+    norms = [_norm(grams) for grams in grams_list]
+    other_norms = [_norm(grams) for grams in other_grams_list]
+    return [[_cosine(grams, norm, other_grams, other_norm) for other_grams, other_norm in zip(other_grams_list, other_norms)]
+            for grams, norm in zip(grams_list, norms)]
+
+def _counts(grams_list:list, vocabulary:dict) -> tuple:
+    """ The n-gram counts of the rows, as (row, vocabulary position, count) arrays ordered by vocabulary position """
+
+    rows, positions, counts = [], [], []
+    for row, grams in enumerate(grams_list):
+        for gram, count in grams.items():
+            rows.append(row)
+            positions.append(vocabulary[gram])
+            counts.append(count)
+
+    order = numpy.argsort(numpy.array(positions, dtype=numpy.int64), kind="stable")
+    return numpy.array(rows, dtype=numpy.int64)[order], numpy.array(positions, dtype=numpy.int64)[order], numpy.array(counts, dtype=float)[order]
+
+def _counts_matrix(counts:tuple, row_count:int, start:int, end:int):
+    """ The n-gram counts of the rows, for the vocabulary from start to end, as a dense matrix """
+
+    rows, positions, values = counts
+    first, last = numpy.searchsorted(positions, [start, end])
+    matrix = numpy.zeros((row_count, end - start))
+    matrix[rows[first:last], positions[first:last] - start] = values[first:last]
+    return matrix
+
+def _column_similarity_numpy(grams_list:list, other_grams_list:list):
+
+    vocabulary = {}
+    for grams in grams_list + other_grams_list:
+        for gram in grams:
+            vocabulary.setdefault(gram, len(vocabulary))
+
+    counts = _counts(grams_list, vocabulary)
+    other_counts = _counts(other_grams_list, vocabulary)
+
+    # Only a chunk of the vocabulary is held as a dense matrix at a time, as rows x vocabulary counts can be large
+    similarity = numpy.zeros((len(grams_list), len(other_grams_list)))
+    for start in range(0, len(vocabulary), _VOCABULARY_CHUNK):
+        end = min(start + _VOCABULARY_CHUNK, len(vocabulary))
+        similarity += _counts_matrix(counts, len(grams_list), start, end) @ _counts_matrix(other_counts, len(other_grams_list), start, end).T
+
+    norms = numpy.array([_norm(grams) for grams in grams_list])
+    other_norms = numpy.array([_norm(grams) for grams in other_grams_list])
+    empty, other_empty = norms == 0, other_norms == 0
+    similarity /= numpy.outer(numpy.where(empty, 1, norms), numpy.where(other_empty, 1, other_norms))
+    # Empty values are the same as each other, and nothing like anything else
+    similarity[empty[:, None] & other_empty[None, :]] = 1.0
+
+    return similarity
+
+def similarity_matrix(rows:list, other_rows:list, ngram:int = DEFAULT_NGRAM):
+    """
+    Returns the similarity (0 to 1) of every row to every other row, as a matrix (a NumPy array if NumPy is installed, or a
+    list of lists).  The similarity of 2 rows is the mean, over the columns (by name), of the cosine similarity of the
+    character n-grams of their canonical values in the column.
+    """
+
+    column_names = _column_names(rows + other_rows)
+    column_similarity = _column_similarity_numpy if numpy is not None else _column_similarity_python
+
+    total = None
+    for column_name in column_names:
+        grams_list = [_ngrams(_column_text(row, column_name), ngram) for row in rows]
+        other_grams_list = [_ngrams(_column_text(other_row, column_name), ngram) for other_row in other_rows]
+        similarity = column_similarity(grams_list, other_grams_list)
+        if total is None:
+            total = similarity
+        elif numpy is not None:
+            total = total + similarity
+        else:
+            total = [[row_total + value for row_total, value in zip(total_row, similarity_row)] for total_row, similarity_row in zip(total, similarity)]
+
+    if total is None:
+        # No columns, so every row is the same as every other row
+        return numpy.ones((len(rows), len(other_rows))) if numpy is not None else [[1.0] * len(other_rows) for _ in rows]
+
+    if numpy is not None:
+        return total / len(column_names)
+    return [[value / len(column_names) for value in total_row] for total_row in total]
+
+def _scaled(value) -> int:
+    return round(float(value) * _PAIRING_SCALE)
+
+def _similar_pairs(similarity, threshold:float) -> dict:
+    """ The similarity, scaled to an integer, of each (row, other row) pair that is at least threshold similar """
+
+    minimum = _scaled(threshold)
+
+    if numpy is not None and isinstance(similarity, numpy.ndarray):
+        scaled = numpy.rint(similarity * _PAIRING_SCALE).astype(numpy.int64)
+        rows, other_rows = numpy.nonzero(scaled >= minimum)
+        return {(int(row), int(other_row)): int(scaled[row, other_row]) for row, other_row in zip(rows, other_rows)}
+
+    pairs = {}
+    for row, similarity_row in enumerate(similarity):
+        for other_row, value in enumerate(similarity_row):
+            if (scaled := _scaled(value)) >= minimum:
+                pairs[(row, other_row)] = scaled
+    return pairs
+
+def _connected(pairs:dict) -> list:
+    """ The (rows, other rows) of each group of rows that are connected by the pairs, as pairing rows in different groups is independent """
+
+    neighbours = {}
+    for row, other_row in pairs:
+        neighbours.setdefault((0, row), []).append((1, other_row))
+        neighbours.setdefault((1, other_row), []).append((0, row))
+
+    groups = []
+    visited = set()
+    for node in sorted(neighbours):
+        if node in visited:
+            continue
+        visited.add(node)
+        group = ([], [])
+        nodes = [node]
+        while nodes:
+            side, position = nodes.pop()
+            group[side].append(position)
+            for neighbour in neighbours[(side, position)]:
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    nodes.append(neighbour)
+        groups.append((sorted(group[0]), sorted(group[1])))
+
+    return groups
+
+def _assignment(weights:list) -> dict:
+    """
+    The Hungarian algorithm.  Returns the column assigned to each row (there must be no more rows than columns) that
+    maximises the total weight.
+    """
+
+    row_count, column_count = len(weights), len(weights[0])
+    # Potentials of the rows and columns, the row assigned to each column, and the previous column on the augmenting path (1-based, column 0 is a sentinel)
+    row_potential = [0] * (row_count + 1)
+    column_potential = [0] * (column_count + 1)
+    column_row = [0] * (column_count + 1)
+    previous_column = [0] * (column_count + 1)
+
+    for row in range(1, row_count + 1):
+        column_row[0] = row
+        column = 0
+        min_slack = [math.inf] * (column_count + 1)
+        used = [False] * (column_count + 1)
+        while True:
+            used[column] = True
+            path_row = column_row[column]
+            delta = math.inf
+            next_column = 0
+            for other_column in range(1, column_count + 1):
+                if used[other_column]:
+                    continue
+                slack = -weights[path_row - 1][other_column - 1] - row_potential[path_row] - column_potential[other_column]
+                if slack < min_slack[other_column]:
+                    min_slack[other_column] = slack
+                    previous_column[other_column] = column
+                if min_slack[other_column] < delta:
+                    delta = min_slack[other_column]
+                    next_column = other_column
+            for other_column in range(column_count + 1):
+                if used[other_column]:
+                    row_potential[column_row[other_column]] += delta
+                    column_potential[other_column] -= delta
+                else:
+                    min_slack[other_column] -= delta
+            column = next_column
+            if column_row[column] == 0:
+                break
+        while column != 0:
+            column_row[column] = column_row[previous_column[column]]
+            column = previous_column[column]
+
+    return {column_row[column] - 1: column - 1 for column in range(1, column_count + 1) if column_row[column] != 0}
+
+def pair_rows(similarity, threshold:float) -> list:
+    """
+    Returns the (row, other row) pairs, as positions, that are at least threshold similar.  Each row is paired with at
+    most one other row, pairing as many rows as possible and then choosing the pairs that are most similar overall.
+    Similarities are rounded before pairing, so the same rows are paired whether or not NumPy is installed.
+    """
+
+    pairs = _similar_pairs(similarity, threshold)
+
+    paired = []
+    for rows, other_rows in _connected(pairs):
+        if len(rows) == 1 or len(other_rows) == 1:
+            # Only one pair can be made, so make the most similar one
+            paired.append(max(((row, other_row) for row in rows for other_row in other_rows), key=lambda pair: (pairs[pair], -pair[0], -pair[1])))
+            continue
+
+        # A pair is worth more than any total similarity, so the most pairs are made
+        pair_weight = (min(len(rows), len(other_rows)) + 1) * _PAIRING_SCALE
+        weights = [[pair_weight + pairs[(row, other_row)] if (row, other_row) in pairs else 0 for other_row in other_rows] for row in rows]
+        if len(rows) <= len(other_rows):
+            assigned = [(rows[row], other_rows[other_row]) for row, other_row in _assignment(weights).items()]
+        else:
+            transposed = [list(column) for column in zip(*weights)]
+            assigned = [(rows[row], other_rows[other_row]) for other_row, row in _assignment(transposed).items()]
+        paired.extend(pair for pair in assigned if pair in pairs)
+
+    return sorted(paired)
+
+def unmatched_rows(config:dict, rows:list, other_rows:list) -> list:
+    """
+    Returns the rows that are not similar enough (as per the 'threshold' in config) to one of the other_rows, when each
+    row can be paired with at most one of the other_rows.
+    """
+
+    if len(rows) == 0 or len(other_rows) == 0:
+        return rows
+
+    if numpy is not None:
+        max_rows_key, default_max_rows = "max-rows", DEFAULT_MAX_ROWS
+    else:
+        max_rows_key, default_max_rows = "max-rows-without-numpy", DEFAULT_MAX_ROWS_WITHOUT_NUMPY
+    max_rows = config.get(max_rows_key, default_max_rows)
+    if len(rows) > max_rows or len(other_rows) > max_rows:
+        logger.warning(f"Not matching rows by similarity as there are more than {max_rows} ('{max_rows_key}') rows to match ({len(rows)} and {len(other_rows)})")
+        return rows
+
+    similarity = similarity_matrix(rows, other_rows, config.get("ngram", DEFAULT_NGRAM))
+    paired = {row for row, _ in pair_rows(similarity, config.get("threshold", DEFAULT_THRESHOLD))}
+    logger.debug(f"Matched {len(paired)} of {len(rows)} rows by similarity")
+
+    return [row for position, row in enumerate(rows) if position not in paired]
@@ -8,7 +8,7 @@ from pathlib import Path
 from utils.config import ConfigBase
 import utils.match as match
 import utils.load_modules as load_modules
-from utils.load_yaml import yaml_file_to_dict
+from utils.load_yaml import yaml_config_file_to_dict
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -21,7 +21,7 @@ PROVIDERS_DISPATCH_YAML_PATH = str(Path(__file__).absolute().parent.joinpath(PRO
 
 def _load_config():
 
-    yaml_config_dict = yaml_file_to_dict(ConfigBase.getConfigPath(PROVIDERS_CONFIG_YAML_PATH))
+    yaml_config_dict = yaml_config_file_to_dict(ConfigBase.getConfigPath(PROVIDERS_CONFIG_YAML_PATH))
 
     return yaml_config_dict.get("providers", {})
 
@@ -6,7 +6,7 @@ Class Response
 import logging
 from utils.config import ConfigBase
 from utils.output import FormatOutput
-from utils.load_yaml import yaml_file_to_dict
+from utils.load_yaml import yaml_config_file_to_dict
 from data.key import key as Key
 from language.translate import Translate
 from utils.request import Request
@@ -34,7 +34,7 @@ class Response:
         self.meta_override = meta_override
 
         self.response_config = ResponseConfig()
-        self.templated_texts = yaml_file_to_dict(ConfigBase.getConfigPath(self.response_config.template_text_file)).get("output-texts")
+        self.templated_texts = yaml_config_file_to_dict(ConfigBase.getConfigPath(self.response_config.template_text_file)).get("output-texts")
 
     
     def getContentType(self):
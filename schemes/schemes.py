@@ -7,7 +7,8 @@ import logging
 from pathlib import Path
 from utils.config import ConfigBase
 from utils.error import SchemeError
-from utils.load_yaml import yaml_file_to_dict
+from utils.load_yaml import yaml_file_to_dict, yaml_config_file_to_dict, load_file_once, freeze, FrozenDict
+import data.plan
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -15,9 +16,40 @@ logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 SCHEMES_YAML = "schemes.yaml"
 SCHEMES_YAML_PATH = str(Path(__file__).absolute().parent.joinpath(SCHEMES_YAML))
 
+class Scheme(FrozenDict):
+    """
+    A loaded scheme i.e. the contents of the 'scheme' section of a scheme file, along with its compiled 'map'.  Schemes are
+    shared by every request, so (like other loaded config) can't be changed.
+    """
+
+    def __init__(self, scheme_dict:dict, name:str, path:str, mtime:int):
+        super().__init__(freeze(scheme_dict))
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self._map_plan = None
+        self._map_compiled = False
+
+    def map_plan(self) -> data.plan.ValuePlan:
+        """ Returns the compiled 'map' of the scheme (compiling it the first time), or None if it could not be compiled """
+
+        if not self._map_compiled:
+            self._map_plan = data.plan.compile_plan(self.get("map"))
+            self._map_compiled = True
+
+        return self._map_plan
+
+    def __reduce__(self):
+        return (type(self), (dict(self), self.name, self.path, self.mtime))
+
+    @property
+    def cache_key(self) -> tuple:
+        """ Identifies this version of the scheme, so things derived from it can be cached """
+        return (self.path, self.mtime)
+
 def load_scheme(template_scheme):
 
-    yaml_dict = yaml_file_to_dict(ConfigBase.getConfigPath(SCHEMES_YAML_PATH)) 
+    yaml_dict = yaml_config_file_to_dict(ConfigBase.getConfigPath(SCHEMES_YAML_PATH))
     maps = yaml_dict["schemes"]
     
     logger.debug(f"Looking up scheme file for '{template_scheme}'")
@@ -27,8 +59,8 @@ def load_scheme(template_scheme):
         raise SchemeError("scheme.unknown-scheme", {"scheme":{"known_schemes":str(list(maps.keys())).replace("'", "")}})
 
     #yaml_dict = yaml_file_to_dict(str(Path(__file__).absolute().parent.joinpath(modelmap_file)))
-    yaml_dict = yaml_file_to_dict(ConfigBase.getConfigPath(modelmap_file))
-    return yaml_dict["scheme"]
+    scheme_path = ConfigBase.getConfigPath(modelmap_file)
+    return load_file_once(scheme_path, lambda path, mtime: Scheme(yaml_file_to_dict(path)["scheme"], template_scheme, path, mtime), "scheme")
 
 
 # TODO write a validation routine for schemes.  
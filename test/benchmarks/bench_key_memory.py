@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Measures the memory used by the keys of a model, compared to keys with the previous layout (a __dict__, a list of tags and a properties dict)
+
+Run from the repository root with: PYTHONPATH=. python test/benchmarks/bench_key_memory.py
+"""
+
+import gc
+import tracemalloc
+from data.key import key as Key
+
+ROWS = 10000
+COLUMNS = ["ID", "Component", "Threat", "Controls", "Status"]
+TAGS = ["threats-data", "mandatory", "tref-components-data-component"]
+
+class LegacyKey:
+    """ The attribute layout of keys before they were compacted """
+
+    def __init__(self, name:str, tags:list = None):
+        self.name = name
+        self.tags = list(tags) if tags is not None else list()
+        self.properties = {}
+
+    def addTag(self, tag:str):
+        if not tag in self.tags:
+            self.tags.append(tag)
+
+def _model(key_class) -> list:
+    # Names and tags are built per row, as they are when a document is converted
+    model = []
+    for row in range(ROWS):
+        model.append({key_class("".join(list(column)), ["".join(list(tag)) for tag in TAGS[:2]]):f"{column} {row}" for column in COLUMNS})
+        for row_key in model[-1]:
+            row_key.addTag("".join(list(TAGS[2])))
+    return model
+
+def measure(key_class) -> int:
+    """ Returns the bytes allocated building a model of ROWS rows with keys of the key_class """
+
+    gc.collect()
+    tracemalloc.start()
+    model = _model(key_class)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+
+    return allocated
+
+if __name__ == "__main__":
+
+    legacy_bytes = measure(LegacyKey)
+    compact_bytes = measure(Key)
+    keys = ROWS * len(COLUMNS)
+
+    print(f"{keys} keys")
+    print(f"legacy layout:  {legacy_bytes:>12,} bytes ({legacy_bytes / keys:.0f} bytes per key, including values)")
+    print(f"compact layout: {compact_bytes:>12,} bytes ({compact_bytes / keys:.0f} bytes per key, including values)")
+    print(f"reduction:      {100 * (legacy_bytes - compact_bytes) / legacy_bytes:.0f}%")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Measures the cost of localising verifier issues, as Translate.localise was before (outputs cached by str(texts) and templates
+compiled on every call) and as it is now (outputs cached by the identity of the texts and compiled templates cached)
+
+Run from the repository root with: PYTHONPATH=. python test/benchmarks/bench_localise.py
+"""
+
+import time
+from data.key import key as Key
+from utils.config import ConfigBase
+from utils.request import Request
+from utils.model import annotate
+import language.translate
+from language.translate import Translate
+import actions.verify
+from verifiers.verifiers import Verifiers
+import verifiers.field_validation_mandatory as field_validation_mandatory
+
+ROWS = 500
+REPEATS = 3
+
+def _model() -> dict:
+    # Every row has 2 empty mandatory values, so a mandatory issue for each
+    section = Key("Threats and Controls", ["threats-data"])
+    section.addProperty("section", "Threats and Controls")
+    rows = []
+    for row in range(ROWS):
+        rows.append({Key("ID", ["row-identifier"]):f"T{row}", Key("Threat"):"", Key("Controls"):"", Key("Status", ["not-mandatory"]):""})
+        for row_key in rows[-1]:
+            row_key.addProperty("colname", row_key.name)
+    model = {section:rows}
+    annotate(model)
+    return model
+
+class _Timed:
+    """ Wraps Translate.localise to total the time spent localising """
+
+    def __init__(self):
+        self.seconds = 0
+        self.localise = Translate.localise
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.localise(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+# A context that no text refers to, which stops Translate.localise using its own output cache
+_UNCACHED = {"bench_uncached":True}
+
+class _Before:
+    """ Translate.localise as it was before: context free outputs cached (for the process) by str(texts) """
+
+    def __init__(self, localise):
+        self.localise = localise
+        self.cache = {}
+
+    def __call__(self, texts:dict, texts_key:str = None, context:dict = {}, cache_key = None, ignore_format:bool = False):
+
+        output_cache_key = None
+        if context is None or len(context) == 0:
+            output_cache_key = (cache_key if cache_key is not None else str(texts), texts_key, ignore_format)
+            if (cached_value := self.cache.get(output_cache_key)) is not None:
+                return cached_value
+            context = _UNCACHED
+
+        output = self.localise(texts, texts_key, context, cache_key, ignore_format)
+        if output_cache_key is not None:
+            self.cache[output_cache_key] = output
+
+        return output
+
+def measure(verifiers:Verifiers, before:bool) -> tuple:
+    """ Returns the number of issues and the seconds spent localising them """
+
+    compile_fn = language.translate._compile
+    localise = Translate.localise
+    if before:
+        language.translate._compile = language.translate.env.from_string
+        Translate.localise = _Before(localise)
+    timed = _Timed()
+    Translate.localise = timed
+
+    try:
+        common_config = verifiers.config.common_config
+        verifier_config = verifiers.config.verifiers_config_dict["field-validation-mandatory"]
+        seconds = []
+        for _ in range(REPEATS):
+            timed.seconds = 0
+            Translate.init()
+            issues = field_validation_mandatory.verify(common_config, verifier_config, _model(), {})
+            seconds.append(timed.seconds)
+    finally:
+        Translate.localise = localise
+        language.translate._compile = compile_fn
+
+    return len(issues), min(seconds)
+
+if __name__ == "__main__":
+
+    ConfigBase._set_install_directory()
+    ConfigBase.base_dir = ConfigBase.install_dir
+    ConfigBase.ephemeral_env = False
+    Request.set({})
+    Translate.init()
+    verifiers = Verifiers(actions.verify.config({}))
+
+    issue_count, before_seconds = measure(verifiers, before=True)
+    _, after_seconds = measure(verifiers, before=False)
+
+    print(f"{issue_count} issues")
+    print(f"before: {1000 * before_seconds:8.1f} ms ({1e6 * before_seconds / issue_count:.0f} us per issue)")
+    print(f"after:  {1000 * after_seconds:8.1f} ms ({1e6 * after_seconds / issue_count:.0f} us per issue)")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import pytest
+from requests import HTTPError, Response
+from utils.cache import ObjectCache
+from utils.error import ConvertError
+import convertors.confluence_convertor.reader as reader
+
+class StandInConfluence:
+    """ Records the requests made to it, and returns a page whose body includes the page version """
+
+    url = "https://example.atlassian.net/wiki"
+
+    def __init__(self):
+        self.version = 1
+        self.urls = []
+        self.pages = []
+
+    def get(self, url):
+        self.urls.append(url)
+        return {"results":[{"number":self.version}]}
+
+    def get_page_by_id(self, page_id, expand=None, status=None, version=None):
+        self.pages.append((page_id, version))
+        return {"body":{"view":{"value":f"<p>{page_id} v{version}</p>"}}}
+
+@pytest.fixture
+def confluence(tmp_path, monkeypatch):
+    monkeypatch.setattr(reader, "_page_cache", ObjectCache("pages", directory=str(tmp_path)))
+    return StandInConfluence()
+
+def test_read_only_downloads_changed_pages(confluence):
+
+    assert reader.read(confluence, "123") == "<p>123 v1</p>"
+    assert reader.read(confluence, "123") == "<p>123 v1</p>"
+    assert confluence.pages == [("123", 1)]
+    assert confluence.urls == ["rest/api/content/123/version?expand=content&limit=1"] * 2
+
+    confluence.version = 2
+    assert reader.read(confluence, "123") == "<p>123 v2</p>"
+    assert confluence.pages == [("123", 1), ("123", 2)]
+
+def test_read_uses_disk_cache(confluence, tmp_path, monkeypatch):
+
+    reader.read(confluence, "123")
+
+    # A new process only has the disk cache
+    monkeypatch.setattr(reader, "_page_cache", ObjectCache("pages", directory=str(tmp_path)))
+    assert reader.read(confluence, "123") == "<p>123 v1</p>"
+    assert confluence.pages == [("123", 1)]
+
+def test_read_requested_version_does_not_probe(confluence):
+
+    assert reader.read(confluence, "123", 5) == "<p>123 v5</p>"
+    assert reader.read(confluence, "123", 5) == "<p>123 v5</p>"
+    assert confluence.urls == []
+    assert confluence.pages == [("123", 5)]
+
+def test_read_without_version_is_not_cached(confluence, monkeypatch):
+
+    monkeypatch.setattr(confluence, "get", lambda url: {"results":[]})
+
+    reader.read(confluence, "123")
+    reader.read(confluence, "123")
+    assert confluence.pages == [("123", ""), ("123", "")]
+
+def test_latest_version_of_missing_page(confluence, monkeypatch):
+
+    def _get(url):
+        response = Response()
+        response.status_code = 404
+        response.url = f"{confluence.url}/{url}"
+        raise HTTPError("404 Client Error", response=response)
+
+    monkeypatch.setattr(confluence, "get", _get)
+
+    with pytest.raises(ConvertError):
+        reader.latest_version(confluence, "123")
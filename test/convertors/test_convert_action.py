@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import pytest
+import threading
+from utils.error import ConvertError
+from utils.output import OutputType
+from utils.config import ConfigBase
+from utils.request import Request
+from language.translate import Translate
+import actions.convert as convert
+import convertors.confluence_convertor.convertor as confluence_convertor
+
+class StandInEnv:
+
+    def getConfluenceConnectionCredentials(self):
+        return {}
+
+SCHEME = {"document-storage":"confluence", "template-id":"template"}
+
+@pytest.fixture
+def config():
+    ConfigBase._set_install_directory()
+    ConfigBase.base_dir = ConfigBase.install_dir
+    ConfigBase.ephemeral_env = False
+    Request.set({})
+    Translate.init()
+    return convert.config()
+
+def test_document_and_template_converted_concurrently(config, monkeypatch):
+
+    # Both conversions must be in progress at the same time to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    def _convert(config, connection, mapping, doc_identifiers, store_doc, cache_template_for=None):
+        barrier.wait()
+        return {"id":doc_identifiers["id"]}
+    monkeypatch.setattr(confluence_convertor, "convert", _convert)
+
+    template_output, doc_output = convert.convert_with_template(config, StandInEnv(), SCHEME, "doc", None, "verify")
+
+    assert template_output.getDetails() == {"id":"template"}
+    assert doc_output.getDetails() == {"id":"doc"}
+
+def test_template_error_is_kept(config, monkeypatch):
+
+    def _convert(config, connection, mapping, doc_identifiers, store_doc, cache_template_for=None):
+        raise ConvertError("not-found", {"ID":doc_identifiers["id"], "url":""})
+    monkeypatch.setattr(confluence_convertor, "convert", _convert)
+
+    template_output, doc_output = convert.convert_with_template(config, StandInEnv(), SCHEME, "doc", "template", "verify")
+
+    assert template_output.getResult() == OutputType.ERROR
+    assert "ID 'template'" in template_output.getDescription()
+    assert "ID 'doc'" in doc_output.getDescription()
+    assert doc_output.getResult() == OutputType.ERROR
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import pytest
+from googleapiclient.http import HttpMockSequence
+from utils.cache import ObjectCache
+import convertors.gdoc_convertor.reader as reader
+
+class FakeRequest:
+    """ Enough of a googleapiclient HttpRequest for MediaIoBaseDownload """
+
+    def __init__(self, content:bytes):
+        self.uri = "https://www.googleapis.com/drive/v3/files/doc/export"
+        self.headers = {}
+        self.http = HttpMockSequence([({"status":"200"}, content)])
+
+class FakeFiles:
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def get(self, fileId, fields):
+        self.drive.metadata_requests += 1
+        return self
+
+    def execute(self):
+        return self.drive.metadata
+
+    def export_media(self, fileId, mimeType):
+        self.drive.exports += 1
+        return FakeRequest(f"<p>{fileId} {self.drive.metadata['modifiedTime']}</p>".encode("utf-8"))
+
+class FakeDrive:
+
+    def __init__(self):
+        self.metadata = {"version":"10", "modifiedTime":"2024-10-01T10:00:00.000Z"}
+        self.metadata_requests = 0
+        self.exports = 0
+
+    def files(self):
+        return FakeFiles(self)
+
+@pytest.fixture
+def drive(tmp_path, monkeypatch):
+    monkeypatch.setattr(reader, "_export_cache", ObjectCache("exports", max_entries=2, directory=str(tmp_path)))
+    return FakeDrive()
+
+def test_read_only_exports_changed_documents(drive):
+
+    assert reader.read(drive, "doc") == "<p>doc 2024-10-01T10:00:00.000Z</p>"
+    assert reader.read(drive, "doc") == "<p>doc 2024-10-01T10:00:00.000Z</p>"
+    assert drive.exports == 1
+    assert drive.metadata_requests == 2
+
+    drive.metadata = {"version":"11", "modifiedTime":"2024-10-02T10:00:00.000Z"}
+    assert reader.read(drive, "doc") == "<p>doc 2024-10-02T10:00:00.000Z</p>"
+    assert drive.exports == 2
+
+def test_read_uses_head_revision(drive):
+
+    drive.metadata = {"headRevisionId":"rev1", "version":"10", "modifiedTime":"2024-10-01T10:00:00.000Z"}
+    reader.read(drive, "doc")
+    drive.metadata["version"] = "11"
+    reader.read(drive, "doc")
+    assert drive.exports == 1
+
+def test_export_cache_is_bounded(drive, tmp_path, monkeypatch):
+
+    monkeypatch.setattr(reader, "_export_cache", ObjectCache("exports", max_entries=1, directory=str(tmp_path), max_disk_bytes=1))
+
+    reader.read(drive, "doc1")
+    reader.read(drive, "doc2")
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # doc1 was evicted from both tiers, so it is exported again (and then cached)
+    reader.read(drive, "doc1")
+    assert drive.exports == 3
+    reader.read(drive, "doc1")
+    assert drive.exports == 3
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import lxml.html
+from lxml import etree
+import convertors.html_convertor.query as query
+from convertors.html_convertor.table import TableExtractor
+
+DOCUMENT = """<html><body>
+<h1><span class="a">Deta</span><span>ils</span></h1>
+<table><tr><th>ID<sup>1</sup></th><th>Name</th></tr><tr><td><a href="#x">TM</a>-1</td><td>Test <!-- c --> model</td></tr></table>
+</body></html>"""
+
+PREPROCESS = {"preprocess": [
+    {"selector": "//h1", "strip-tags": "*", "strip-attributes": "class"},
+    {"selector": "//table", "strip-tags": ["a"], "strip-elements": "sup"}
+]}
+
+def test_preprocessed_document_can_be_queried_by_text():
+
+    document = query.get_document(DOCUMENT, PREPROCESS)
+
+    tables = document.xpath("//h1[text()='Details']/following::table[1]")
+
+    assert len(tables) == 1
+    assert TableExtractor().extract(tables[0]).tables == [[["ID", "Name"], ["TM-1", "Test\nmodel"]]]
+
+def test_preprocessing_matches_lxml_strip_functions():
+
+    document = query.get_document(DOCUMENT, PREPROCESS)
+
+    expected = lxml.html.document_fromstring(DOCUMENT)
+    for processor in PREPROCESS["preprocess"]:
+        for ele in expected.xpath(processor["selector"]):
+            etree.strip_attributes(ele, processor.get("strip-attributes", []))
+            etree.strip_elements(ele, processor.get("strip-elements", []), with_tail=True)
+            etree.strip_tags(ele, processor.get("strip-tags", []))
+
+    assert etree.tostring(document) == etree.tostring(expected)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import pytest
+import lxml.html
+from convertors.html_convertor.table import TableExtractor, expand_spans
+import convertors.html_convertor.query as query
+
+def _table(html:str):
+    document = lxml.html.document_fromstring(f"<html><body>{html}</body></html>")
+    return document.xpath("//table")[0]
+
+@pytest.mark.parametrize("html, expected_tables", [
+    ("<table><tr><th>A</th><th>B&amp;C</th></tr><tr><td>x <b>y</b> z</td><td>a<br>b</td></tr></table>", [[["A", "B&C"], ["x\ny\nz", "a\nb"]]]),
+    ("<table><tr><td><p>one</p><p>two</p></td><td>\n  spaced \n</td></tr></table>", [[["one\ntwo", "spaced"]]]),
+    ("<table><tr><td>a<!-- c -->b</td><td>&nbsp;nb\xa0sp&lt;x&gt;</td></tr></table>", [[["a\nb", "nb sp<x>"]]]),
+    ("<table><tr><td><ul><li>a</li>\n<li>b</li></ul></td></tr></table>", [[["a\n\nb"]]]),
+])
+def test_table_values(html, expected_tables):
+
+    assert TableExtractor(data_separator='\n').extract(_table(html)).tables == expected_tables
+
+def test_table_locations():
+
+    table = _table("<table><tr><th>A</th></tr><tr><td>x</td><td>y</td></tr></table>")
+
+    assert TableExtractor().extract(table).row_xpaths == [["/html/body/table/tr[1]/th"], ["/html/body/table/tr[2]/td[1]", "/html/body/table/tr[2]/td[2]"]]
+
+def test_nested_table():
+
+    table = _table("<table><tr><td>out<table><tr><td>in</td></tr></table>after</td><td>z</td></tr></table>")
+    extractor = TableExtractor().extract(table)
+
+    # Nested tables share rows with the table they are in, and the outer row includes the cells of the nested table
+    assert extractor.tables == [[["out\nin"]], [["", "z"]]]
+    assert extractor.row_xpaths == [["/html/body/table/tr/td[1]", "/html/body/table/tr/td[1]/table/tr/td", "/html/body/table/tr/td[2]"], ["/html/body/table/tr/td[1]/table/tr/td"]]
+
+def test_expand_spans():
+
+    table = _table("<table><tr><td colspan='2'>wide</td></tr><tr><td rowspan='2'>t</td><td>u</td></tr><tr><td>v</td></tr></table>")
+    extractor = TableExtractor().extract(table)
+
+    assert extractor.tables[0] == [["wide"], ["t", "u"], ["v"]]
+    assert expand_spans(extractor.tables[0], extractor.table_spans[0]) == [["wide", "wide"], ["t", "u"], ["t", "v"]]
+
+def test_expand_spans_short_row():
+
+    # The row is shorter than the cell spanning into it from above, so the column between them is empty
+    assert expand_spans([["A", "B", "C"], ["D"]], [[(1, 1), (1, 1), (2, 1)], [(1, 1)]]) == [["A", "B", "C"], ["D", "", "C"]]
+
+def test_document_row_table():
+
+    document = lxml.html.document_fromstring("<html><body><h1>T</h1><table><tr><th>A</th><th>B</th></tr><tr><td>x</td><td></td></tr><tr><td></td><td></td></tr></table></body></html>")
+
+    rows = query.get_document_row_table(document, {"xpath":"//h1[text()='T']/following::table[1]", "remove-header-row":True, "remove-rows-if-empty":None})
+
+    assert rows == [["x", ""]]
+    assert rows[0][0].properties == {"location":"/html/body/table/tr[2]/td[1]"}
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import pytest
+from data.key import key as Key
+from data import model_index
+from utils.model import annotate
+from schemes.schemes import Scheme
+from utils.load_yaml import yaml_file_to_dict
+from convertors.template_cache import TemplateCache
+from utils.cache import ObjectCache
+import convertors.confluence_convertor.convertor as confluence_convertor
+import convertors.confluence_convertor.reader as reader
+
+TEMPLATE = """<html><body>
+<h1>Details</h1>
+<table><tr><th>ID</th><th>Name</th><th>Current</th><th>Approved</th></tr><tr><td>TM-1</td><td>Template</td><td>1.0</td><td>0.9</td></tr></table>
+</body></html>"""
+
+class StandInConfluence:
+    """ Just enough of a Confluence client for the convertor """
+
+    def __init__(self, version:int):
+        self.version = version
+        self.reads = 0
+        self.urls = []
+
+    def get_page_by_id(self, page_id, expand=None, status=None, version=None):
+        if expand == "version":
+            return {"version":{"number":self.version}}
+        self.reads += 1
+        return {"body":{"view":{"value":TEMPLATE}}}
+
+    def get(self, url):
+        self.urls.append(url)
+        return {"results":[{"number":self.version}]}
+
+@pytest.fixture
+def confluence(tmp_path, monkeypatch):
+    TemplateCache.init({"template-cache":{"directory":str(tmp_path), "memory-entries":2}})
+    stand_in = StandInConfluence(1)
+    monkeypatch.setattr(reader, "connect", lambda connection: stand_in)
+    monkeypatch.setattr(reader, "_page_cache", ObjectCache("pages", directory=str(tmp_path.joinpath("pages"))))
+    yield stand_in
+    TemplateCache._config = None
+    TemplateCache.init({"template-cache":{"enabled":False}})
+
+def _scheme(mtime:int = 1) -> Scheme:
+    scheme_dict = yaml_file_to_dict("schemes/confluence-scheme-1.0.yaml")["scheme"]
+    scheme_dict["map"]["map-data"] = scheme_dict["map"]["map-data"][:1]
+    return Scheme(scheme_dict, "confluence_1.0", "schemes/confluence-scheme-1.0.yaml", mtime)
+
+def _convert(scheme):
+    return confluence_convertor.convert({}, {}, scheme, {"id":"123"}, False, "verify")
+
+def test_template_only_read_when_version_changes(confluence):
+
+    scheme = _scheme()
+    template_model = _convert(scheme)
+    assert confluence.reads == 1
+
+    assert _convert(scheme) == template_model
+    assert confluence.reads == 1
+
+    confluence.version = 2
+    _convert(scheme)
+    assert confluence.reads == 2
+
+    # A changed scheme is a different template model, but the page itself hasn't changed
+    changed_scheme = _scheme(mtime=2)
+    assert TemplateCache.get(TemplateCache.key({}, changed_scheme, "123", 2, "verify")) is None
+    _convert(changed_scheme)
+    assert TemplateCache.get(TemplateCache.key({}, changed_scheme, "123", 2, "verify")) is not None
+    assert confluence.reads == 2
+
+def test_template_annotations_are_cached(confluence):
+
+    scheme = _scheme()
+    template_model = _convert(scheme)
+    id_name = next(iter(template_model["document_details"])).name
+    index = annotate(template_model, {id_name:["row-identifier"]}, row_identifiers=False)
+    index.marks.add("template-pre-approved")
+    TemplateCache.update(template_model)
+
+    # Only the disk tier is left to load the template from
+    TemplateCache._cache.memory.clear()
+    model_index.detach(template_model)
+
+    cached_model = _convert(scheme)
+    assert confluence.reads == 1
+    assert cached_model is not template_model
+
+    cached_index = model_index.get_index(cached_model)
+    assert "template-pre-approved" in cached_index.marks
+    id_key, id_value = next(iter(cached_model["document_details"].items()))
+    assert id_key.name == id_name
+    assert id_key.hasTag("row-identifier")
+    assert id_key.getProperty("parentKey") == Key("document_details")
+    assert [entry.value for entry in cached_index.entries_with_tag(cached_model, "row-identifier")] == [id_value]
+
+def test_unchanged_document_costs_one_request(confluence):
+
+    scheme = _scheme()
+    document_model = confluence_convertor.convert({}, {}, scheme, {"id":"123"}, False)
+    assert confluence_convertor.convert({}, {}, scheme, {"id":"123"}, False) == document_model
+
+    # Only the latest version is requested (which also checks the page exists), and the page is only read once
+    assert confluence.urls == ["rest/api/content/123/version?expand=content&limit=1"] * 2
+    assert confluence.reads == 1
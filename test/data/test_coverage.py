@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import pytest
+from data.key import key as Key
+from data import find, model_index
+from utils import match, transform
+from utils.model import annotate
+from utils.request import Request
+import verifiers.reference as reference
+import verifiers.coverage_validation as coverage_validation
+
+ASSET_TAGS = ["threat-asset", "ref/assets-data/name", "ref/assets-data/type", "ref/assets-data/storage-location/storage-expression"]
+
+def _common_config():
+
+    return {
+        "strip-context": {"start-char":"(", "end-char":")"},
+        "exclude": {"tag-prefix":"exclude"},
+        "component-tags": {"component-data-tag":"components-data", "component-in-scope-tag":"in-scope", "component-in-scope-value":"Yes"},
+        "asset-tags": {"asset-data-tag":["assets-data"], "asset-location-tag":"storage-location"},
+        "threat-tags": {"threats-data-tag":"threats-data", "threat-asset-tag":"threat-asset", "threat-component-tag":"threat-component",
+                        "threat-description-tag":"threat-description", "threat-control-tag":"threat-control"},
+        "output-texts": {"default": {
+            "start-assets-grouped-by-storage": {"default":["All assets stored in ", "All assets stored in component - "]},
+            "all-assets": {"default":["All assets"]}}}
+    }
+
+def _model():
+
+    def _component(name, in_scope):
+        return {Key("name", ["row-identifier"]):name, Key("in scope", ["in-scope"]):in_scope}
+
+    def _asset(name, asset_type, locations):
+        asset = {Key("name", ["row-identifier", "name"]):name, Key("type", ["type"]):asset_type}
+        for number, location in enumerate(locations):
+            asset[Key(f"location {number}", ["storage-location"])] = location
+        return asset
+
+    def _threat(description, assets, components):
+        threat = {Key("description", ["threat-description"]):description, Key("control", ["threat-control"]):f"Control for {description}"}
+        threat[Key("assets")] = [{Key("asset", ASSET_TAGS):asset} for asset in assets]
+        threat[Key("components")] = [{Key("component", ["threat-component"]):component} for component in components]
+        return threat
+
+    return {
+        Key("components", ["components-data"]): [
+            _component("Web server", "Yes"),
+            _component("Database (SQL)", "yes"),
+            _component("Env vars", "No"),
+        ],
+        Key("assets", ["assets-data"]): [
+            _asset("Password", "Credential", ["Database", "web server (cache)", "Env vars"]),
+            _asset("Session", "Token", ["Web Server", "Browser"]),
+            _asset("Logs", "Data", ["Disk"]),
+        ],
+        Key("threats", ["threats-data"]): [
+            _threat("Stolen password", ["password"], ["Database"]),
+            _threat("Stolen credentials", ["Credential", "Token"], ["Web server", "Browser"]),
+            _threat("Everything leaked", ["All assets"], ["Database (SQL)"]),
+            _threat("Browser assets leaked", ["All assets stored in Browser"], ["Laptop"]),
+            _threat("Disk assets leaked", ["All assets stored in component - disk"], ["Disk"]),
+            _threat("No assets", [], ["Web server"]),
+            _threat("Everything leaked again", ["All assets"], ["Database (SQL)"]),
+            _threat("Session stolen", ["Session"], [None, "Web server"]),
+        ]
+    }
+
+def _walked_covering_threats(common_config, model, asset, storage_location_value):
+    # How covering threats were found before the threats were indexed, by checking the asset against every threat row
+    component_transform = transform.strip("(", ")")
+    callback_config = {"output-texts":common_config["output-texts"], "component-transform":component_transform}
+    in_scope_components = ["Web server", "Database (SQL)"]
+
+    covering_threats = []
+    for entry in find.key_with_tag(model, "threats-data")[1]:
+        threat_asset_entries = find.keys_with_tag(entry, "threat-asset")
+        threat_component_entries = find.keys_with_tag(entry, "threat-component")
+        matching_component = match.get_equals(storage_location_value, [component_name for (_, component_name) in threat_component_entries], component_transform)
+        matching_in_scope = matching_component is not None and match.equals(matching_component, in_scope_components, component_transform)
+        for threat_asset_entry_key, threat_asset_entry_value in threat_asset_entries:
+            if matching_in_scope:
+                covers = reference.check_reference_row(asset, "ref", threat_asset_entry_key, threat_asset_entry_value, coverage_validation.component_storage_expression_callback, callback_config, only_callback=False) is not None
+            else:
+                callback_config["storage_location_value"] = storage_location_value
+                matched_tag = reference.check_reference_row(asset, "ref", threat_asset_entry_key, threat_asset_entry_value, coverage_validation.location_storage_expression_callback, callback_config, only_callback=True)
+                covers = matched_tag is not None and match.endswith(matched_tag, "storage-expression")
+            if covers and entry not in covering_threats:
+                covering_threats.append(entry)
+    return covering_threats
+
+@pytest.fixture
+def request_context():
+    Request.set({})
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_covering_threats_match_walk(request_context, indexed):
+
+    common_config = _common_config()
+    model = _model()
+    annotate(model)
+    if not indexed:
+        model_index.detach(model)
+
+    coverage_index = coverage_validation.get_coverage_index(common_config, model)
+    assert (coverage_validation.get_coverage_index(common_config, model) is coverage_index) == indexed
+
+    covered = {}
+    for asset in find.key_with_tag(model, "assets-data")[1]:
+        for _, storage_location_value in find.keys_with_tag(asset, "storage-location"):
+            covering_threats = coverage_index.covering_threats(asset, storage_location_value)
+            assert covering_threats == _walked_covering_threats(common_config, model, asset, storage_location_value)
+            covered[(find.key_with_tag(asset, "row-identifier")[1], storage_location_value)] = [coverage_index.threat_details(threat)[0] for threat in covering_threats]
+
+    # 'All assets' threats cover every asset in every location
+    everything = ["Everything leaked", "Everything leaked again"]
+    assert covered == {
+        ("Password", "Database"): ["Stolen password"] + everything,
+        ("Password", "web server (cache)"): ["Stolen credentials"] + everything,
+        ("Password", "Env vars"): everything,
+        ("Session", "Web Server"): ["Stolen credentials"] + everything + ["Session stolen"],
+        ("Session", "Browser"): ["Everything leaked", "Browser assets leaked", "Everything leaked again"],
+        ("Logs", "Disk"): ["Everything leaked", "Disk assets leaked", "Everything leaked again"],
+    }
+
+    model_index.detach(model)
+
+def test_coverage_index_scopes_components():
+
+    model = _model()
+    coverage_index = coverage_validation.CoverageIndex(_common_config(), model)
+
+    assert coverage_index.in_scope_components == ["Web server", "Database (SQL)"]
+    assert coverage_index.out_of_scope_components == ["Env vars"]
+    assert coverage_index.in_scope == {"web server", "database"}
+    assert [tag for tag, _, _ in coverage_index.asset_tables] == ["assets-data"]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import pickle
+import jsonpickle
+from data.key import key as Key
+from utils.load_yaml import class_to_yaml_str
+
+def test_key_equality_and_hash():
+
+    first = Key("Component", ["components-data"])
+    second = Key("Component")
+
+    assert first == second
+    assert first == "Component"
+    assert hash(first) == hash(second) == hash("Component")
+    assert {first:"value"}[second] == "value"
+
+def test_key_tags_are_ordered_and_unique():
+
+    entry_key = Key("Component", ["b", "a"])
+    entry_key.addTags(["c", "a", "d"])
+
+    assert entry_key.hasTag("a")
+    assert not entry_key.hasTag("e")
+    assert list(entry_key.getTags()) == ["b", "a", "c", "d"]
+    assert entry_key.tags == ["b", "a", "c", "d"]
+
+def test_key_properties():
+
+    entry_key = Key("Component")
+
+    assert entry_key.getProperty("value") is None
+    entry_key.addProperty("value", "web")
+    entry_key.addProperty("", "ignored")
+    assert entry_key.getProperty("value") == "web"
+    assert entry_key.properties == {"value":"web"}
+
+def test_key_serialisation_unchanged():
+
+    parent_key = Key("Components", ["components-data"])
+    entry_key = Key("Component", ["mandatory"])
+    entry_key.addProperty("parentKey", parent_key)
+
+    assert jsonpickle.encode({"key":entry_key}, unpicklable=False) == \
+        '{"key": {"name": "Component", "tags": ["mandatory"], "properties": {"parentKey": {"name": "Components", "tags": ["components-data"], "properties": {}}}}}'
+
+    Key.config_serialisation("tags")
+    assert class_to_yaml_str(entry_key) == "!Key\nname: Component\ntags:\n-   mandatory\n"
+    Key.config_serialisation("properties")
+
+def test_key_pickle_in_model():
+
+    entry_key = Key("Component", ["mandatory"])
+    row = {entry_key:"web"}
+    entry_key.addProperty("row", row)
+
+    loaded_row = pickle.loads(pickle.dumps(row))
+    loaded_key = next(iter(loaded_row))
+
+    assert loaded_key.tags == ["mandatory"]
+    assert loaded_key.getProperty("row") is loaded_row
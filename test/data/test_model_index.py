@@ -0,0 +1,164 @@
+import pytest
+import re
+import contextvars
+import data.key
+from data.key import key as Key
+from data import find, model_index
+
+def _model():
+
+    return {
+        Key("details", ["details-data"]): {
+            Key("title", ["document-title"]): "A threat model",
+            Key("version", ["document-version"]): "1.0"
+        },
+        Key("components", ["components-data"]): [
+            {Key("name", ["row-identifier", "component-name"]): "web", Key("in scope", ["in-scope"]): "yes"},
+            {Key("name", ["row-identifier", "component-name"]): "db", Key("in scope", ["in-scope"]): "no"},
+        ],
+        Key("assets", ["assets-data"]): [
+            {Key("name", ["row-identifier", "asset-name"]): "data", Key("stored", ["storage-location"]): [
+                {Key("location", ["component-name"]): "db"}
+            ]},
+        ]
+    }
+
+def _walk(model, fn, *args):
+    # Results from walking the model, i.e. without an index
+    model_index.detach(model)
+    return fn(model, *args)
+
+def test_index_matches_walk():
+
+    model = _model()
+
+    walked = {tag:_walk(model, find.keys_with_tag, tag) for tag in ["row-identifier", "component-name", "in-scope", "missing"]}
+    walked_first = _walk(model, find.key_with_tag, "component-name")
+    walked_regex = _walk(model, find.keys_with_tag_matching_regex, "^(asset|component)-name$")
+
+    index = model_index.attach(model)
+
+    assert model_index.lookup(model) is index
+    for tag, expected in walked.items():
+        assert find.keys_with_tag(model, tag) == expected
+    assert find.key_with_tag(model, "component-name") == walked_first
+    assert find.key_with_tag(model, "missing") == (None, None)
+    assert find.keys_with_tag_matching_regex(model, "^(asset|component)-name$") == walked_regex
+
+    model_index.detach(model)
+
+def test_index_lookup_in_part_of_model():
+
+    model = _model()
+    _, assets = find.key_with_tag(model, "assets-data")
+    expected = find.keys_with_tag(assets, "component-name")
+
+    model_index.attach(model)
+
+    assert find.keys_with_tag(assets, "component-name") == expected
+    assert [entry.path for entry in model_index.lookup(assets).entries_with_tag(assets, "component-name")] == [("assets", 0, "stored", 0, "location")]
+
+    model_index.detach(model)
+
+def test_index_updated_when_tags_added():
+
+    model = _model()
+    model_index.attach(model)
+
+    assert find.keys_with_tag(model, "new-tag") == []
+
+    first_key = list(model.keys())[0]
+    last_key = list(model.keys())[-1]
+    last_key.addTag("new-tag")
+    first_key.addTag("new-tag")
+
+    assert [found_key for found_key, _ in find.keys_with_tag(model, "new-tag")] == [first_key, last_key]
+    assert len(find.keys_with_tag_matching_regex(model, "^new-")) == 2
+
+    model_index.detach(model)
+
+def test_index_returns_current_values():
+
+    model = _model()
+    model_index.attach(model)
+
+    _, components = find.key_with_tag(model, "components-data")
+    components[0][Key("name")] = "api"
+
+    assert find.key_with_tag(model, "component-name")[1] == "api"
+
+    model_index.detach(model)
+
+def test_attach_while_tagging_on_another_thread():
+
+    import threading
+
+    model = _model()
+    model_index.attach(model)
+    keys = [Key(f"key {position}") for position in range(2000)]
+    errors = []
+
+    def _attach_detach():
+        try:
+            for _ in range(200):
+                other_model = _model()
+                model_index.attach(other_model)
+                model_index.detach(other_model)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=_attach_detach)
+    thread.start()
+    for tag_key in keys:
+        tag_key.addTag("new-tag")
+    thread.join()
+
+    assert errors == []
+    assert model_index.get_index(model) is not None
+
+    model_index.detach(model)
+
+def test_indexes_attached_per_scope():
+
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    shared_model = _model()
+    shared_index = model_index.ModelIndex(shared_model)
+    results = {}
+    barrier = threading.Barrier(3)
+
+    @model_index.scope()
+    def _request(name):
+        # More models than are kept outside of a scope, all of which are still attached when every request has attached them
+        models = [_model() for _ in range(model_index.MAX_ATTACHED_INDEXES + 1)]
+        for model in models:
+            model_index.attach(model)
+        model_index.attach(shared_model, shared_index)
+        barrier.wait()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Threads running in a copy of the context see the scope's indexes
+            in_thread = executor.submit(contextvars.copy_context().run, model_index.get_index, models[0]).result()
+        results[name] = all(model_index.get_index(model) is not None for model in models) and in_thread is model_index.get_index(models[0])
+        barrier.wait()
+
+    threads = [threading.Thread(target=_request, args=(name,)) for name in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {0:True, 1:True, 2:True}
+    # Detached when each scope ended, so nothing is attached (or listening for tags) outside of the scopes
+    assert model_index.get_index(shared_model) is None
+    assert shared_index.tag_added not in data.key._tag_listeners
+
+def test_regex_matches_by_flags():
+
+    model = _model()
+    model_index.attach(model)
+
+    assert len(find.keys_with_tag_matching_regex(model, re.compile("^COMPONENT-NAME$"))) == 0
+    assert len(find.keys_with_tag_matching_regex(model, re.compile("^COMPONENT-NAME$", re.IGNORECASE))) == 3
+
+    model_index.detach(model)
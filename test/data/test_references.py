@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+import pytest
+from data.key import key as Key
+from data import find, model_index
+from utils import tags, keymaster
+from utils.model import annotate
+import verifiers.reference as reference
+from utils.request import Request
+
+def _model():
+
+    return {
+        Key("components", ["components-data"]): [
+            {Key("name", ["row-identifier", "component-name"]): "Web server"},
+            {Key("name", ["row-identifier", "component-name"]): "Database (primary)"},
+            {Key("name", ["row-identifier", "component-name"]): ["web server", "cache"]},
+            {Key("name", ["row-identifier", "component-name"]): None},
+        ],
+        Key("assets", ["assets-data"]): [
+            {Key("name", ["row-identifier", "asset-name"]): "data"},
+            {Key("component", ["ref/components-data/component-name", "ref/assets-data/asset-name/endswith", "ref/missing-data/component-name"]): "web SERVER "},
+        ]
+    }
+
+def _walked_references(model, ref_type, ref_key, ref_value, callback, callback_config):
+    # How references were found before they were indexed, every value is compared with the tag comparison
+    referenced = []
+    for tag in ref_key.getTags():
+        tag_tuple = tags.get_quad_tag_parts(tag)
+        if tag_tuple[0] != ref_type:
+            continue
+        table_key, table_value = find.key_with_tag(model, tag_tuple[1])
+        if table_key is None:
+            continue
+        for found_key, found_value in find.keys_with_tag(table_value, tag_tuple[2]):
+            if tags.check_tag_comparison(tag_tuple, ref_value, found_key, found_value, callback, callback_config) and (tag, found_key, found_value) not in referenced:
+                referenced.append((tag, found_key, found_value))
+    return referenced
+
+def _strip_callback(callback_config, tag_tuple, compare_value, compare_to_key, compare_to_value):
+    callback_config["calls"].append(compare_to_value)
+    return isinstance(compare_to_value, str) and compare_to_value.split(" (")[0].casefold() == compare_value.casefold()
+
+@pytest.mark.parametrize("indexed", [True, False])
+@pytest.mark.parametrize("ref_value", ["web server", "Database", "cache", "", "a", "nothing"])
+def test_references_match_walk(indexed, ref_value):
+
+    model = _model()
+    ref_key = next(iter(model[Key("assets")][1]))
+    if indexed:
+        model_index.attach(model)
+
+    for callback in [None, _strip_callback]:
+        expected = _walked_references(model, "ref", ref_key, ref_value, callback, {"calls":[]})
+        assert reference.get_references(model, "ref", ref_key, ref_value, callback, {"calls":[]}) == expected
+        assert reference.check_reference(model, "ref", ref_key, ref_value, callback, {"calls":[]}) == (len(expected) > 0)
+
+    model_index.detach(model)
+
+def test_equal_references_only_call_back_for_other_values():
+
+    model = _model()
+    ref_key = next(iter(model[Key("assets")][1]))
+    model_index.attach(model)
+
+    callback_config = {"calls":[]}
+    assert reference.check_reference(model, "ref", ref_key, "WEB server", _strip_callback, callback_config)
+    assert callback_config["calls"] == []
+
+    referenced = reference.get_references(model, "ref", ref_key, "web server", _strip_callback, callback_config)
+    assert [found_value for _, _, found_value in referenced] == ["Web server", ["web server", "cache"]]
+    assert callback_config["calls"] == ["Database (primary)", None]
+
+    model_index.detach(model)
+
+def _references_verify(model, unique_tag_prefix):
+    # The duplicates the uniqueness verifier reported when it looked up the references of each key in turn
+    from verifiers import field_validation_uniqueness as uniqueness
+
+    issues = []
+    previously_referenced = set()
+    for key_entry, value_entry in find.keys_with_tag_matching_regex(model, "^" + unique_tag_prefix + ".*$"):
+        if not isinstance(value_entry, str) or key_entry in previously_referenced:
+            continue
+        callback_config = {"key_data_tag_name": keymaster.get_data_tag_for_key(key_entry)}
+        referenced = reference.get_references(model, unique_tag_prefix, key_entry, value_entry, uniqueness.reference_callback, callback_config)
+        if len(referenced) > 1 or (len(referenced) == 1 and referenced[0][1] is not key_entry):
+            issues.append((key_entry, value_entry, [(key, value) for tag, key, value in referenced if key is not key_entry]))
+            previously_referenced.update([ref[1] for ref in referenced])
+    return issues
+
+def test_uniqueness_duplicates_match_references():
+
+    from verifiers import field_validation_uniqueness as uniqueness
+
+    # Keys are equal if their names are, so each key has its own name (otherwise only the first duplicate is reported)
+    model = {
+        Key("threats", ["threats-data"]): [
+            {Key("id 1", ["row-identifier", "threat-id", "unique/threats-data/threat-id", "unique/controls-data/control-id/value_not_table"]): "T1"},
+            {Key("id 2", ["row-identifier", "threat-id", "unique/threats-data/threat-id", "unique/controls-data/control-id/value_not_table"]): "t1 "},
+            {Key("id 3", ["row-identifier", "threat-id", "unique/threats-data/threat-id", "unique/controls-data/control-id/value_not_table"]): "T2"},
+            {Key("id 4", ["row-identifier", "threat-id", "unique/threats-data/threat-id", "unique/missing-data/threat-id"]): ["T3"]},
+        ],
+        Key("controls", ["controls-data"]): [
+            {Key("id 5", ["row-identifier", "control-id", "unique/controls-data/control-id", "unique/threats-data/threat-id/value_not_table"]): "T2"},
+            {Key("id 6", ["row-identifier", "control-id", "unique/controls-data/control-id", "unique/threats-data/threat-id/value_not_table"]): "C1"},
+            {Key("id 7", ["row-identifier", "control-id", "unique/controls-data/control-id/endswith"]): "C1"},
+        ]
+    }
+    annotate(model)
+    for key_entry, _ in find.keys_with_tag_matching_regex(model, "^unique.*$"):
+        key_entry.getProperty("parentKey").addProperty("section", key_entry.getProperty("parentKey").name)
+
+    Request.set({})
+    expected = _references_verify(model, "unique")
+    issues = uniqueness.verify({}, {"unique-tag-prefix":"unique"}, model, {})
+
+    # T1 is duplicated in the threats table, T2 is in both tables, and C1 is duplicated in the controls table (by a tag that isn't grouped)
+    assert [issue.issue_key for issue in issues] == [key for key, _, _ in expected]
+    assert [value for _, value, _ in expected] == ["T1", "T2", "C1"]
+    assert [[data["value"] for data in issue.errordata] for issue in issues] == [[value for _, value in referenced] for _, _, referenced in expected]
+
+    model_index.detach(model)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+import pytest
+import language.translate
+from language.translate import Translate
+from utils.request import Request
+
+@pytest.fixture
+def translate():
+    language_code, cache = Translate.languageCode, Translate._cache
+    Request.set({})
+    Translate.languageCode = "default"
+    Translate._cache = {}
+    yield Translate
+    Translate.languageCode, Translate._cache = language_code, cache
+
+def test_localise_caches_by_texts_identity(translate):
+
+    texts = {"default":{"greeting":"Hello {{ name | default('you') }}"}}
+    same_texts = {"default":{"greeting":"Hello {{ name | default('you') }}"}}
+
+    assert Translate.localise(texts, "greeting") == "Hello you"
+    assert Translate.localise(texts, "greeting", {"name":"there"}) == "Hello there"
+    assert Translate.localise(same_texts, "greeting") == "Hello you"
+
+    # Equal but different texts are cached separately (by identity), along with the texts they were localised from
+    assert texts == same_texts
+    assert [cached[0] for cached in Translate._cache.values()] == [texts, same_texts]
+    assert Translate._cache[(id(texts), "greeting", False)][0] is texts
+    assert Translate._cache[(id(same_texts), "greeting", False)][0] is same_texts
+
+def test_compiled_once(translate):
+
+    # The same source is only compiled once
+    assert language.translate._compile("Hello {{ name }}") is language.translate._compile("Hello {{ name }}")
+
+def test_localised_config_file_warns_when_it_refers_to_the_request(translate, tmp_path, caplog):
+
+    config_file = tmp_path.joinpath("config.yaml")
+    config_file.write_text("scheme: \"{{ request.scheme }}\"\nname: \"{{ 'request' if false else 'config' }}\"\n")
+    other_config_file = tmp_path.joinpath("other_config.yaml")
+    other_config_file.write_text("name: \"{{ 'config' }}\"\n")
+
+    assert Translate.localiseYamlFile(config_file) == {"scheme":"", "name":"config"}
+    assert "refers to 'request'" in caplog.text
+
+    caplog.clear()
+    assert Translate.localiseYamlFile(other_config_file) == {"name":"config"}
+    assert "refers to 'request'" not in caplog.text
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import random
+import pytest
+from data.key import key as Key
+import measure.measure_distance as measure_distance
+import measure.measure_similarity as measure_similarity
+
+MEASURE_TAG = "measure/from-this/extra-tuple"
+
+class _Measurement:
+    """ Records what distance adds to a measurement """
+
+    def __init__(self):
+        self.count = 0
+        self.distances = []
+
+    def addCount(self, count:int):
+        self.count += count
+
+    def addDistance(self, row):
+        self.distances.append(row)
+
+def _model(rows:list) -> dict:
+    return {Key("threats", ["threats-data"]): [{Key(name, [MEASURE_TAG]):value for name, value in row.items()} for row in rows]}
+
+def test_distance_finds_unmatched_rows():
+
+    this_model = _model([{"Threat":"Spoofing", "Control":"MFA"}, {"Threat":"tampering ", "Control":"Signing"}, {"Threat":"Spoofing", "Control":"Signing"}])
+    other_model = _model([{"Threat":"Spoofing", "Control":"mfa"}, {"Threat":"Tampering", "Control":"Signing"}, {"Threat":"Repudiation", "Control":None}])
+
+    measurement = _Measurement()
+    measure_distance.distance({"filters":{}}, measurement, "threats-data", ("measure", "from-this", "extra-tuple", None), this_model, other_model)
+
+    assert measurement.count == 3
+    assert [[(key.name, value) for key, value in row] for row in measurement.distances] == [[("Threat", "Spoofing"), ("Control", "Signing")]]
+
+def test_row_index_matches_like_comparing_every_row():
+
+    random.seed(7)
+    values = ["a", "A ", "b", "", None, "c", ["a", "b"], []]
+
+    def _row():
+        names = random.sample(["x", "y", "z", "x"], random.randint(0, 3))
+        return [(Key(name), random.choice(values)) for name in names]
+
+    for _ in range(200):
+        other_rows = [_row() for _ in range(random.randint(0, 6))]
+        row_index = measure_distance._RowIndex(other_rows)
+        for this_row in [_row() for _ in range(10)]:
+            if any(isinstance(value, list) for _, value in this_row):
+                # match.equals can't compare lists to values
+                continue
+            assert row_index.has_match(this_row) == any(measure_distance._row_matches(this_row, other_row) for other_row in other_rows)
+
+def test_distance_matches_similar_rows():
+
+    this_model = _model([{"Threat":"Attacker spoofs a user's session", "Control":"MFA"}, {"Threat":"Attacker spoofs the session of a user", "Control":"MFA"},
+                         {"Threat":"Logs are tampered with", "Control":"Signing"}, {"Threat":"Denial of service", "Control":"Rate limits"}])
+    other_model = _model([{"Threat":"An attacker spoofs a users session", "Control":"mfa"}, {"Threat":"Logs are tampered with", "Control":"Signing"},
+                          {"Threat":"Data is exfiltrated", "Control":"Encryption"}])
+    config = {"filters":{}, "similarity":{"enabled":True, "threshold":0.7}}
+
+    measurement = _Measurement()
+    measure_distance.distance(config, measurement, "threats-data", ("measure", "from-this", "extra-tuple", None), this_model, other_model)
+
+    # Each row can only be paired with one other row, so only the most similar of the reworded threats matches
+    assert [row[0][1] for row in measurement.distances] == ["Attacker spoofs the session of a user", "Denial of service"]
+
+def test_pair_rows_above_threshold():
+
+    similarity = measure_similarity.similarity_matrix([[(Key("Threat"), "abc def")], [(Key("Threat"), "")]], [[(Key("Threat"), "abc de")], [(Key("Threat"), None)]])
+
+    assert [[round(float(value), 2) for value in row] for row in similarity] == [[0.77, 0.0], [0.0, 1.0]]
+    assert measure_similarity.pair_rows(similarity, 0.75) == [(0, 0), (1, 1)]
+    assert measure_similarity.pair_rows(similarity, 0.8) == [(1, 1)]
+
+def test_pair_rows_pairs_as_many_rows_as_possible():
+
+    # Pairing the most similar rows first would leave rows unpaired
+    assert measure_similarity.pair_rows([[0.95, 0.9], [0.9, 0.0]], 0.85) == [(0, 1), (1, 0)]
+    assert measure_similarity.pair_rows([[0.9, 0.95, 0.0], [0.0, 0.9, 0.0], [0.0, 0.0, 0.0]], 0.85) == [(0, 0), (1, 1)]
+    assert measure_similarity.pair_rows([[0.9, 0.95]], 0.85) == [(0, 1)]
+
+def test_numpy_and_python_similarity_agree(monkeypatch):
+
+    numpy = pytest.importorskip("numpy")
+    random.seed(5)
+    words = ["spoofs", "session", "user", "logs", "tampered", "denial", "service", "MFA", ""]
+    rows = [[(Key("Threat"), " ".join(random.choices(words, k=3))), (Key("Control"), random.choice(words))] for _ in range(30)]
+    other_rows = [[(Key("Threat"), " ".join(random.choices(words, k=3))), (Key("Control"), random.choice(words))] for _ in range(30)]
+
+    monkeypatch.setattr(measure_similarity, "numpy", numpy)
+    numpy_similarity = measure_similarity.similarity_matrix(rows, other_rows)
+    monkeypatch.setattr(measure_similarity, "numpy", None)
+    python_similarity = measure_similarity.similarity_matrix(rows, other_rows)
+
+    assert numpy.allclose(numpy_similarity, python_similarity)
+    for threshold in [0.3, 0.5, 0.8]:
+        assert measure_similarity.pair_rows(numpy_similarity, threshold) == measure_similarity.pair_rows(python_similarity, threshold)
+
+def test_fewer_rows_compared_without_numpy(monkeypatch):
+
+    monkeypatch.setattr(measure_similarity, "numpy", None)
+    rows = [[(Key("Threat"), f"Threat {number}")] for number in range(3)]
+
+    assert measure_similarity.unmatched_rows({"threshold":0.5, "max-rows":3, "max-rows-without-numpy":2}, rows, rows) == rows
+    assert measure_similarity.unmatched_rows({"threshold":0.5, "max-rows":2, "max-rows-without-numpy":3}, rows, rows) == []
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import pytest
+import jsonpickle
+from utils.config import ConfigBase
+from utils.load_yaml import yaml_file_to_dict
+from data.data_config import DataConfig
+from data.key import key as Key
+import data.value
+import data.plan
+import convertors.html_convertor.query as query
+from schemes.schemes import load_scheme
+
+DOCUMENT = """<html><body>
+<h1>Details</h1>
+<table><tr><th>ID</th><th>Name</th><th>Current</th><th>Approved</th></tr><tr><td>TM-1</td><td>Test <b>model</b></td><td>1.0</td><td>0.9</td></tr></table>
+<h1>Threats and Controls</h1>
+<table><tr><th>Components</th><th>Assets</th><th>Threat</th><th>Controls</th><th>Tickets</th></tr>
+<tr><td>web, db</td><td>data</td><td>Spoofing</td><td>MFA<br/>Logging</td><td></td></tr></table>
+</body></html>"""
+
+def _serialise(model):
+    Key.config_serialisation("properties")
+    return jsonpickle.encode(model, unpicklable=False, keys=True)
+
+def test_plan_matches_interpreted_scheme():
+
+    DataConfig.init({"output": {"list-with-single-not-applicable-entry": {"remove": False}}})
+    scheme = yaml_file_to_dict("schemes/confluence-scheme-1.0.yaml")["scheme"]
+    document = query.get_document(DOCUMENT, scheme)
+
+    interpreted = data.value.parse(scheme["map"], document)
+    planned = data.plan.compile_plan(scheme["map"]).run(document)
+
+    assert _serialise(planned) == _serialise(interpreted)
+
+def test_plan_not_compiled_for_invalid_map():
+
+    assert data.plan.compile_plan({"map-data": [{"key": {"section": "no name"}, "value": None}]}) is None
+
+def test_load_scheme_is_cached():
+
+    ConfigBase._set_install_directory()
+    ConfigBase.base_dir = ConfigBase.install_dir
+    ConfigBase.ephemeral_env = False
+
+    scheme = load_scheme("confluence_1.0")
+
+    assert load_scheme("confluence_1.0") is scheme
+    assert scheme.map_plan() is scheme.map_plan()
+    assert scheme["document-storage"] == "confluence"
+
+def test_loaded_scheme_cannot_be_changed():
+
+    ConfigBase._set_install_directory()
+    ConfigBase.base_dir = ConfigBase.install_dir
+    ConfigBase.ephemeral_env = False
+
+    scheme = load_scheme("confluence_1.0")
+
+    with pytest.raises(TypeError):
+        scheme["document-storage"] = "googledoc"
+    with pytest.raises(TypeError):
+        scheme["map"]["map-data"].append({})
+
+def test_interpreted_map_only_reports_problems_when_reached():
+
+    invalid_map = {"map-data": [{"key": {"section": "no name"}, "value": None}]}
+
+    # Nothing to map, so the invalid map-data is never reached
+    assert data.value.parse(invalid_map, []) == []
+    with pytest.raises(KeyError):
+        data.value.parse(invalid_map, "input")
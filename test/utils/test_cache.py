@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import os
+import threading
+from utils.cache import LRUCache, ObjectCache, DEFAULT_MAX_DISK_BYTES, is_private_directory
+
+def test_disk_cache_directory_is_private(tmp_path):
+
+    cache = ObjectCache("objects", directory=str(tmp_path.joinpath("objects")))
+    cache.put("key", {"value":1})
+
+    assert os.stat(tmp_path.joinpath("objects")).st_mode & 0o777 == 0o700
+    assert cache.disk.max_bytes == DEFAULT_MAX_DISK_BYTES
+    cache.memory.clear()
+    assert cache.get("key") == {"value":1}
+
+def test_disk_cache_not_used_if_others_can_write(tmp_path):
+
+    shared_dir = tmp_path.joinpath("shared")
+    shared_dir.mkdir()
+    os.chmod(shared_dir, 0o777)
+    assert not is_private_directory(str(shared_dir))
+
+    cache = ObjectCache("objects", directory=str(shared_dir.joinpath("objects")))
+    cache.put("key", {"value":1})
+    cache.memory.clear()
+
+    assert cache.get("key") is None
+    assert list(shared_dir.joinpath("objects").iterdir()) == []
+
+def test_lru_cache_shared_by_threads():
+
+    cache = LRUCache(4)
+    errors = []
+
+    def _use(offset:int):
+        try:
+            for value in range(5000):
+                cache.put((offset, value % 8), value)
+                cache.get((1 - offset, value % 8))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_use, args=(offset,)) for offset in [0, 1]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(cache) == 4
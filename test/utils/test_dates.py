@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+import dateutil.parser
+from dateutil.parser import ParserError
+from datetime import datetime
+from utils import dates
+
+def _dateutil_parse(value):
+    try:
+        return dateutil.parser.parse(value)
+    except (ParserError, OverflowError):
+        return None
+
+def test_known_formats_match_dateutil():
+
+    values = [f"{first}{separator}{second}{separator}2021" for first in range(0, 33) for second in range(0, 33) for separator in "/.-"]
+    values += [f"2024-{month:02d}-{day:02d}" for month in range(0, 14) for day in range(0, 33)]
+    values += [" 2023-06-01 ", "0000-01-01", "1st March 2021", "not a date", ""]
+
+    for value in values:
+        assert dates.parse(value) == _dateutil_parse(value), value
+
+def test_formats_are_tried_first():
+
+    assert dates.parse("02/03/2021") == datetime(2021, 2, 3)
+    assert dates.parse("02/03/2021", ["%d/%m/%Y"]) == datetime(2021, 3, 2)
+    assert dates.parse(None) is None
+
+def test_parsed_values_are_cached():
+
+    dates._parse.cache_clear()
+
+    dates.parse("2021-01-01")
+    dates.parse("2021-01-01")
+
+    assert dates._parse.cache_info().hits == 1
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import os
+import time
+import threading
+import pytest
+from data.key import key as Key
+from data import model_index
+from utils import executor
+
+def test_order_keeps_order_unless_dependent():
+
+    assert executor.order(["a", "b", "c"], {}) == (["a", "b", "c"], {"a":[], "b":[], "c":[]})
+    assert executor.order(["a", "b", "c"], {"a":["c"], "b":["unknown"]}) == (["b", "c", "a"], {"b":[], "c":[], "a":["c"]})
+    # Circular dependencies are ignored
+    assert executor.order(["a", "b"], {"a":["b"], "b":["a"]}) == (["a", "b"], {"a":[], "b":["a"]})
+
+@pytest.mark.parametrize("mode", [executor.SEQUENTIAL, executor.THREAD, executor.PROCESS])
+def test_results_in_task_order_after_dependencies(mode):
+
+    finished = []
+    lock = threading.Lock()
+
+    def _task(name, delay):
+        def _run():
+            time.sleep(delay)
+            with lock:
+                finished.append(name)
+            return name.upper()
+        return _run
+
+    tasks = {"slow":_task("slow", 0.2), "fast":_task("fast", 0), "last":_task("last", 0)}
+
+    results = executor.run(tasks, mode, 3, after={"last":["slow"]})
+
+    assert list(results.items()) == [("slow", "SLOW"), ("fast", "FAST"), ("last", "LAST")]
+    assert finished.index("last") > finished.index("slow")
+    if mode != executor.SEQUENTIAL:
+        assert finished[0] == "fast"
+
+@pytest.mark.skipif(not executor.fork_available(), reason="processes can't be forked")
+def test_forked_tasks_return_model_keys():
+
+    model = {Key("rows", ["rows-data"]): [{Key("name", ["row-identifier"]):"first"}, {Key("name", ["row-identifier"]):"second"}]}
+    model_index.attach(model)
+    row_key = next(iter(model[Key("rows")][1]))
+
+    def _find_key():
+        return {"pid":os.getpid(), "key":next(iter(model[Key("rows")][1])), "other":Key("other")}
+
+    results = executor.run({"find":_find_key, "unused":lambda: None}, executor.PROCESS, 2, process_tasks=["find"], models=[model])
+
+    assert results["find"]["pid"] != os.getpid()
+    assert results["find"]["key"] is row_key
+    assert results["find"]["other"] == Key("other")
+
+    model_index.detach(model)
+
+def test_threads_used_if_processes_cant_start(monkeypatch):
+
+    def _no_shared_memory(*args, **kwargs):
+        raise OSError(38, "Function not implemented")
+
+    monkeypatch.setattr(executor, "ProcessPoolExecutor", _no_shared_memory)
+
+    results = executor.run({"pid":os.getpid, "other":lambda: None}, executor.PROCESS, 2, process_tasks=["pid"])
+
+    assert results["pid"] == os.getpid()
+
+def test_threads_used_if_other_threads_running():
+
+    stop = threading.Event()
+    other_thread = threading.Thread(target=stop.wait)
+    other_thread.start()
+    try:
+        results = executor.run({"pid":os.getpid, "other":lambda: None}, executor.PROCESS, 2, process_tasks=["pid"])
+    finally:
+        stop.set()
+        other_thread.join()
+
+    assert results["pid"] == os.getpid()
@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
 
+import os
+import copy
+import pickle
 import pytest
 import utils.load_yaml
 from utils.error import ThreatwareError
@@ -7,3 +10,50 @@ from utils.error import ThreatwareError
 def test_no_file():
     with pytest.raises(ThreatwareError):
         utils.load_yaml.yaml_file_to_dict("")
+
+def test_config_file_loaded_once(tmp_path):
+
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("config:\n    values: [1, 2]\n")
+
+    config = utils.load_yaml.yaml_config_file_to_dict(str(config_file))
+    assert config == {"config":{"values":[1, 2]}}
+    assert utils.load_yaml.yaml_config_file_to_dict(str(config_file)) is config
+
+    # A changed file is re-loaded
+    config_file.write_text("config:\n    values: [3]\n")
+    os.utime(config_file, ns=(0, config_file.stat().st_mtime_ns + 1000000))
+    assert utils.load_yaml.yaml_config_file_to_dict(str(config_file)) == {"config":{"values":[3]}}
+
+def test_config_cannot_be_changed(tmp_path):
+
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("config:\n    values: [1, 2]\n")
+    config = utils.load_yaml.yaml_config_file_to_dict(str(config_file))
+
+    with pytest.raises(TypeError):
+        config["config"]["other"] = 1
+    with pytest.raises(TypeError):
+        config["config"]["values"].append(3)
+
+    changed = copy.deepcopy(config)
+    changed["config"]["values"].append(3)
+    assert changed == {"config":{"values":[1, 2, 3]}}
+    assert config["config"] | {"other":1} == {"values":[1, 2], "other":1}
+    assert pickle.loads(pickle.dumps(config)) == config
+    assert utils.load_yaml.class_to_yaml_str(config) == "config:\n    values:\n    -   1\n    -   2\n"
+
+def test_merged_texts_are_shared_and_bounded():
+
+    from utils import output
+
+    texts = utils.load_yaml.freeze({"default":{"error":"Error"}})
+    merged = output._merge_texts(texts, utils.load_yaml.freeze({"default":{"done":"Done"}, "fr":{"done":"Fini"}}))
+
+    assert merged == {"default":{"error":"Error", "done":"Done"}, "fr":{"done":"Fini"}}
+
+    # Texts that are reloaded (i.e. new versions) are merged again, and the merges of old versions are evicted
+    for _ in range(output.MAX_MERGED_TEXTS):
+        templated_texts = utils.load_yaml.freeze({"default":{"done":"Done"}})
+        assert output._merge_texts(texts, templated_texts) is output._merge_texts(texts, templated_texts)
+    assert len(output._merged_texts) == output.MAX_MERGED_TEXTS
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+from utils import match, transform
+from utils.property_str import pstr
+
+def test_get_equals_returns_first_equal_possible():
+
+    first = pstr("Web Server")
+    possible = ["Database", first, pstr("web server"), None]
+
+    assert match.get_equals(" web SERVER", possible) is first
+    assert match.get_equals("", possible) == ""
+    assert match.get_equals(None, ["", None]) == ""
+    assert match.get_equals("Browser", possible) is None
+    assert match.get_equals("Browser", []) is None
+
+    # The same possible values are matched the same way after being changed
+    possible[0] = "Browser"
+    assert match.get_equals("browser", possible) == "Browser"
+
+def test_get_equals_with_transform():
+
+    strip_context = transform.strip("(", ")")
+    assert strip_context is transform.strip("(", ")")
+
+    assert match.get_equals("Database", ["Web server (cache)", "Database (SQL)"], strip_context) == "Database (SQL)"
+    assert match.equals("Database (SQL)", "database", strip_context)
+    assert not match.equals("Database (SQL)", "database")
+    assert match.contains("the web server (cache)", ["WEB SERVER"], strip_context)
+
+def test_get_equals_with_canonical_set():
+
+    strip_context = transform.strip("(", ")")
+    first = pstr("Web Server (cache)")
+    possible = ["Database (SQL)", first, pstr("web server"), None]
+    canonical_set = match.CanonicalSet(possible, strip_context)
+
+    # Matches as the list of possible values would
+    for value in [" web SERVER", "database", "", None, "Browser"]:
+        assert match.get_equals(value, canonical_set, strip_context) == match.get_equals(value, possible, strip_context)
+    assert match.get_equals("web server", canonical_set, strip_context) is first
+    # Matched with a different transform than the set was built with
+    assert match.get_equals("web server", canonical_set) == "web server"
+    assert match.equals("Database (SQL)", match.CanonicalSet(["database (sql)", ["a list"]]))
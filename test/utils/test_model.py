@@ -0,0 +1,56 @@
+import pytest
+from data.key import key as Key
+from data import find, model_index
+from utils.model import annotate
+
+def _model():
+
+    component_row = {Key("name", ["row-identifier"]): "web", Key("in scope"): "yes"}
+    threat_row = {Key("threat"): "spoofing", Key("id", ["row-identifier"]): "T1", Key("components"): [{Key("component"): "web"}]}
+    return {
+        Key("details"): {Key("title", ["no-defaults"]): "A threat model"},
+        Key("components"): [component_row],
+        Key("threats"): [threat_row]
+    }, component_row, threat_row
+
+def test_annotate():
+
+    model, component_row, threat_row = _model()
+
+    annotate(model, {"title":["document-title"], "in scope":["in-scope"]})
+
+    details_key, details = list(model.items())[0]
+    title_key = list(details.keys())[0]
+    assert title_key.getProperty("parentKey") is details_key
+    assert title_key.getProperty("rowID") is None
+    assert not title_key.hasTag("document-title")
+
+    name_key, in_scope_key = list(component_row.keys())
+    assert in_scope_key.hasTag("in-scope")
+    assert in_scope_key.getProperty("rowID") is name_key
+    assert name_key.getProperty("rowID") is name_key
+    assert name_key.getProperty("value") == "web"
+    assert name_key.getProperty("row") is component_row
+
+    # Nested tables without a row identifier use the row identifier of the row they are in
+    id_key = list(threat_row.keys())[1]
+    component_key = list(threat_row[Key("components")][0].keys())[0]
+    assert component_key.getProperty("rowID") is id_key
+    assert component_key.getProperty("parentKey") == "components"
+
+    assert find.keys_with_tag(model, "in-scope") == [(in_scope_key, "yes")]
+
+    model_index.detach(model)
+
+def test_annotate_is_idempotent():
+
+    model, _, _ = _model()
+
+    index = annotate(model)
+    assert annotate(model) is index
+    assert annotate(model, row_identifiers=False) is index
+    # New default tags need another walk of the model
+    assert annotate(model, {"threat":["threat-description"]}) is not index
+    assert find.key_with_tag(model, "threat-description")[1] == "spoofing"
+
+    model_index.detach(model)
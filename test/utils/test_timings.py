@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import threading
+import pytest
+from data.key import key as Key
+from data import find
+from utils.timings import Timings
+from utils.request import Request
+
+@pytest.fixture
+def timings():
+    Timings.init("true")
+    yield Timings
+    Timings.init()
+
+def test_stages_record_counts_of_innermost_stage(timings):
+
+    model = {Key("rows", ["rows-data"]): [{Key("name", ["row-identifier"]):"first"}, {Key("name", ["row-identifier"]):"second"}]}
+
+    with Timings.stage("outer", document="doc") as outer:
+        Timings.count("issues", 2)
+        with Timings.stage("inner") as inner:
+            assert len(find.keys_with_tag(model, "row-identifier")) == 2
+
+    assert Timings.get() == [inner, outer]
+    assert inner["counts"] == {"tag-lookups":1, "tagged-keys":2}
+    assert outer["counts"] == {"issues":2}
+    assert outer["document"] == "doc"
+    assert outer["wall-ms"] >= inner["wall-ms"]
+
+def test_counts_stay_on_their_thread(timings):
+
+    def _run():
+        with Timings.stage("thread"):
+            Timings.count("comparisons", 3)
+
+    with Timings.stage("main") as main:
+        thread = threading.Thread(target=_run)
+        thread.start()
+        thread.join()
+
+    assert "counts" not in main
+    assert [record["stage"] for record in Timings.get()] == ["thread", "main"]
+    assert Timings.get()[0]["counts"] == {"comparisons":3}
+
+def test_disabled_records_nothing(monkeypatch):
+
+    monkeypatch.delenv("THREATWARE_TIMINGS", raising=False)
+    Timings.init(None)
+
+    with Timings.stage("stage") as record:
+        Timings.count("issues")
+
+    assert record is None
+    assert Timings.get() == []
+
+def test_request_only_outputs_timings_if_requested():
+
+    Request.set({"action":"verify"})
+    assert "timings" not in Request.get()
+
+    Request.set({"action":"verify", "timings":"true"})
+    assert Request.get()["timings"] == "true"
+
+    Request.set({})
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+
+import pickle
+from utils import transform
+
+def test_strip_context_is_interned_and_hashable():
+
+    strip_context = transform.StripContext("(", ")")
+
+    assert transform.StripContext("(", ")") is strip_context
+    assert transform.strip("(", ")") is strip_context
+    assert pickle.loads(pickle.dumps(strip_context)) is strip_context
+    assert strip_context != transform.StripContext("[", "]")
+    assert len({strip_context, transform.StripContext("(", ")"), transform.identity()}) == 2
+
+def test_strip_context_remembers_values():
+
+    strip_context = transform.StripContext("<", ">")
+
+    assert strip_context("Database <SQL> server") == "Database  server"
+    assert strip_context("Database <SQL> server") == "Database  server"
+    assert strip_context("No context >here<") == "No context >here<"
+    assert strip_context._cached_strip.cache_info().hits == 1
+
+    assert transform.c14n(" Web Server <cache>", strip_context) == "web server"
+    assert transform.c14n(" Web Server", transform.identity()) == "web server"
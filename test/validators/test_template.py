@@ -1,6 +1,8 @@
+import pickle
 import pytest
 import validators.template
 from data.key import key as Key
+from data import model_index
 
 def test_valid_template():
 
@@ -79,3 +81,23 @@ def test_invalid_template_invalid_key():
 
     assert result == False
     assert property_text == config["output_text_invalid"].format(test_key, valid_value, [template[template_key]])
+
+def test_template_values_kept_with_index():
+
+    template = {Key("rows"): [{Key("status", ["template-verification-test"]):"Draft"}, {Key("status", ["template-verification-test"]):["Approved", None]},
+                              {Key("other", ["template-verification-test"]):"Obsolete"}]}
+    index = model_index.attach(template)
+    references = {'validator-tag':"template-verification-test", 'template-model':template}
+
+    assert validators.template.validate({}, Key("status"), " draft", references) == True
+    assert validators.template.validate({}, Key("status"), "APPROVED", references) == True
+    assert validators.template.validate({}, Key("status"), None, references) == True
+    assert validators.template.validate({}, Key("status"), "Obsolete", references) == False
+    assert "template-values/template-verification-test" in index.marks
+
+    # The values are pickled with the index (e.g. when the template is cached)
+    cached_template, cached_index = pickle.loads(pickle.dumps((template, index)))
+    template_values = cached_index.derived["template-values"]["template-verification-test"]
+    assert template_values.by_name == {"status":{"draft", "approved", ""}, "other":{"obsolete"}}
+
+    model_index.detach(template)
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
+import os
 import pytest
 from pathlib import Path
-from validators.validators import Validator
+from validators.validators import Validator, get_validator
 from data.key import key as Key
+from utils.config import ConfigBase
+from utils.request import Request
+from language.translate import Translate
 
 def _get_validator():
     validator_config = {"validator-dispatch-yaml-path":str(Path(__file__).absolute().parent.joinpath("validators.yaml")),
@@ -48,4 +52,73 @@ def test_validators_no_validator_configured():
 
     output = validator.validate(validator_tag, Key("test"), "test", {})
 
-    assert output.result == False and output.error == f"No validator called 'does_not_exist' is configured"
\ No newline at end of file
+    assert output.result == False and output.error == f"No validator called 'does_not_exist' is configured"
+
+@pytest.fixture
+def configured():
+    language_code = Translate.languageCode
+    ConfigBase._set_install_directory()
+    ConfigBase.base_dir = ConfigBase.install_dir
+    ConfigBase.ephemeral_env = False
+    Request.set({})
+    Translate.init()
+    yield
+    Translate.languageCode = language_code
+
+def test_get_validator_loads_once_until_changed(configured, tmp_path):
+
+    config_path = tmp_path.joinpath("validator_config.yaml")
+    config_path.write_text(Path(__file__).absolute().parent.joinpath("validator_config.yaml").read_text())
+    validator_config = {"validator-config-yaml-path":str(config_path)}
+
+    validator = get_validator(validator_config)
+
+    assert get_validator(validator_config) is validator
+    assert get_validator({}) is not validator
+
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert get_validator(validator_config) is not validator
+
+def test_get_validator_per_language(configured):
+
+    validator = get_validator({})
+    language_code = Translate.languageCode
+    Translate.languageCode = "other"
+    other_validator = get_validator({})
+    assert other_validator is not validator
+
+    # Both languages stay loaded
+    Translate.languageCode = language_code
+    assert get_validator({}) is validator
+    Translate.languageCode = "other"
+    assert get_validator({}) is other_validator
+
+def test_validate_batch_validates_each_value_once(configured):
+
+    validator = Validator()
+    validated = []
+    regex_validate = validator.dispatch["regex"]
+    validator.dispatch["regex"] = lambda config, key, value, references: validated.append(value) or regex_validate(config, key, value, references)
+
+    keys_values = [(Key("version"), value) for value in ["1.0", "1.0", "one", "2.1", "one"]]
+
+    assert validator.validate_batch("validate-as-version", keys_values, {}) == [True, True, False, True, False]
+    assert validated == ["1.0", "one", "2.1"]
+    assert validator.validate_batch("does not exist", keys_values, {}) == [False] * 5
+
+    output = validator.output("validate-as-version", Key("version"), "one", False)
+    assert output.result() == False and output.validator_name == "regex" and output.validator_module == "validators.regex"
+
+def test_outputs_use_texts_of_their_validator(configured):
+
+    validator = _get_validator()
+    other_validator = get_validator({})
+
+    output = validator.output("validate-as-test", Key("test"), "test", True)
+    other_output = other_validator.output("validate-as-test", Key("test"), "test", True)
+
+    assert output.validator_config is validator.validator_config_dict
+    assert other_output.validator_config is other_validator.validator_config_dict
+    assert output.templated_output_texts is validator.text_dict
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Caches for things that are expensive to fetch or compute, kept in memory and (optionally) on disk
+"""
+
+import logging
+import os
+import stat
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+# The temp directory is shared with other users, so each user has their own cache directory
+DEFAULT_CACHE_DIR = str(Path(tempfile.gettempdir()).joinpath(f"threatware-cache-{os.getuid()}" if hasattr(os, "getuid") else "threatware-cache"))
+# Disk caches are bounded by default, as the temp directory can be small (e.g. 512MB in AWS Lambda) and shared
+DEFAULT_MAX_DISK_BYTES = 64 * 1024 * 1024
+
+def cache_dir() -> str:
+    """ The directory caches are stored in, which can be set using the THREATWARE_CACHE_DIR environment variable """
+
+    if (suggested_dir := os.getenv("THREATWARE_CACHE_DIR")) is not None:
+        return os.path.expandvars(os.path.expanduser(suggested_dir))
+
+    return DEFAULT_CACHE_DIR
+
+def is_private_directory(directory:str) -> bool:
+    """
+    Returns True if only the current user (or root) can change the directory and what is in it, i.e. the directory is owned by
+    the current user and isn't group or world writable, and every directory above it is owned by the current user or root and
+    is either not group or world writable or is sticky (like /tmp).
+    """
+
+    if not hasattr(os, "getuid"):
+        # Not a POSIX system, where temp directories are per user
+        return True
+
+    uid = os.getuid()
+    path = Path(os.path.abspath(directory))
+    try:
+        directory_stat = os.lstat(path)
+        if not stat.S_ISDIR(directory_stat.st_mode) or directory_stat.st_uid != uid or directory_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            return False
+        for parent in path.parents:
+            parent_stat = os.stat(parent)
+            if parent_stat.st_uid not in [uid, 0]:
+                return False
+            if parent_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH) and not parent_stat.st_mode & stat.S_ISVTX:
+                return False
+    except OSError:
+        return False
+
+    return True
+
+class LRUCache:
+    """ An in memory cache that evicts the least recently used entry once it holds max_entries entries """
+
+    def __init__(self, max_entries:int = 16):
+
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # A document and its template are fetched (and so cached) on different threads
+        self._lock = threading.Lock()
+
+    def get(self, cache_key):
+
+        with self._lock:
+            if (value := self._entries.get(cache_key)) is not None:
+                self._entries.move_to_end(cache_key)
+            return value
+
+    def put(self, cache_key, value):
+
+        with self._lock:
+            self._entries[cache_key] = value
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > max(self.max_entries, 0):
+                self._entries.popitem(last=False)
+
+    def remove(self, cache_key):
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class DiskCache:
+    """
+    A cache of pickled values stored as files in a directory.
+
+    If max_bytes is set, the least recently used entries are removed once the entries take up more than max_bytes.  Problems 
+    reading or writing the cache are logged and otherwise ignored, so the cache can't cause a request to fail.
+
+    Entries are unpickled, so anyone who can write to the directory could run code in this process.  The directory is created
+    so only the current user can use it, and the cache is disabled if the directory (or a directory above it) could be changed
+    by another user (see is_private_directory).
+    """
+
+    def __init__(self, directory:str, max_bytes:int = None):
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._warned = False
+
+    def _usable(self, create:bool = False) -> bool:
+        """ Returns True if the directory exists (creating it if asked to) and is private """
+
+        try:
+            if create:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            elif not os.path.isdir(self.directory):
+                return False
+        except OSError as err:
+            logger.warning(f"Could not create cache directory '{self.directory}'. err='{err}'")
+            return False
+
+        # Checked every time, as the directory could be removed and replaced (e.g. when the temp directory is cleaned up)
+        if not is_private_directory(self.directory):
+            if not self._warned:
+                logger.warning(f"Not using cache directory '{self.directory}', as it (or a directory above it) is not owned by the current user or can be written to by other users")
+                self._warned = True
+            return False
+
+        return True
+
+    def _path(self, cache_key) -> Path:
+
+        return Path(self.directory).joinpath(hashlib.sha256(repr(cache_key).encode("utf-8")).hexdigest())
+
+    def get(self, cache_key) -> bytes:
+
+        if not self._usable():
+            return None
+
+        path = self._path(cache_key)
+        try:
+            with open(path, "rb") as cache_file:
+                stored_key, value = pickle.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logger.warning(f"Could not read cache entry from '{self.directory}'. err='{err}'")
+            return None
+
+        if stored_key != cache_key:
+            return None
+
+        if self.max_bytes is not None:
+            # The modification time of an entry records when it was last used
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        return value
+
+    def put(self, cache_key, value:bytes):
+
+        if not self._usable(create=True):
+            return
+
+        try:
+            # Write to a temporary file first so a concurrent reader never sees half a cache entry
+            file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(file_descriptor, "wb") as cache_file:
+                pickle.dump((cache_key, value), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(cache_key))
+        except Exception as err:
+            logger.warning(f"Could not write cache entry to '{self.directory}'. err='{err}'")
+            return
+
+        if self.max_bytes is not None:
+            self._evict(keep = self._path(cache_key))
+
+    def _evict(self, keep:Path):
+
+        try:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    entry_stat = entry.stat()
+                    entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry.path))
+        except OSError as err:
+            logger.warning(f"Could not list cache entries in '{self.directory}'. err='{err}'")
+            return
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if path == str(keep):
+                continue
+            try:
+                os.remove(path)
+                total_bytes -= size
+            except OSError:
+                pass
+
+    def remove(self, cache_key):
+
+        if not self._usable():
+            return
+
+        try:
+            os.remove(self._path(cache_key))
+        except FileNotFoundError:
+            pass
+        except Exception as err:
+            logger.warning(f"Could not remove cache entry from '{self.directory}'. err='{err}'")
+
+class ObjectCache:
+    """
+    A cache of objects with an in memory (LRU) tier and an on disk tier.
+
+    Objects are stored pickled (in both tiers), so every get returns a new copy of the object that the caller is free to change.
+    The disk tier holds at most max_disk_bytes (DEFAULT_MAX_DISK_BYTES unless set), evicting the least recently used entries.
+    """
+
+    def __init__(self, name:str, max_entries:int = 16, directory:str = None, disk:bool = True, max_disk_bytes:int = DEFAULT_MAX_DISK_BYTES):
+
+        self.memory = LRUCache(max_entries)
+        self.disk = None
+        if disk:
+            self.disk = DiskCache(directory if directory is not None else str(Path(cache_dir()).joinpath(name)), max_disk_bytes)
+
+    def get(self, cache_key):
+
+        if (value := self.memory.get(cache_key)) is None and self.disk is not None:
+            if (value := self.disk.get(cache_key)) is not None:
+                self.memory.put(cache_key, value)
+
+        if value is None:
+            return None
+
+        try:
+            return pickle.loads(value)
+        except Exception as err:
+            logger.warning(f"Could not load cached object, removing it from the cache. err='{err}'")
+            self.remove(cache_key)
+            return None
+
+    def put(self, cache_key, obj):
+
+        try:
+            value = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as err:
+            logger.warning(f"Could not cache object. err='{err}'")
+            return
+
+        self.memory.put(cache_key, value)
+        if self.disk is not None:
+            self.disk.put(cache_key, value)
+
+    def remove(self, cache_key):
+
+        self.memory.remove(cache_key)
+        if self.disk is not None:
+            self.disk.remove(cache_key)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Utility methods for parsing dates
+"""
+
+import re
+import logging
+from datetime import datetime
+from functools import lru_cache
+import dateutil.parser
+from dateutil.parser import ParserError
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+# Dates in these formats are parsed directly, rather than by dateutil (which is slow).  They are only parsed directly when
+# dateutil would parse them to the same date, otherwise dateutil decides.
+_ISO_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_NUMERIC_DATE = re.compile(r"(\d{1,2})([/.-])(\d{1,2})\2(\d{4})")
+
+def _parse_known(value:str) -> datetime:
+
+    if (iso := _ISO_DATE.fullmatch(value)) is not None:
+        return datetime(int(iso[1]), int(iso[2]), int(iso[3]))
+
+    if (numeric := _NUMERIC_DATE.fullmatch(value)) is not None:
+        first, second, year = int(numeric[1]), int(numeric[3]), int(numeric[4])
+        # Like dateutil, the month comes first unless it can't be a month
+        if first > 12:
+            return datetime(year, second, first)
+        return datetime(year, first, second)
+
+    return None
+
+@lru_cache(maxsize=4096)
+def _parse(value:str, formats:tuple) -> datetime:
+
+    for date_format in formats:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            pass
+
+    try:
+        if (parsed := _parse_known(value.strip())) is not None:
+            return parsed
+    except ValueError:
+        # Not a real date (e.g. 31st February), which dateutil reports in its own way
+        pass
+
+    try:
+        return dateutil.parser.parse(value)
+    except (ParserError, OverflowError):
+        return None
+
+def parse(value:str, formats:list = None) -> datetime:
+    """
+    Parses a date, returning None if the value isn't a date
+
+    The formats (strptime formats) are tried first, then common date formats are parsed directly, and then dateutil
+    parses the value.  Values that have been parsed before are cached.
+    """
+
+    if not isinstance(value, str):
+        return None
+
+    return _parse(value, tuple(formats) if formats else ())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Runs named tasks one after the other, or concurrently in a thread pool (and optionally a pool of forked processes)
+"""
+
+import io
+import logging
+import pickle
+import threading
+import contextvars
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from data import model_index
+from data.key import key as Key
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+SEQUENTIAL = "sequential"
+THREAD = "thread"
+PROCESS = "process"
+MODES = [SEQUENTIAL, THREAD, PROCESS]
+
+def fork_available() -> bool:
+    """ Processes can only share a model (without copying it) if they are forked """
+    return "fork" in multiprocessing.get_all_start_methods()
+
+def order(names:list, after:dict) -> tuple:
+    """
+    Orders names so every name comes after the names it must run after, otherwise keeping the order of names.
+
+    Returns the ordered names and the dependencies that were kept (name -> list of names), which are only those on other
+    names in names.  Dependencies that can't be met (because they are circular) are logged and ignored.
+    """
+
+    remaining = list(names)
+    ordered = []
+    kept_after = {}
+    while remaining:
+        for name in remaining:
+            if all(dependency in ordered or dependency not in names for dependency in after.get(name, [])):
+                break
+        else:
+            name = remaining[0]
+            logger.error(f"'{name}' has circular dependencies on '{[dependency for dependency in after.get(name, []) if dependency in remaining]}', which are ignored")
+
+        remaining.remove(name)
+        kept_after[name] = [dependency for dependency in after.get(name, []) if dependency in ordered]
+        ordered.append(name)
+
+    return ordered, kept_after
+
+class _ModelPickler(pickle.Pickler):
+    # Keys in the shared models are pickled as their position in a model, so they aren't copied
+    def __init__(self, file, indexes:list):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.indexes = indexes
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Key):
+            for position, index in enumerate(self.indexes):
+                if (key_order := index.key_order(obj)) is not None:
+                    return (position, key_order)
+        return None
+
+class _ModelUnpickler(pickle.Unpickler):
+    def __init__(self, file, keys_by_order:list):
+        super().__init__(file)
+        self.keys_by_order = keys_by_order
+
+    def persistent_load(self, pid):
+        position, key_order = pid
+        return self.keys_by_order[position][key_order]
+
+# The tasks and model indexes in a forked process, which are inherited from the process that forked it (so aren't copied)
+_forked_tasks = None
+_forked_indexes = None
+
+def _init_forked(tasks:dict, indexes:list):
+    global _forked_tasks, _forked_indexes
+    _forked_tasks = tasks
+    _forked_indexes = indexes
+
+def _started() -> bool:
+    return True
+
+def _run_forked(name:str) -> bytes:
+    result = _forked_tasks[name]()
+    buffer = io.BytesIO()
+    _ModelPickler(buffer, _forked_indexes).dump(result)
+    return buffer.getvalue()
+
+def run(tasks:dict, mode:str = SEQUENTIAL, max_workers:int = None, after:dict = None, process_tasks:list = None, models:list = None) -> dict:
+    """
+    Runs tasks, returning their results.
+
+    Parameters
+    ----------
+    tasks : dict
+        Task name -> function (taking no arguments) to call
+    mode : str
+        'sequential' runs the tasks one after the other, 'thread' runs them concurrently in a thread pool, and 'process' also runs
+        them concurrently but with the process_tasks run in forked processes.  Forking a process while other threads are running
+        can deadlock it, so threads are used instead if other threads are running (e.g. in a multithreaded server), or if
+        processes can't be forked or started (e.g. in AWS Lambda)
+    max_workers : int
+        The maximum number of threads (and processes) to use
+    after : dict
+        Task name -> list of the task names the task must run after
+    process_tasks : list
+        The names of the tasks that can run in a forked process.  Changes a task makes (e.g. to models) in a forked process
+        are lost, so only tasks that don't change anything (other than returning a result) should run in a forked process.
+    models : list
+        Indexed models (see data.model_index) that forked processes share.  Keys from these models in the result of a task
+        run in a forked process are returned as the keys from the models (rather than copies).
+
+    Returns
+    -------
+    dict : Task name -> result, in the same order as tasks
+    """
+
+    names, after = order(list(tasks), after if after is not None else {})
+
+    if mode == PROCESS and not fork_available():
+        logger.warning(f"Processes can't be forked on this platform, so using mode '{THREAD}' rather than '{PROCESS}'")
+        mode = THREAD
+    elif mode == PROCESS and threading.active_count() > 1:
+        # A forked process only has the thread that forked it, so locks held by other threads (e.g. logging locks) are never released
+        logger.warning(f"Processes can't be safely forked while other threads are running (e.g. in a multithreaded server), so using mode '{THREAD}' rather than '{PROCESS}'")
+        mode = THREAD
+    if mode not in MODES:
+        logger.warning(f"Unrecognised mode '{mode}' for running tasks, using '{SEQUENTIAL}'.  Should be one of '{MODES}'")
+        mode = SEQUENTIAL
+
+    if mode == SEQUENTIAL or len(names) <= 1:
+        results = {name:tasks[name]() for name in names}
+    else:
+        forked = [name for name in names if name in (process_tasks or [])] if mode == PROCESS else []
+        results = _run_concurrently(tasks, names, after, max_workers, forked, models if models is not None else [])
+
+    return {name:results[name] for name in tasks}
+
+def _run_concurrently(tasks:dict, names:list, after:dict, max_workers:int, forked:list, models:list) -> dict:
+
+    indexes = [index for model in models if (index := model_index.get_index(model)) is not None]
+
+    process_pool = None
+    if len(forked) > 0:
+        try:
+            process_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("fork"), initializer=_init_forked, initargs=(tasks, indexes))
+            # Fork the processes now, before the thread pool starts any threads
+            process_pool.submit(_started).result()
+        except (OSError, BrokenProcessPool) as err:
+            logger.warning(f"Could not start processes (e.g. there is no /dev/shm in AWS Lambda), so running every task in threads. err='{err}'")
+            if process_pool is not None:
+                process_pool.shutdown(wait=True, cancel_futures=True)
+            process_pool = None
+            forked = []
+
+    thread_pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    results = {}
+    forked_results = {}
+    running = {}
+    pending = list(names)
+    try:
+        while pending or running:
+            # Start every task whose dependencies have finished
+            for name in [name for name in pending if all(dependency in results for dependency in after[name])]:
+                pending.remove(name)
+                if name in forked:
+                    running[process_pool.submit(_run_forked, name)] = name
+                else:
+                    # Run in a copy of this thread's context, so the task sees the same attached model indexes (see data.model_index.scope)
+                    running[thread_pool.submit(contextvars.copy_context().run, tasks[name])] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                if name in forked:
+                    forked_results[name] = results[name]
+    finally:
+        thread_pool.shutdown(wait=True, cancel_futures=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=True, cancel_futures=True)
+
+    if len(forked_results) > 0:
+        keys_by_order = [index.keys_by_order() for index in indexes]
+        for name, result in forked_results.items():
+            results[name] = _ModelUnpickler(io.BytesIO(result), keys_by_order).load()
+
+    return results
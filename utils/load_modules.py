@@ -6,7 +6,7 @@ Dynamically loads modules
 import logging
 import importlib
 from typing import Tuple
-from utils.load_yaml import yaml_file_to_dict
+from utils.load_yaml import yaml_config_file_to_dict
 from pathlib import Path
 
 import utils.logging
@@ -16,7 +16,7 @@ logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 def load_from_dispatch_yaml(yamlpath:Path, rootkey:str, modulepath:Path, methodname:str) -> Tuple[dict, dict]:
     """ Dynamically loads a module and return a dict of methods"""
 
-    yaml_dict = yaml_file_to_dict(yamlpath) 
+    yaml_dict = yaml_config_file_to_dict(yamlpath)
         
     all_modules = yaml_dict[rootkey]
     
@@ -3,10 +3,14 @@
 Loads YAML
 """
 
+import os
+import copy
 import logging
+import threading
 from io import StringIO
 from utils.error import ThreatwareError
 from ruamel.yaml import YAML
+from ruamel.yaml.representer import SafeRepresenter
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -52,6 +56,100 @@ def yaml_str_to_dict(yamlstr:str):
     yamldict = yaml.load(yamlstr)
     return yamldict
 
+##
+## Methods to help with loading config files once per process
+##
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"'{type(self).__name__}' is loaded config shared by all requests, so cannot be changed (copy it first)")
+
+class FrozenDict(dict):
+    """ A dict that can't be changed.  Copies (copy.copy, copy.deepcopy, dict(...), | ) are ordinary dicts that can be changed. """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo:dict) -> dict:
+        return {key:copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+class FrozenList(list):
+    """ A list that can't be changed.  Copies (copy.copy, copy.deepcopy, list(...), + ) are ordinary lists that can be changed. """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def copy(self) -> list:
+        return list(self)
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo:dict) -> list:
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+def freeze(value):
+    """ Returns the value with every dict and list in it (recursively) replaced by a FrozenDict or FrozenList """
+
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict({key:freeze(entry) for key, entry in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(entry) for entry in value)
+    return value
+
+# Loaded files, by (path, variant), as (mtime, loaded value), so warm processes only re-load files that have changed
+_loaded_files = {}
+_loaded_files_lock = threading.Lock()
+
+def load_file_once(path:str, load_fn, variant = None):
+    """
+    Returns load_fn(path, mtime) for the file, calling load_fn only the first time for each version (i.e. modification
+    time) of the file.  Files loaded in different ways (e.g. localised to different languages) need a different variant.
+
+    The value returned is shared with every other caller (across requests), so should not be changed.
+    """
+
+    path = str(path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        # Let the loader report the problem
+        return load_fn(path, None)
+
+    with _loaded_files_lock:
+        loaded = _loaded_files.get((path, variant))
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1]
+
+    # Loading is not done under the lock, so a file may be loaded more than once by concurrent first requests
+    value = load_fn(path, mtime)
+    with _loaded_files_lock:
+        _loaded_files[(path, variant)] = (mtime, value)
+
+    return value
+
+def yaml_config_file_to_dict(path:str):
+    """ Returns the YAML config file, loaded once (per version of the file) and shared, as a FrozenDict """
+
+    return load_file_once(path, lambda path, mtime: freeze(yaml_file_to_dict(path)))
+
 
 ##
 ## Methods to help with outputting yaml files
@@ -66,6 +164,10 @@ def yaml_register_class(class_type):
     if class_type not in _registered_classes:
         _registered_classes.append(class_type)
 
+# Loaded config can be output like any other dict or list
+SafeRepresenter.add_representer(FrozenDict, SafeRepresenter.represent_dict)
+SafeRepresenter.add_representer(FrozenList, SafeRepresenter.represent_list)
+
 def _get_yaml_object():
 
     yaml=YAML(typ='safe')
@@ -4,6 +4,7 @@ Utility methods for string matching
 """
 
 import logging
+from functools import lru_cache
 from utils import transform
 from utils.model import recurse
 
@@ -15,7 +16,60 @@ logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 #         value = transform_fn(value)
 #     return value.casefold().strip()
 
-# Returns the 'possible' value if 'str_to_match' equals 'possible' string/one of list of strings
+# The same values are compared many times, so their canonical forms are remembered (by value and transform function)
+@lru_cache(maxsize=65536)
+def _cached_c14n(value:str, transform_fn) -> str:
+    return transform.c14n(value, transform_fn)
+
+def _c14n(value:str, transform_fn = None) -> str:
+    if isinstance(value, str):
+        return _cached_c14n(value, transform_fn)
+    return transform.c14n(value, transform_fn)
+
+def canonical(value:str, transform_fn = None) -> str:
+    """ Returns the canonical form of the value that equals compares, or None if the value isn't a string (or None) """
+
+    if value is None:
+        value = ""
+    if not isinstance(value, str):
+        return None
+    return _c14n(value, transform_fn)
+
+class CanonicalSet:
+    """
+    Possible values (strings or None) to match against, along with the position of the first value with each canonical
+    form.  Build one for values that are matched against many times, and pass it to get_equals/equals in place of the list,
+    so a value is looked up by its canonical form rather than compared to each possible value.
+    """
+
+    __slots__ = ("values", "transform_fn", "_positions")
+
+    def __init__(self, values:list, transform_fn = None):
+
+        self.values = list(values)
+        self.transform_fn = transform_fn
+        self._positions = None
+        if all(value is None or isinstance(value, str) for value in self.values):
+            self._positions = {}
+            for position, value in enumerate(self.values):
+                self._positions.setdefault(_c14n(value if value is not None else "", transform_fn), position)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def get_equals(self, str_to_match:str, transform_fn = None) -> str:
+        """ As get_equals, for a str_to_match that is a string """
+
+        if self._positions is None or transform_fn != self.transform_fn:
+            return get_equals(str_to_match, self.values, transform_fn)
+        if (position := self._positions.get(_c14n(str_to_match, transform_fn))) is None:
+            return None
+        return self.values[position] if self.values[position] is not None else ""
+
+# Returns the 'possible' value if 'str_to_match' equals 'possible' string/one of list of strings (or a CanonicalSet)
 def get_equals(str_to_match:str, possible, transform_fn = None) -> str:
 
     if str_to_match is None:
@@ -23,8 +77,15 @@ def get_equals(str_to_match:str, possible, transform_fn = None) -> str:
     if possible is None:
         possible = ""
 
+    if isinstance(possible, CanonicalSet):
+        if isinstance(str_to_match, str):
+            return possible.get_equals(str_to_match, transform_fn)
+        possible = possible.values
+
     if isinstance(str_to_match, str):
-        str_to_match_c14n = transform.c14n(str_to_match, transform_fn)
+        if isinstance(possible, str):
+            return possible if _c14n(str_to_match, transform_fn) == _c14n(possible, transform_fn) else None
+        str_to_match_c14n = _c14n(str_to_match, transform_fn)
     else:
         logger.warning(f"Expecting a string to match but '{str_to_match}' is a '{type(str_to_match)}'")
 
@@ -35,7 +96,7 @@ def get_equals(str_to_match:str, possible, transform_fn = None) -> str:
         if possible_match is None:
             possible_match = ""
         if isinstance(possible_match, str):
-            possible_match_c14n = transform.c14n(possible_match, transform_fn)
+            possible_match_c14n = _c14n(possible_match, transform_fn)
         if str_to_match_c14n == possible_match_c14n:
             return possible_match
 
@@ -66,7 +127,7 @@ def is_empty_recursive(data:object) -> bool:
 
 def endswith(str_to_match:str, ends_with) -> bool:
 
-    str_to_match = transform.c14n(str_to_match)
+    str_to_match = _c14n(str_to_match)
 
     if isinstance(ends_with, str):
         ends_with = [ends_with]
@@ -75,7 +136,7 @@ def endswith(str_to_match:str, ends_with) -> bool:
 
     does_end_with = False
     for ending_str in ends_with:
-        if str_to_match.endswith(transform.c14n(ending_str)):
+        if str_to_match.endswith(_c14n(ending_str)):
             does_end_with = True
             break
 
@@ -85,7 +146,7 @@ def endswith(str_to_match:str, ends_with) -> bool:
 # Returns True if string starts with 'start_with' string/one of list of strings, and ends with 'ends_with' string/one of list of strings
 def starts_ends(str_to_match:str, starts_with, ends_with) -> bool:
 
-    str_to_match = transform.c14n(str_to_match)
+    str_to_match = _c14n(str_to_match)
 
     if isinstance(starts_with, str):
         starts_with = [starts_with]
@@ -98,13 +159,13 @@ def starts_ends(str_to_match:str, starts_with, ends_with) -> bool:
 
     does_start_with = False
     for starting_str in starts_with:
-        if str_to_match.startswith(transform.c14n(starting_str)):
+        if str_to_match.startswith(_c14n(starting_str)):
             does_start_with = True
             break
     
     does_end_with = False
     for ending_str in ends_with:
-        if str_to_match.endswith(transform.c14n(ending_str)):
+        if str_to_match.endswith(_c14n(ending_str)):
             does_end_with = True
             break
 
@@ -115,7 +176,7 @@ def get_contains(str_to_match:str, values, transform_fn = None) -> bool:
     Returns the value, if any of the values are contained in str_to_match
     """
 
-    str_to_match = transform.c14n(str_to_match, transform_fn)
+    str_to_match = _c14n(str_to_match, transform_fn)
 
     if isinstance(values, str):
         values = [values]
@@ -123,7 +184,7 @@ def get_contains(str_to_match:str, values, transform_fn = None) -> bool:
         logger.error(f"'values' parameter must be string or list of strings, not '{type(values)}'")
     
     for value_str in values:
-        if str_to_match.find(transform.c14n(value_str, transform_fn)) != -1:
+        if str_to_match.find(_c14n(value_str, transform_fn)) != -1:
             return value_str
             
     return None
@@ -4,6 +4,7 @@ Utility methods for models (dict->list->dict structures)
 """
 
 import logging
+from data import model_index
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -60,54 +61,99 @@ def recurse(model, key_value_callback, list_entry_callback):
     return return_value
 
 
-# In order to find the location of certain tagged data we need to tag keys with the rows they are in
-def assign_row_identifiers(model):
+def annotate(model, tags_dict:dict = None, row_identifiers:bool = True, parent_keys:bool = True) -> model_index.ModelIndex:
+    """
+    Annotates the keys of a model in a single (iterative) walk of the model.
 
-    def _key_value_callback(dict_key, dict_value, rowIDKey):
-        # We dont know where in the hierarchy we are, but for dicts we just add the rowIDKey
-        if rowIDKey is not None:
-            dict_key.addProperty("rowID", rowIDKey)
+    If parent_keys is True every key gets a 'parentKey' property, and if row_identifiers is True, keys in a row get a 'rowID' property (the key tagged
+    'row-identifier' in the row), with the 'row-identifier' key also getting 'value' and 'row' properties.  If tags_dict
+    (key name -> list of tags) is passed then those default tags are added to keys with that name (unless the key is tagged
+    'no-defaults').  The same walk builds the tag index for the model (see data.model_index), which is attached to the model.
 
-        return True, rowIDKey
+    Annotating is skipped if the model has already been annotated in the same way.
+
+    Returns: The data.model_index.ModelIndex for the model
+    """
 
-    def _list_entry_callback(list_entry, rowIDKey):
-        if isinstance(list_entry, dict):
-            local_rowIDKey = rowIDKey
-            # Rows are stored as dict
-            for dict_key, dict_value in list_entry.items():
+    marks = set()
+    if parent_keys:
+        marks.add("parent-keys")
+    if row_identifiers:
+        marks.add("row-identifiers")
+    if tags_dict:
+        marks.add(("default-tags", tuple(sorted((name, tuple(tags)) for name, tags in tags_dict.items()))))
+
+    if (index := model_index.get_index(model)) is not None and marks <= index.marks:
+        return index
+
+    index = model_index.ModelIndex(model, build=False)
+
+    def _open(container, in_list:bool, rowIDKey):
+        # Returns the rowIDKey for the keys in the container
+        index.open_container(container)
+        if not isinstance(container, dict):
+            return rowIDKey
+        
+        if tags_dict:
+            for dict_key in container:
+                if dict_key.name in tags_dict and not dict_key.hasTag("no-defaults"):
+                    dict_key.addTags(tags_dict[dict_key.name])
+
+        if row_identifiers and in_list:
+            # Rows are stored as dicts in a list, so let's try and find a "row-identifier" tag
+            for dict_key, dict_value in container.items():
                 if dict_key.hasTag("row-identifier"):
-                    #print(f"Found key tagged with 'row-identifier - {dict_key}")
-                    # We found a "row-identifier" for an entry in this row, let's use that from now on
-                    local_rowIDKey = dict_key
-                    # We need to report errors with the value for the "row-identiifer" key, so let's store the value as a property of the key
+                    # We need to report errors with the value for the "row-identiifer" key, and be able to get sibling data in a row
                     dict_key.addProperty("value", dict_value)
-                    # We need to be able to get sibling data in a row, so also store a reference to the whole row against the 'row-identifier' key
-                    dict_key.addProperty("row", list_entry)
-
+                    dict_key.addProperty("row", container)
                     # There should only be 1 row-identifier per row
+                    return dict_key
+
+        return rowIDKey
+
+    if isinstance(model, (dict, list)):
+        stack = [(model, _children(model), (), None, _open(model, False, None))]
+        while stack:
+            container, children, path, parentKey, rowIDKey = stack[-1]
+            for child_key, child_value in children:
+                child_path = path + (child_key,)
+                if isinstance(container, dict):
+                    if parent_keys:
+                        child_key.addProperty("parentKey", parentKey)
+                    if row_identifiers and rowIDKey is not None:
+                        child_key.addProperty("rowID", rowIDKey)
+                    index.add_key(child_key, container, child_path)
+                    child_parentKey = child_key
+                else:
+                    # Descendants of a list entry share the same parentKey
+                    child_parentKey = parentKey
+                if isinstance(child_value, (dict, list)):
+                    child_rowIDKey = _open(child_value, isinstance(container, list), rowIDKey)
+                    stack.append((child_value, _children(child_value), child_path, child_parentKey, child_rowIDKey))
                     break
-            # Let's assign the the rowIDKey to all elements of this row (the 'row-identifier' field might not have been the first)
-            # This will include child elements as well
-            return True, local_rowIDKey
-        else:
-            # Not a row so recurse using existing rowIDKey
-            return True, rowIDKey
+            else:
+                index.close_container(container)
+                stack.pop()
+
+    if (previous_index := model_index.get_index(model)) is not None:
+        marks |= previous_index.marks
+    index.marks |= marks
+    model_index.attach(model, index)
+
+    return index
 
-    return recurse(model, _key_value_callback, _list_entry_callback)
+def _children(container):
+    if isinstance(container, dict):
+        return iter(container.items())
+    return enumerate(container)
+
+# In order to find the location of certain tagged data we need to tag keys with the rows they are in
+def assign_row_identifiers(model):
+
+    return annotate(model, parent_keys=False)
 
 
 # In order to find the location of certain tagged data we need to tag keys with their parent keys
 def assign_parent_keys(model):
 
-    def _key_value_callback(dict_key, dict_value, parentKey):
-        # For every key, assign it a parentKey
-        dict_key.addProperty("parentKey", parentKey)
-        # If we recurse further, then this dict_key becomes the parentKey for descendants
-        return True, dict_key
-
-    def _list_entry_callback(list_entry, parentKey):
-        # Descendants of a list entry share the same parentKey, so just pass it along
-        return True, parentKey
-        
-    return recurse(model, _key_value_callback, _list_entry_callback)
-    
\ No newline at end of file
+    return annotate(model, row_identifiers=False)
@@ -8,8 +8,10 @@ from enum import Enum
 from pathlib import Path
 from utils.config import ConfigBase
 from utils import load_yaml
+from utils.cache import LRUCache
 from utils.config import ConfigBase
 from utils.request import Request
+from utils.timings import Timings
 from language.translate import Translate
 import jsonpickle
 
@@ -28,6 +30,32 @@ class OutputType(Enum):
     def __repr__(self):
         return self.name
 
+# There is a texts file per action and component, so only a few are merged at a time.  Bounded, so merges of files that
+# have since been reloaded (i.e. changed) are evicted.
+MAX_MERGED_TEXTS = 32
+# Merged texts, by the id() of the loaded texts they were merged from, as (texts, templated texts, merged texts)
+_merged_texts = LRUCache(MAX_MERGED_TEXTS)
+
+def _merge_texts(formatoutput_texts:dict, templated_texts:dict) -> dict:
+    """ Merges the common output texts into the templated texts, once for each version of the (shared) loaded texts """
+
+    merged_key = (id(formatoutput_texts), id(templated_texts))
+    if (merged := _merged_texts.get(merged_key)) is not None and merged[0] is formatoutput_texts and merged[1] is templated_texts:
+        return merged[2]
+
+    # Need to merge these dicts at each localisation entry
+    merged_texts = dict(templated_texts)
+    for dict_key in formatoutput_texts.keys():
+        if dict_key in merged_texts:
+            merged_texts[dict_key] = formatoutput_texts[dict_key] | merged_texts[dict_key]
+        else:
+            merged_texts[dict_key] = formatoutput_texts[dict_key]
+    merged_texts = load_yaml.freeze(merged_texts)
+
+    _merged_texts.put(merged_key, (formatoutput_texts, templated_texts, merged_texts))
+
+    return merged_texts
+
 class FormatOutput:
 
     #request_parameters:dict
@@ -37,18 +65,12 @@ class FormatOutput:
 
     def __init__(self, output_config:dict):
 
-        formatoutput_texts = load_yaml.yaml_file_to_dict(ConfigBase.getConfigPath(OUTPUT_TEXTS_YAML_PATH)).get("output-texts")
+        formatoutput_texts = load_yaml.yaml_config_file_to_dict(ConfigBase.getConfigPath(OUTPUT_TEXTS_YAML_PATH)).get("output-texts")
         self.information = Translate.localise(formatoutput_texts, "information")
         self.success = Translate.localise(formatoutput_texts, "success")
         self.error = Translate.localise(formatoutput_texts, "error")
         
-        self.templated_texts:dict = load_yaml.yaml_file_to_dict(ConfigBase.getConfigPath(output_config.get("template-text-file"))).get("output-texts")
-        # Need to merge these dicts at each localisation entry
-        for dict_key in formatoutput_texts.keys():
-            if dict_key in self.templated_texts:
-                self.templated_texts[dict_key] = formatoutput_texts[dict_key] | self.templated_texts[dict_key]
-            else:
-                self.templated_texts[dict_key] = formatoutput_texts[dict_key]
+        self.templated_texts:dict = _merge_texts(formatoutput_texts, load_yaml.yaml_config_file_to_dict(ConfigBase.getConfigPath(output_config.get("template-text-file"))).get("output-texts"))
         
         self.type = OutputType.NOT_SET
         self.description = None
@@ -69,6 +91,8 @@ class FormatOutput:
         if self.details is not None:
             output["details"] = self.details
         output["request"] = Request.get()
+        if Timings.requested:
+            output["timings"] = Timings.get()
 
         return output
 
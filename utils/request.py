@@ -16,6 +16,7 @@ class Request:
     format:str
     meta:str
     reports:str
+    timings:str
 
     @classmethod
     def set(cls, request_parameters:dict) -> None:
@@ -31,12 +32,13 @@ class Request:
         cls.format = request_parameters.get("format", "json")
         cls.meta = request_parameters.get("meta", "tags")
         cls.reports = request_parameters.get("reports", "none")
+        cls.timings = request_parameters.get("timings", None)
 
         logger.info(f"Threatware called with parameters = '{ request_parameters }'")
 
     @classmethod
     def get(cls) -> dict:
-        return {
+        request = {
             "action": cls.action,
             "scheme": cls.scheme,
             "docloc": cls.docloc,
@@ -48,6 +50,10 @@ class Request:
             "meta": cls.meta,
             "reports": cls.reports
         }
+        # Only output if timings were asked for, so the output is otherwise unchanged
+        if cls.timings is not None:
+            request["timings"] = cls.timings
+        return request
     
     @classmethod
     def isAPIFormat(cls) -> bool:
@@ -6,6 +6,7 @@ import re
 
 import logging
 from utils import match
+from utils.timings import Timings
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -37,6 +38,8 @@ def check_tag_comparison(tag_tuple, compare_value:str, compare_to_key, compare_t
 
     tag_prefix, tag_data_tag_name, tag_field_tag_name, tag_comparison = tag_tuple
 
+    Timings.count("comparisons")
+
     if not only_callback and tag_comparison == "" or tag_comparison == "equals":
         if match.equals(compare_value, compare_to_value):
             return True
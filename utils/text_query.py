@@ -7,6 +7,24 @@ from utils.match import is_empty
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+# Compiled versions of query configuration values are stored under this key by compile_query
+COMPILED = "compiled"
+
+def compile_query(query_cfg:dict) -> dict:
+    """ Returns a copy of the query configuration with its regular expressions compiled """
+
+    compiled = {}
+    try:
+        if (splitby := query_cfg.get("split-by")) and (char_separators := splitby.get("char-separators", [])):
+            compiled["split-by"] = re.compile('|'.join(char_separators))
+        if lineregex := query_cfg.get("line-regex"):
+            compiled["line-regex"] = re.compile(lineregex)
+    except (re.error, TypeError, AttributeError):
+        # Leave it to the query to report the problem when it is run
+        pass
+
+    return {**query_cfg, COMPILED:compiled}
+
 # Remove prefix and suffix whitespace
 def _trim(value):
     output = value
@@ -32,13 +50,17 @@ def split(text_value, query_cfg):
     if splitby := query_cfg.get("split-by"):
     
         if char_separators := splitby.get("char-separators", []):
-            regexPattern = '|'.join(char_separators)
-            output = re.split(regexPattern, text_value)
+            if (compiled := query_cfg.get(COMPILED, {}).get("split-by")) is not None:
+                output = compiled.split(text_value)
+            else:
+                regexPattern = '|'.join(char_separators)
+                output = re.split(regexPattern, text_value)
 
     if lineregex := query_cfg.get("line-regex"):
         if not isinstance(text_value, str):
             logger.error(f"input was expecting string and got '{type(text_value)}'")
             return None
+        lineregex = query_cfg.get(COMPILED, {}).get("line-regex", lineregex)
         output = []
         for line in text_value.splitlines():
             if match := re.match(lineregex, line):
@@ -64,6 +86,7 @@ def match(text_value, query_cfg):
         if not isinstance(text_value, str):
             logger.error(f"input was expecting string and got '{type(text_value)}'")
             return None
+        lineregex = query_cfg.get(COMPILED, {}).get("line-regex", lineregex)
         output = []
         for line in text_value.splitlines():
             if re.match(lineregex, line):
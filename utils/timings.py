@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Records the wall time, CPU time and counts (e.g. of tagged keys looked up) of the stages of a request
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+import utils.logging
+logger = logging.getLogger(utils.logging.getLoggerName(__name__))
+
+def _is_true(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().casefold() in ["true", "yes", "1"]
+    return value is True
+
+class Timings:
+    """
+    Timings of the stages of a request.
+
+    Stages are recorded when timings are requested (by the 'timings' request parameter), and then returned in the output, or
+    when the THREATWARE_TIMINGS environment variable is set.  Every recorded stage is also logged (at INFO level) as a
+    'timing' log line with the stage as JSON.  Counts are added to the innermost stage being recorded on the same thread.
+    """
+
+    enabled:bool = False
+    requested:bool = False
+    _records:list = []
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    @classmethod
+    def init(cls, requested = None):
+
+        cls.requested = _is_true(requested)
+        cls.enabled = cls.requested or _is_true(os.getenv("THREATWARE_TIMINGS"))
+        with cls._lock:
+            cls._records = []
+
+    @classmethod
+    @contextmanager
+    def stage(cls, name:str, **labels):
+        """ Records the stage (with labels) of the code run in the with block.  Yields the record, or None if timings are disabled """
+
+        if not cls.enabled:
+            yield None
+            return
+
+        record = {"stage":name} | labels
+        counts = {}
+        if (stack := getattr(cls._local, "stack", None)) is None:
+            stack = cls._local.stack = []
+        stack.append(counts)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            record["wall-ms"] = round((time.perf_counter() - wall_start) * 1000, 3)
+            record["cpu-ms"] = round((time.thread_time() - cpu_start) * 1000, 3)
+            record["pid"] = os.getpid()
+            stack.pop()
+            if len(counts) > 0:
+                record["counts"] = counts
+            cls.add(record)
+
+    @classmethod
+    def count(cls, counter:str, amount:int = 1):
+        """ Adds to a count of the stage being recorded """
+
+        if cls.enabled and (stack := getattr(cls._local, "stack", None)):
+            counts = stack[-1]
+            counts[counter] = counts.get(counter, 0) + amount
+
+    @classmethod
+    def add(cls, record:dict, log:bool = True):
+        """ Adds a record of a stage (e.g. one recorded in another process) """
+
+        with cls._lock:
+            if any(existing is record for existing in cls._records):
+                return
+            cls._records.append(record)
+
+        if log:
+            logger.info(f"timing {json.dumps(record, default=str)}")
+
+    @classmethod
+    def get(cls) -> list:
+        """ Returns the recorded stages, in the order they finished """
+
+        with cls._lock:
+            return list(cls._records)
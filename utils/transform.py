@@ -4,12 +4,31 @@ Utility methods for transforming strings
 """
 
 import logging
+import threading
+from functools import lru_cache
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+class Identity:
+    """ A transform that leaves values as they are """
+
+    def __call__(self, value:str) -> str:
+        return value
+
+    def __eq__(self, other):
+        return isinstance(other, Identity)
+
+    def __hash__(self):
+        return hash(Identity)
+
+    def __repr__(self):
+        return "Identity()"
+
+_identity = Identity()
+
 def identity():
-    return lambda val : val
+    return _identity
 
 def c14n(value:str, transform_fn = None) -> str:
     if transform_fn is not None:
@@ -17,19 +36,61 @@ def c14n(value:str, transform_fn = None) -> str:
     return value.casefold().strip()
 
 
-def strip(start_char:str, end_char:str):
+class StripContext:
     """
-    Strips everything between the start and end characters/str (inclusive)
+    Strips everything between the start and end characters/str (inclusive) e.g. 'Database (SQL)' -> 'Database '
 
-    Returns a function.  Designed for use with methods taking transform_fn parameters that end up calling c14n e.g. util.match
+    Designed for use with methods taking transform_fn parameters that end up calling c14n e.g. util.match.  There is only
+    one StripContext for each start and end characters, which remembers the values it has transformed.  StripContexts
+    are hashable (by their characters), so what is derived from the values they transform can be cached too.
     """
-    def _strip_context(value:str,start_char:str, end_char:str):
 
-        if(start_char_index := value.find(start_char)) != -1:
-            if(end_char_index := value.find(end_char, start_char_index)) != -1:
+    MAX_CACHED_VALUES = 16384
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, start_char:str, end_char:str):
+
+        with cls._instances_lock:
+            if (instance := cls._instances.get((start_char, end_char))) is None:
+                instance = super().__new__(cls)
+                instance.start_char = start_char
+                instance.end_char = end_char
+                instance._cached_strip = lru_cache(maxsize=cls.MAX_CACHED_VALUES)(instance._strip)
+                cls._instances[(start_char, end_char)] = instance
+
+        return instance
+
+    def __call__(self, value:str) -> str:
+        if isinstance(value, str):
+            return self._cached_strip(value)
+        return self._strip(value)
+
+    def _strip(self, value:str) -> str:
+
+        if(start_char_index := value.find(self.start_char)) != -1:
+            if(end_char_index := value.find(self.end_char, start_char_index)) != -1:
                 return value[:start_char_index] + value[end_char_index + 1:]
 
         return value
 
-    return lambda val : _strip_context(val, start_char,  end_char)
+    def __eq__(self, other):
+        return isinstance(other, StripContext) and (self.start_char, self.end_char) == (other.start_char, other.end_char)
+
+    def __hash__(self):
+        return hash((StripContext, self.start_char, self.end_char))
+
+    def __reduce__(self):
+        return (StripContext, (self.start_char, self.end_char))
 
+    def __repr__(self):
+        return f"StripContext({self.start_char!r}, {self.end_char!r})"
+
+def strip(start_char:str, end_char:str) -> StripContext:
+    """
+    Strips everything between the start and end characters/str (inclusive)
+
+    Returns a transform (see StripContext).  Designed for use with methods taking transform_fn parameters that end up calling c14n e.g. util.match
+    """
+    return StripContext(start_char, end_char)
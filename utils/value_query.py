@@ -8,6 +8,22 @@ from utils.property_str import pstr
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+# Compiled versions of query configuration values are stored under this key by compile_query
+COMPILED = "compiled"
+
+def compile_query(query_cfg:dict) -> dict:
+    """ Returns a copy of the query configuration with its regular expression compiled """
+
+    compiled = {}
+    if regex := query_cfg.get("regex"):
+        try:
+            compiled["regex"] = re.compile(regex)
+        except (re.error, TypeError):
+            # Leave it to the query to report the problem when it is run
+            pass
+
+    return {**query_cfg, COMPILED:compiled}
+
 # Remove prefix and suffix whitespace
 def _trim(value):
     output = value
@@ -33,7 +49,7 @@ def extract(input, query_cfg):
             logger.error(f"Input was expecting string and got '{type(input)}'")
             return None
         
-        if match := re.match(regex, input):
+        if match := re.match(query_cfg.get(COMPILED, {}).get("regex", regex), input):
             if "group" in query_cfg:
                 group = query_cfg.get("group")
             else:
@@ -56,7 +72,7 @@ def match(input, query_cfg):
         if not isinstance(input, str):
             logger.error(f"Input was expecting string and got '{type(input)}'")
             return None
-        if re.match(regex, input):
+        if re.match(query_cfg.get(COMPILED, {}).get("regex", regex), input):
             # We are expecting the last group to be the matching one
             output = input
 
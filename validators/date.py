@@ -5,22 +5,18 @@ Validates whether a value is a date
 
 import logging
 from pathlib import Path
-import dateutil.parser 
-from dateutil.parser import ParserError
 from data.key import key as Key
+from utils import dates
 
 import utils.logging
 from validators.validator_output import ValidatorOutput
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+VALUE_ONLY = True
+
 def validate(config:dict, key:Key, value:str, references:dict) -> bool:
 
-    try:
-        parsed = dateutil.parser.parse(value)
-        #key.addProperty(references['validator-tag'], config["output_text_valid"].format(key, value))
-        return True
-    except (ParserError, OverflowError):
-        #key.addProperty(references['validator-tag'], config["output_text_invalid"].format(key, value))
-        return False
+    # Dates are parsed with the (strptime) 'formats' in the config first, if there are any
+    formats = (config or {}).get("formats", None)
 
-    return False
\ No newline at end of file
+    return dates.parse(value, formats) is not None
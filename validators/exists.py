@@ -11,6 +11,8 @@ from data.key import key as Key
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+VALUE_ONLY = True
+
 def validate(config:dict, key:Key, value:str, references:dict) -> bool:
     
     # By default look in the threat model
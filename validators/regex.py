@@ -6,11 +6,28 @@ Validates whether a value matches a regular expression
 import logging
 from pathlib import Path
 import re
+from functools import lru_cache
 from data.key import key as Key
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+VALUE_ONLY = True
+
+@lru_cache(maxsize=512)
+def compile_pattern(pattern:str) -> re.Pattern:
+    return re.compile(pattern)
+
+def precompile(config:dict):
+    """ Compiles the pattern in the config when the config is loaded, rather than when the first value is validated """
+
+    if (pattern := config.get("pattern", None)):
+        try:
+            compile_pattern(pattern)
+        except re.error:
+            # Reported when a value is validated
+            pass
+
 def validate(config:dict, key:Key, value:str, references:dict) -> bool:
 
     if not (pattern := config.get("pattern", None)):
@@ -18,7 +35,7 @@ def validate(config:dict, key:Key, value:str, references:dict) -> bool:
         return False
 
     try:
-        if re.search(pattern, value):
+        if compile_pattern(pattern).search(value):
             return True
     except re.error as err:
         logger.error(f"The pattern '{pattern}' passed to the regex validator caused an exception '{err}'")
@@ -10,6 +10,8 @@ from data.key import key as Key
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+VALUE_ONLY = True
+
 def validate(config:dict, key:Key, value:str, references:dict) -> bool:
 
     if (method := config.get("method", None)) is None:
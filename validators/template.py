@@ -6,12 +6,60 @@ Validates whether a value matches a value from the template
 import logging
 from pathlib import Path
 import data.find as find
+from data import model_index
 import utils.match as match
+import utils.transform as transform
 from data.key import key as Key
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
+class TemplateValues:
+    """ The canonicalised values of the keys in a template with a validator tag, by key name """
+
+    def __init__(self, tagged_data:list):
+
+        self.by_name = {}
+        # Values that can't be canonicalised in advance, by key name
+        self.unindexed = {}
+
+        for tagged_key, tagged_value in tagged_data:
+            values = tagged_value if isinstance(tagged_value, list) else [tagged_value]
+            if all(value is None or isinstance(value, str) for value in values):
+                self.by_name.setdefault(tagged_key.name, set()).update(transform.c14n(value if value is not None else "") for value in values)
+            else:
+                self.unindexed.setdefault(tagged_key.name, []).append(tagged_value)
+
+    def contains(self, key_name:str, value:str) -> bool:
+        """ Returns True if a template key with the name has a value that equals the value (as per match.equals) """
+
+        if (value is None or isinstance(value, str)) and transform.c14n(value if value is not None else "") in self.by_name.get(key_name, ()):
+            return True
+
+        return any(match.equals(value, tagged_value) for tagged_value in self.unindexed.get(key_name, []))
+
+def template_values(template_model:dict, key_tag:str) -> TemplateValues:
+    """ 
+    Returns the values of the keys in the template with the tag.  
+    
+    If the template is indexed (see data.model_index) the values are kept with the index, so they are only found once 
+    per template and are cached along with a cached template.
+    """
+
+    if (index := model_index.get_index(template_model)) is not None:
+        if (values := index.derived.setdefault("template-values", {}).get(key_tag)) is not None:
+            return values
+
+    values = TemplateValues(find.keys_with_tag(template_model, key_tag))
+
+    if index is not None:
+        index.derived["template-values"][key_tag] = values
+        index.persisted.add("template-values")
+        # So a cached template is cached again with the values
+        index.marks.add(f"template-values/{key_tag}")
+
+    return values
+
 def validate(config:dict, key:Key, value:str, references:dict) -> bool:
     
     # Need to get some config from references
@@ -23,19 +71,6 @@ def validate(config:dict, key:Key, value:str, references:dict) -> bool:
         logger.error("The references parameter did not have a 'template-model' key")
         return False
     
-    tagged_data = find.keys_with_tag(template_model, key_tag)
-    
-    match_found = False
-    for tagged_key, tagged_value in tagged_data:
-
-        # Lots of keys could be tagged as being validated from template, but we only want to look at template values for keys with the same name as the one
-        # we are validating (could still possibly lead to issues)
-        if tagged_key == key and match.equals(value, tagged_value):
-            match_found = True
-            break
-    
-    #if not match_found:
-    #    tagged_values = [tagged_value for _, tagged_value in tagged_data]
-    #    key.addProperty(references['validator-tag'], config["output_text_invalid"].format(key, value, tagged_values))
-
-    return match_found
\ No newline at end of file
+    # Lots of keys could be tagged as being validated from template, but we only want to look at template values for keys with the same name as the one
+    # we are validating (could still possibly lead to issues)
+    return template_values(template_model, key_tag).contains(key.name if isinstance(key, Key) else key, value)
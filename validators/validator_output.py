@@ -20,7 +20,7 @@ class ValidatorOutput:
     templated_output_texts = {}
     validator_config = {}
 
-    def __init__(self, validator_tag:str = None, validating_key = None, validating_value = None):
+    def __init__(self, validator_tag:str = None, validating_key = None, validating_value = None, templated_output_texts:dict = None, validator_config:dict = None):
         """
         Create a ValidatorOutput object
 
@@ -32,10 +32,19 @@ class ValidatorOutput:
             The key of the entry being validated
         validating_value : 
             The value of the entry being validated
+        templated_output_texts : dict
+            The output texts of the validators, by validator tag (see Validator)
+        validator_config : dict
+            The config of the validators, by validator tag (see Validator)
         """
 
         yaml_register_class(ValidatorOutput)
 
+        # Verifiers can use different validators at the same time (on different threads), so each output has its own texts
+        if templated_output_texts is not None:
+            self.templated_output_texts = templated_output_texts
+        if validator_config is not None:
+            self.validator_config = validator_config
         self.validator_tag = validator_tag
         self.validating_key = validating_key
         self.validating_value = validating_value
@@ -57,7 +66,7 @@ class ValidatorOutput:
             context["key"]["name"] = self.validating_key.name
             context["key"]["colname"] = self.validating_key.getProperty("colname")
             context["key"]["value"] = self.validating_value
-            context["config"] = ValidatorOutput.validator_config.get(self.validator_tag, {}).get("config")
+            context["config"] = self.validator_config.get(self.validator_tag, {}).get("config")
 
             validator_output_texts = self.templated_output_texts.get(self.validator_tag, {}).get("text", {})
             if self.validator_result:
@@ -4,12 +4,14 @@ Loads validators dynamically
 """
 
 from utils.error import ValidatorsError
+import os
 import logging
 import importlib
+import threading
 from pathlib import Path
 from utils.config import ConfigBase
 from language.translate import Translate
-from utils.load_yaml import yaml_file_to_dict
+from utils.load_yaml import yaml_config_file_to_dict
 from data.key import key as Key
 from validators.validator_output import ValidatorOutput
 
@@ -32,23 +34,29 @@ class Validator:
     VALIDATORS_TEXT_YAML_PATH = str(Path(__file__).absolute().parent.joinpath(VALIDATORS_TEXT_YAML))
 
     def __init__(self, validators_config:dict = {}):
-        #validators_dispatch_yaml_path = validators_config.get("validator-dispatch-yaml-path", self.VALIDATORS_DISPATCH_YAML_PATH)
-        # We don't currently want the dispatch yaml to configurable - could be security implications as people who can update config shouldn't necessarily be people who can run code
-        validators_dispatch_yaml_path = self.VALIDATORS_DISPATCH_YAML_PATH
-        validators_config_yaml_path = ConfigBase.getConfigPath(validators_config.get("validator-config-yaml-path", self.VALIDATOR_CONFIG_YAML_PATH))
-        validators_text_yaml_path = ConfigBase.getConfigPath(validators_config.get("validator-text-yaml-path", self.VALIDATORS_TEXT_YAML_PATH))
+        validators_dispatch_yaml_path, validators_config_yaml_path, validators_text_yaml_path = self.yaml_paths(validators_config)
                 
         self.text_dict = self._load_validator_texts(validators_text_yaml_path)
         self.validator_config_dict = self._load_validator_config(validators_config_yaml_path)
         self.dispatch, self.modules = self._load_validator_dispatch(validators_dispatch_yaml_path)
-        
-        ValidatorOutput.templated_output_texts = self.text_dict
-        ValidatorOutput.validator_config = self.validator_config_dict
-    
+        self._precompile()
+
+    @classmethod
+    def yaml_paths(cls, validators_config:dict) -> tuple:
+        """ Returns the paths of the dispatch, config and text YAML files to use for the validators config """
+
+        #validators_dispatch_yaml_path = validators_config.get("validator-dispatch-yaml-path", cls.VALIDATORS_DISPATCH_YAML_PATH)
+        # We don't currently want the dispatch yaml to configurable - could be security implications as people who can update config shouldn't necessarily be people who can run code
+        validators_dispatch_yaml_path = cls.VALIDATORS_DISPATCH_YAML_PATH
+        validators_config_yaml_path = ConfigBase.getConfigPath(validators_config.get("validator-config-yaml-path", cls.VALIDATOR_CONFIG_YAML_PATH))
+        validators_text_yaml_path = ConfigBase.getConfigPath(validators_config.get("validator-text-yaml-path", cls.VALIDATORS_TEXT_YAML_PATH))
+
+        return validators_dispatch_yaml_path, validators_config_yaml_path, validators_text_yaml_path
+
 
     def _load_validator_texts(self, validator_text_yaml_path) -> dict:
 
-        yaml_config_dict = yaml_file_to_dict(validator_text_yaml_path) 
+        yaml_config_dict = yaml_config_file_to_dict(validator_text_yaml_path)
 
         if yaml_config_dict.get("validators-text") == None:
             raise ValidatorsError(f"Validators text file '{validator_text_yaml_path}' did not have a root key of 'validators-text'")
@@ -84,12 +92,13 @@ class Validator:
     def _load_validator_dispatch(self, validator_yaml_path) -> dict:
 
         #yaml_dict = yaml_to_dict(str(Path(os.getcwd()).joinpath(MAPS_DIR).joinpath(SCHEMES_YAML)))
-        yaml_dict = yaml_file_to_dict(validator_yaml_path) 
+        yaml_dict = yaml_config_file_to_dict(validator_yaml_path)
         
         all_validators = yaml_dict["validators"]
         
         validators_dict = {}
         modules_dict = {}
+        self.value_only = set()
 
         for validator_name in all_validators:
             validator_file = all_validators.get(validator_name, "")
@@ -107,11 +116,25 @@ class Validator:
             if hasattr(imp, "validate") and callable(imp.validate):
                 validators_dict[validator_name] = imp.validate
                 modules_dict[validator_name] = module_name
+                # Validators whose result only depends on the value (and their config) set VALUE_ONLY, so their result
+                # for a value can be reused for the same value
+                if getattr(imp, "VALUE_ONLY", False):
+                    self.value_only.add(validator_name)
             else:
                 logger.warning(f"Validator module/file '{module_name}' did not have a 'validate' method")
         
         return validators_dict, modules_dict
 
+    def _precompile(self):
+        # Validator modules can prepare their config (e.g. compile regular expressions) once, when the config is loaded,
+        # by having a 'precompile' method
+        for validator_entry in self.validator_config_dict.values():
+            if (module_name := self.modules.get(validator_entry.get("validator"))) is None:
+                continue
+            precompile = getattr(importlib.import_module(module_name), "precompile", None)
+            if callable(precompile) and validator_entry.get("config") is not None:
+                precompile(validator_entry["config"])
+
 
 
     def validate(self, validator_tag:str, key:Key, value:str, references:dict) -> ValidatorOutput:
@@ -139,36 +162,78 @@ class Validator:
         ValidatorOutput class
         """
 
-        output = ValidatorOutput(validator_tag, key, value)
-
-        # Check the validator tag can be found
-        if (validator_entry := self.validator_config_dict.get(validator_tag)) is None:
-            logger.error(f"No validator tag '{validator_tag}' is configured")
-            output.validator_result = False
-            output.error = f"No validator tag '{validator_tag}' is configured"
-            return output
-
-        # Check the validator is present
-        if validator_entry.get('validator') is None:
-            logger.error(f"No 'validator' key is configured for '{validator_tag}'")
-            output.validator_result = False
-            output.error = f"No 'validator' key is configured for '{validator_tag}'"
-            return output
-
-        # Get the validator
-        if (validate := self.dispatch.get(validator_entry.get('validator'))) is None:
-            logger.error(f"No validator called '{validator_entry['validator']}' is configured")
-            output.validator_result = False
-            output.error = f"No validator called '{validator_entry['validator']}' is configured"
-            return output
+        validator_entry, validate, error = self._get_validate(validator_tag)
+        if error is not None:
+            logger.error(error)
+            return self.output(validator_tag, key, value, False)
 
         references['validator-tag'] = validator_tag
 
         # Validate
         #logger.info(f"Entering validator '{validator_entry['validator']}'")
-        output.validator_result = validate(validator_entry['config'], key, value, references)
+        result = validate(validator_entry['config'], key, value, references)
         #logger.info(f"Exiting validator '{validator_entry['validator']}'")
         
+        return self.output(validator_tag, key, value, result)
+
+
+    def validate_batch(self, validator_tag:str, keys_values:list, references:dict) -> list:
+        """
+        Validates many values from a model with the same validator tag
+
+        For validators that set VALUE_ONLY, each distinct value is only validated once.  Only the results are returned, so
+        use output to create a ValidatorOutput for the results that need reporting.
+
+        Parameters
+        ----------
+        validator_tag : str
+            The tag that will be looked up in the validator config YAML to get the validator method and config to use
+        keys_values : list
+            A list of (key, value) tuples from the model to validate
+        references : dict
+            A dict that should contain at least a 'template-model' key that contains the 
+            template model.  May be customised to contain anything though.
+
+        Returns
+        -------
+        list : The result of validating each (key, value), in the same order as keys_values
+        """
+
+        validator_entry, validate, error = self._get_validate(validator_tag)
+        if error is not None:
+            logger.error(error)
+            return [False] * len(keys_values)
+
+        references['validator-tag'] = validator_tag
+
+        config = validator_entry['config']
+        value_only = validator_entry['validator'] in self.value_only
+        value_results = {}
+
+        results = []
+        for key, value in keys_values:
+            if value_only and isinstance(value, str):
+                if (result := value_results.get(value)) is None:
+                    result = value_results[value] = validate(config, key, value, references)
+            else:
+                result = validate(config, key, value, references)
+            results.append(result)
+
+        return results
+
+
+    def output(self, validator_tag:str, key:Key, value:str, result:bool) -> ValidatorOutput:
+        """ Returns the ValidatorOutput for the result of validating a value with a validator tag """
+
+        output = ValidatorOutput(validator_tag, key, value, self.text_dict, self.validator_config_dict)
+        output.validator_result = result
+
+        validator_entry, _, error = self._get_validate(validator_tag)
+        if error is not None:
+            output.validator_result = False
+            output.error = error
+            return output
+
         output.validator_name = validator_entry["validator"]
         output.validator_module = self.modules[validator_entry["validator"]]
         output.description = key.getProperty(validator_tag)
@@ -176,6 +241,24 @@ class Validator:
         return output
 
 
+    def _get_validate(self, validator_tag:str) -> tuple:
+        # Returns the config entry and validate method for the validator tag, or an error if either isn't configured
+
+        # Check the validator tag can be found
+        if (validator_entry := self.validator_config_dict.get(validator_tag)) is None:
+            return None, None, f"No validator tag '{validator_tag}' is configured"
+
+        # Check the validator is present
+        if validator_entry.get('validator') is None:
+            return validator_entry, None, f"No 'validator' key is configured for '{validator_tag}'"
+
+        # Get the validator
+        if (validate := self.dispatch.get(validator_entry.get('validator'))) is None:
+            return validator_entry, None, f"No validator called '{validator_entry['validator']}' is configured"
+
+        return validator_entry, validate, None
+
+
     def validate_from_config(self, validator_config:dict, key:Key, value:str, references:dict) -> bool:
         """
         Validates a Key value
@@ -211,3 +294,36 @@ class Validator:
         result = validate(config, key, value, references)
         
         return result
+
+
+# Loaded validators, by the paths of their YAML files and language, as (modification times, Validator), so the YAML files
+# are only loaded (and localised) again if they change
+_loaded_validators = {}
+_loaded_validators_lock = threading.Lock()
+
+def _mtime(path:str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def get_validator(validators_config:dict = {}) -> Validator:
+    """
+    Returns the Validator for the validators config, loading it only if it hasn't been loaded before (for the same YAML
+    files, modification times and language), so verifiers can share the same loaded Validator.
+
+    The validator config YAML file is localised with the translations for the language, so should not depend on anything
+    else in the request.
+    """
+
+    paths = Validator.yaml_paths(validators_config)
+    # Each language has its own entry, so requests in different languages don't replace each other's validators
+    cache_key = (paths, Translate.languageCode)
+    mtimes = tuple(_mtime(path) for path in paths)
+
+    with _loaded_validators_lock:
+        if (validator := _loaded_validators.get(cache_key)) is None or validator[0] != mtimes:
+            validator = (mtimes, Validator(validators_config))
+            _loaded_validators[cache_key] = validator
+
+    return validator[1]
@@ -3,6 +3,7 @@
 Verifies that all assets are covered by a threat
 """
 from data import find
+from data import model_index
 import logging
 import verifiers.reference as reference
 from language.translate import Translate
@@ -10,6 +11,7 @@ from verifiers.verifier_error import ErrorType
 from verifiers.verifier_error import VerifierIssue
 from utils import match, transform
 from utils import tags
+from utils import keymaster
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -25,7 +27,7 @@ def location_storage_expression_callback(callback_config, tag_tuple, compare_val
         if match.equals(storage_location_value, compare_to_value):
 
             #grouped_text = callback_config.get("grouped-text", {}).get("storage-expression")
-            component_transform = callback_config.get("component-transform", transform.identity)
+            component_transform = callback_config.get("component-transform", transform.identity())
 
             if match.starts_ends(compare_value, Translate.localise(callback_config.get("output-texts", {}), "start-assets-grouped-by-storage", ignore_format=True), component_transform(compare_to_value)):
                 return True
@@ -42,7 +44,7 @@ def component_storage_expression_callback(callback_config, tag_tuple, compare_va
 
     if tag_comparison == "storage-expression":
         #grouped_text = callback_config.get("grouped-text", {}).get("storage-expression")
-        component_transform = callback_config.get("component-transform", transform.identity)
+        component_transform = callback_config.get("component-transform", transform.identity())
 
         if match.starts_ends(compare_value, Translate.localise(callback_config.get("output-texts", {}), "start-assets-grouped-by-storage", ignore_format=True), component_transform(compare_to_value)):
             return True
@@ -64,48 +66,289 @@ def verify(common_config:dict, verifier_config:dict, model:dict, template_model:
 
     return verify_return_list
 
-def assets_verify(common_config:dict, verifier_config:dict, model:dict, template_model:dict) -> list:
-    verify_return_list = []
+def _canonical(value, transform_fn = None) -> str:
+    # The value as match.equals compares it, or None if the value isn't a string (so can't be looked up)
+    if value is None:
+        value = ""
+    if not isinstance(value, str):
+        return None
+    return transform.c14n(value, transform_fn)
 
-    # Get all the data required to do the validation
-    tagged_asset_data_list = common_config["asset-tags"]["asset-data-tag"]
-    all_assets = []
-    for tag in tagged_asset_data_list:
-        tag_asset_data_key, tag_asset_data_value = find.key_with_tag(model, tag)
-        if not isinstance(tag_asset_data_value, list):
-            logger.error(f"Expecting the data tagged with '{tag}' to be a list, but it was a '{type(tag_asset_data_value)}'. Ignoring.")
-            continue
-    
-        all_assets.append((tag, tag_asset_data_key, tag_asset_data_value))
-
-    if len(all_assets) == 0:
-        logger.error(f"Could not find any asset data tagged with '{common_config['asset-tags']['asset-data-tag']}'")
-
-    threats_and_controls_key, threats_and_controls_data = find.key_with_tag(model, common_config["threat-tags"]["threats-data-tag"])
-    if threats_and_controls_data is None:
-        logger.error(f"Could not find threat data tagged with '{common_config['threat-tags']['threats-data-tag']}'")
-
-    # Get a list of in-scope and out-of-scope components
-    in_scope_components = []
-    out_of_scope_components = []
-    components_key, components_data = find.key_with_tag(model, common_config["component-tags"]["component-data-tag"])
-    for component_row in components_data:
-        component_row_id_key, component_row_id_data = find.key_with_tag(component_row, "row-identifier")
-        in_scope_key, in_scope_data = find.key_with_tag(component_row, common_config["component-tags"]["component-in-scope-tag"])
-        if match.equals(in_scope_data, common_config["component-tags"]["component-in-scope-value"]):
-            in_scope_components.append(component_row_id_data)
+class CoverageIndex:
+    """
+    Inverted indexes of the threats and controls data, so the threats covering an asset in a storage location can be found
+    without comparing the asset to every threat.
+
+    Threat rows are indexed by (in-scope) component and by the asset values (and storage expressions) they reference.  The rows
+    an asset/storage location could be covered by are looked up, and only those rows are checked for coverage.
+    """
+
+    def __init__(self, common_config:dict, model:dict):
+
+        self.common_config = common_config
+        self.component_transform = transform.StripContext(common_config["strip-context"]["start-char"], common_config["strip-context"]["end-char"])
+
+        self._index_assets(model)
+
+        self.threats_and_controls_key, self.threats_and_controls_data = find.key_with_tag(model, common_config["threat-tags"]["threats-data-tag"])
+        if self.threats_and_controls_data is None:
+            logger.error(f"Could not find threat data tagged with '{common_config['threat-tags']['threats-data-tag']}'")
+
+        self._index_components(model)
+
+        # The threats are only indexed when coverage is first looked up (reports only need the assets and components)
+        self.threat_rows = None
+        # Rows referencing a storage expression that ends with a (transformed) storage location, by location
+        self._expression_endings = {}
+        # Description and controls of threats, by id of the threat row
+        self._threat_details = {}
+
+    def _index_assets(self, model:dict):
+
+        common_config = self.common_config
+
+        self.asset_tables = []
+        for tag in common_config["asset-tags"]["asset-data-tag"]:
+            tag_asset_data_key, tag_asset_data_value = find.key_with_tag(model, tag)
+            if not isinstance(tag_asset_data_value, list):
+                logger.error(f"Expecting the data tagged with '{tag}' to be a list, but it was a '{type(tag_asset_data_value)}'. Ignoring.")
+                continue
+        
+            self.asset_tables.append((tag, tag_asset_data_key, tag_asset_data_value))
+
+        if len(self.asset_tables) == 0:
+            logger.error(f"Could not find any asset data tagged with '{common_config['asset-tags']['asset-data-tag']}'")
+
+    def _index_components(self, model:dict):
+
+        common_config = self.common_config
+
+        # Get a list of in-scope and out-of-scope components
+        self.in_scope_components = []
+        self.out_of_scope_components = []
+        components_key, components_data = find.key_with_tag(model, common_config["component-tags"]["component-data-tag"])
+        for component_row in components_data:
+            component_row_id_key, component_row_id_data = find.key_with_tag(component_row, "row-identifier")
+            in_scope_key, in_scope_data = find.key_with_tag(component_row, common_config["component-tags"]["component-in-scope-tag"])
+            if match.equals(in_scope_data, common_config["component-tags"]["component-in-scope-value"]):
+                self.in_scope_components.append(component_row_id_data)
+            else:
+                self.out_of_scope_components.append(component_row_id_data)
+
+        self.in_scope = {_canonical(component, self.component_transform) for component in self.in_scope_components} - {None}
+        self.out_of_scope = {_canonical(component, self.component_transform) for component in self.out_of_scope_components} - {None}
+        # Storage locations are matched against the components for every asset
+        self.in_scope_set = match.CanonicalSet(self.in_scope_components, self.component_transform)
+        self.out_of_scope_set = match.CanonicalSet(self.out_of_scope_components, self.component_transform)
+
+    def _index_threats(self):
+
+        common_config = self.common_config
+        self.callback_config = {"output-texts":common_config["output-texts"], "component-transform":self.component_transform}
+
+        output_texts = common_config["output-texts"]
+        expression_starts = Translate.localise(output_texts, "start-assets-grouped-by-storage", ignore_format=True)
+        expression_starts = [transform.c14n(start) for start in ([expression_starts] if isinstance(expression_starts, str) else expression_starts)]
+        all_assets = Translate.localise(output_texts, "all-assets", ignore_format=True)
+
+        # Threat rows (that have assets) as (row, threat asset entries, threat component values)
+        self.threat_rows = []
+        # Rows by canonicalised component
+        self.by_component = {}
+        # Rows by (data tag, field tag) referenced by a threat asset, and then by canonicalised threat asset value
+        self.by_reference = {}
+        # Rows by (data tag, field tag), for rows that reference the field with a storage expression, in 3 groups; values
+        # that are 'all assets', values that are grouped by storage location (along with the canonicalised value) and 
+        # values that end with a value in the field
+        self.all_assets = {}
+        self.expressions = {}
+        self.endings = {}
+        # Rows by (data tag, field tag), for any reference to the field
+        self.field_rows = {}
+        # Rows whose values can't be indexed, so are always checked
+        self.unindexed = set()
+
+        for entry in (self.threats_and_controls_data or []):
+
+            # Note, we are just searching the threats row here, so the assets and components returned will be in the same table row
+            threat_asset_entries = find.keys_with_tag(entry, common_config["threat-tags"]["threat-asset-tag"])
+            threat_components = [component_name for (_, component_name) in find.keys_with_tag(entry, common_config["threat-tags"]["threat-component-tag"])]
+
+            if len(threat_asset_entries) == 0:
+                # This validation issue will be raised elsewhere
+                continue
+
+            position = len(self.threat_rows)
+            self.threat_rows.append((entry, threat_asset_entries, match.CanonicalSet(threat_components, self.component_transform)))
+
+            for component in threat_components:
+                if (canonical_component := _canonical(component, self.component_transform)) is None:
+                    self.unindexed.add(position)
+                else:
+                    self.by_component.setdefault(canonical_component, set()).add(position)
+
+            for threat_asset_key, threat_asset_value in threat_asset_entries:
+
+                if (canonical_value := _canonical(threat_asset_value)) is None:
+                    self.unindexed.add(position)
+                    continue
+
+                for tag in tags.get_prefixed_tag("ref/", threat_asset_key):
+                    tag_prefix, tag_data_tag_name, tag_field_tag_name, tag_comparison = tags.get_quad_tag_parts(tag)
+                    if tag_prefix != "ref":
+                        continue
+                    field = (tag_data_tag_name, tag_field_tag_name)
+                    self.field_rows.setdefault(field, set()).add(position)
+
+                    if tag_comparison in ["", "equals"]:
+                        self.by_reference.setdefault(field, {}).setdefault(canonical_value, set()).add(position)
+                    elif tag_comparison == "endswith":
+                        self.endings.setdefault(field, set()).add(position)
+                    elif tag_comparison == "storage-expression":
+                        if match.equals(threat_asset_value, all_assets):
+                            self.all_assets.setdefault(field, set()).add(position)
+                        if any(canonical_value.startswith(start) for start in expression_starts):
+                            self.expressions.setdefault(field, []).append((position, canonical_value))
+
+    def _expression_rows(self, field:tuple, field_value) -> set:
+        # The rows with a storage expression that ends with the field value
+        if (ending := _canonical(field_value, self.component_transform)) is None:
+            return self.field_rows.get(field, set())
+
+        if (rows := self._expression_endings.get((field, ending))) is None:
+            rows = {position for position, canonical_value in self.expressions.get(field, []) if canonical_value.endswith(ending)}
+            self._expression_endings[(field, ending)] = rows
+        return rows
+
+    def _candidate_rows(self, asset:dict, row_data_tag_name:str, storage_location_value = None) -> set:
+        # The rows with a threat asset that could reference the asset.  If a storage location is passed in only rows with a
+        # storage expression for that location are returned.
+        rows = set()
+        for field in self.field_rows:
+            tag_data_tag_name, tag_field_tag_name = field
+            if tag_data_tag_name != row_data_tag_name:
+                continue
+
+            field_values = [field_value for _, field_value in find.keys_with_tag(asset, tag_field_tag_name)]
+            if storage_location_value is not None:
+                field_values = [field_value for field_value in field_values if match.equals(storage_location_value, field_value)]
+            if len(field_values) == 0:
+                continue
+
+            rows |= self.all_assets.get(field, set())
+            for field_value in field_values:
+                rows |= self._expression_rows(field, field_value)
+
+            if storage_location_value is not None:
+                continue
+
+            rows |= self.endings.get(field, set())
+            values_by_reference = self.by_reference.get(field, {})
+            for field_value in field_values:
+                for value in (field_value if isinstance(field_value, list) else [field_value]):
+                    if (canonical_value := _canonical(value)) is None:
+                        rows |= self.field_rows[field]
+                    else:
+                        rows |= values_by_reference.get(canonical_value, set())
+
+        return rows
+
+    def _covers(self, asset:dict, storage_location_value:str, threat_row:tuple) -> bool:
+        # Whether a threat row covers the asset in the storage location
+
+        entry, threat_asset_entries, threat_components = threat_row
+
+        # Does the storage location for the asset match one of the (in-scope) components?
+        matching_component = match.get_equals(storage_location_value, threat_components, self.component_transform)
+        matching_in_scope = matching_component is not None and match.equals(matching_component, self.in_scope_set, self.component_transform)
+
+        # An asset is covered by a threat when:
+        # Scenario A: threat component includes = in-scope asset storage location AND asset = name
+        # Scenario B: threat component includes = in-scope asset storage location AND asset = type
+        # Scenario C: threat component includes = in-scope asset storage location AND asset = all assets in component
+        # Scenario D: threat component is anything AND asset = all assets in known storage type (e.g. env var)
+        for threat_asset_entry_key, threat_asset_entry_value in threat_asset_entries:
+
+            if matching_in_scope:
+                # Scenario A, B, C
+                # Then the asset can match on name or type, but the storage location must match the component
+                
+                # This checks if any 'ref' tag in 'threat_asset_entry_key' can be found in row 'asset' for value 'threat_asset_entry_value'
+                if reference.check_reference_row(asset, "ref", threat_asset_entry_key, threat_asset_entry_value, component_storage_expression_callback, self.callback_config, only_callback=False) is not None:
+                    return True
+            else:
+                # Scenario D
+                # The asset can only match on grouped storage type e.g. All assets stored in env vars
+                callback_config = self.callback_config | {"storage_location_value":storage_location_value}
+
+                if (matched_tag := reference.check_reference_row(asset, "ref", threat_asset_entry_key, threat_asset_entry_value, location_storage_expression_callback, callback_config, only_callback=True)) is not None and match.endswith(matched_tag, "storage-expression"):
+                    return True
+
+        return False
+
+    def covering_threats(self, asset:dict, storage_location_value:str) -> list:
+        """ Returns the threat rows that cover the asset (a row of asset data) in the storage location, in table order """
+
+        if self.threat_rows is None:
+            self._index_threats()
+
+        row_id_key, row_id_data = find.key_with_tag(asset, "row-identifier")
+        row_data_tag_name = keymaster.get_data_tag_for_key(row_id_key)
+
+        if (canonical_location := _canonical(storage_location_value, self.component_transform)) is None:
+            candidates = set(range(len(self.threat_rows)))
         else:
-            out_of_scope_components.append(component_row_id_data)
+            # Rows with a matching in-scope component can reference the asset any way, other rows only by storage expression
+            in_scope_rows = self.by_component.get(canonical_location, set()) if canonical_location in self.in_scope else set()
+            candidates = set(self.unindexed)
+            if len(in_scope_rows) > 0:
+                candidates |= in_scope_rows & self._candidate_rows(asset, row_data_tag_name)
+            candidates |= self._candidate_rows(asset, row_data_tag_name, storage_location_value) - in_scope_rows
+
+        covering_threats = []
+        for position in sorted(candidates):
+            entry = self.threat_rows[position][0]
+            if entry not in covering_threats and self._covers(asset, storage_location_value, self.threat_rows[position]):
+                covering_threats.append(entry)
+
+        return covering_threats
+
+    def threat_details(self, threat:dict) -> tuple:
+        """ Returns the description and controls of a threat row """
+
+        if (details := self._threat_details.get(id(threat))) is None or details[0] is not threat:
+            threat_description = find.key_with_tag(threat, self.common_config["threat-tags"]["threat-description-tag"])[1]
+            threat_controls = find.keys_with_tag(threat, self.common_config["threat-tags"]["threat-control-tag"])
+            details = (threat, threat_description, threat_controls)
+            self._threat_details[id(threat)] = details
 
-    component_transform = transform.strip(common_config["strip-context"]["start-char"], common_config["strip-context"]["end-char"])
+        return details[1], details[2]
 
-    #callback_config = {"grouped-text":common_config["grouped-text"], "component-transform":component_transform}
-    callback_config = {"output-texts":common_config["output-texts"], "component-transform":component_transform}
+def get_coverage_index(common_config:dict, model:dict) -> CoverageIndex:
+    """ Returns the coverage index for the model, which is cached if the model is indexed (see data.model_index) """
+
+    index = model_index.get_index(model)
+    if index is not None and (coverage_index := index.derived.get("coverage-index")) is not None and coverage_index.common_config is common_config:
+        return coverage_index
+
+    coverage_index = CoverageIndex(common_config, model)
+    if index is not None:
+        index.derived["coverage-index"] = coverage_index
+
+    return coverage_index
+
+def assets_verify(common_config:dict, verifier_config:dict, model:dict, template_model:dict) -> list:
+    verify_return_list = []
+
+    # Get all the data required to do the validation
+    coverage_index = get_coverage_index(common_config, model)
+    threats_and_controls_key = coverage_index.threats_and_controls_key
+    threats_and_controls_data = coverage_index.threats_and_controls_data
 
     exclude_callback = lambda callback_config, tag_tuple, compare_value, compare_to_key, compare_to_value: match.contains(compare_value, compare_to_value)
 
     # Loop through the asset data tables
-    for asset_data_tag, asset_data_key, asset_data_value in all_assets:
+    for asset_data_tag, asset_data_key, asset_data_value in coverage_index.asset_tables:
 
         # Loop through the actual rows of assets in a data table
         for asset in asset_data_value:
@@ -118,7 +361,7 @@ def assets_verify(common_config:dict, verifier_config:dict, model:dict, template
             # Get the storage-locations for the asset
             for storage_location_key, storage_location_value in find.keys_with_tag(asset, common_config["asset-tags"]['asset-location-tag']):
 
-                if match.equals(storage_location_value, out_of_scope_components, component_transform):
+                if match.equals(storage_location_value, coverage_index.out_of_scope_set, coverage_index.component_transform):
                     logger.debug(f"Ignoring threat coverage for asset '{row_id_key.name}' in storage location '{storage_location_value}' as '{storage_location_value}' is out of scope")
                     continue
 
@@ -137,55 +380,10 @@ def assets_verify(common_config:dict, verifier_config:dict, model:dict, template
 
                 logger.debug(f"Checking threat coverage for asset '{row_id_key.name}' in storage location '{storage_location_value}'")
 
-                # Add an empty list of covering threats.  The list will be appended to as it is found.
-                covering_threats = []
+                # Find the covering threats for the asset in the storage location, from the threats and controls data
+                covering_threats = coverage_index.covering_threats(asset, storage_location_value)
                 row_id_key.addProperty(storage_location_key, covering_threats)
 
-                # An asset is covered by a threat when:
-                # Scenario A: threat component includes = in-scope asset storage location AND asset = name
-                # Scenario B: threat component includes = in-scope asset storage location AND asset = type
-                # Scenario C: threat component includes = in-scope asset storage location AND asset = all assets in component
-                # Scenario D: threat component is anything AND asset = all assets in known storage type (e.g. env var)
-                
-                # Try to find a covering threat for the asset in the storage location by searching the threats and controls data
-                for entry in threats_and_controls_data:
-
-                    # An entry in the threats data section can contain multiple assets and components
-                    
-                    # Note, we are just searching the threats row here, so the assets and components returned will be in the same table row
-                    threat_asset_entries = find.keys_with_tag(entry, common_config["threat-tags"]["threat-asset-tag"])
-                    threat_component_entries = find.keys_with_tag(entry, common_config["threat-tags"]["threat-component-tag"])
-
-                    if len(threat_asset_entries) == 0:
-                        # This validation issue will be raised elsewhere
-                        continue
-
-                    # Does the storage location for the asset match one of the components?
-                    matching_component = match.get_equals(storage_location_value, [component_name for (_, component_name) in threat_component_entries], component_transform)
-                    if match.equals(matching_component, in_scope_components, component_transform):
-                        matching_in_scope_component = matching_component
-                    else:
-                        matching_in_scope_component = None
-
-                    for threat_asset_entry_key, threat_asset_entry_value in threat_asset_entries:
-
-                        if matching_in_scope_component is not None:
-                            # Scenario A, B, C
-                            # Then the asset can match on name or type, but the storage location must match the component
-                            
-                            # This checks if any 'ref' tag in 'threat_asset_entry_key' can be found in row 'asset' for value 'threat_asset_entry_value'
-                            if reference.check_reference_row(asset, "ref", threat_asset_entry_key, threat_asset_entry_value, component_storage_expression_callback, callback_config, only_callback=False) is not None and match.equals(matching_in_scope_component, storage_location_value, component_transform):
-                                if entry not in covering_threats:
-                                    covering_threats.append(entry)
-                        else:
-                            # Scenario D
-                            # The asset can only match on grouped storage type e.g. All assets stored in env vars
-                            callback_config["storage_location_value"] = storage_location_value
-
-                            if (matched_tag := reference.check_reference_row(asset, "ref", threat_asset_entry_key, threat_asset_entry_value, location_storage_expression_callback, callback_config, only_callback=True)) is not None and match.endswith(matched_tag, "storage-expression"):
-                                if entry not in covering_threats:
-                                    covering_threats.append(entry)
-
                 if len(covering_threats) == 0:
                     issue_dict = {}
                     issue_dict["issue_key"] = row_id_key
@@ -311,7 +509,7 @@ def cov_verify(common_config:dict, verifier_config:dict, model:dict, template_mo
             covering_key_values_filtered = _filter(common_config, model, comparison, covering_key_values)
 
             # Check if there is a covering tagged key value that matches each covered tagged key value
-            covering_values = [value_entry for key_entry, value_entry in covering_key_values_filtered]
+            covering_values = match.CanonicalSet([value_entry for key_entry, value_entry in covering_key_values_filtered])
 
             for key_entry, value_entry in covered_key_values:
 
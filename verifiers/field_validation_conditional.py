@@ -5,7 +5,7 @@ Verifies that all keys tagged DON'T have a, maybe specific, value, if some depen
 
 from data import find
 import logging
-from validators.validators import Validator
+from validators.validators import get_validator
 from verifiers.verifier_error import VerifierIssue
 from utils import match
 from utils import keymaster
@@ -17,7 +17,7 @@ logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 def verify(common_config:dict, verifier_config:dict, model:dict, template_model:dict) -> list:
 
     validator_obj_config = common_config.get("validator-config", {})
-    vlad = Validator(validator_obj_config)
+    vlad = get_validator(validator_obj_config)
 
     references = {}
     references['model'] = model
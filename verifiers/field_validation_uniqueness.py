@@ -8,6 +8,7 @@ import logging
 from data.key import key as Key
 import utils.keymaster as keymaster
 import utils.match as match
+import utils.tags as tags
 import verifiers.reference as reference
 from verifiers.verifier_error import VerifierIssue
 
@@ -28,13 +29,21 @@ def reference_callback(callback_config, tag_tuple, compare_value, compare_to_key
 
     return False
 
-def verify(common_config:dict, verifier_config:dict, model:dict, template_model:dict) -> list:
+# The comparisons that find values equal to the unique value, so can be looked up by canonical value
+_EQUAL_COMPARISONS = ["", "equals", "value_not_table"]
 
-    verify_return_list = []
+def _group(model, unique_tag_prefix:str) -> tuple:
+    """
+    Groups the unique-tagged values by the data tag and field tag they must be unique in, and by canonical value.
 
-    unique_tag_prefix = verifier_config["unique-tag-prefix"]
+    Returns the unique-tagged keys (and values) in model order, along with the (tag, bucket, compare) of each of a key's
+    unique tags (or None if the key has a tag that can't be grouped), and the buckets.  Each bucket is
+    (data tag, field tag, canonical value) -> (tag, value) of the first key in it, and is resolved into the keys it refers
+    to when the duplicates are reported.
+    """
 
-    previously_referenced = set()
+    unique_entries = []
+    buckets = {}
 
     for key_entry, value_entry in find.keys_with_tag_matching_regex(model, "^" + unique_tag_prefix + ".*$"):
 
@@ -43,18 +52,76 @@ def verify(common_config:dict, verifier_config:dict, model:dict, template_model:
             logger.warning(f"A uniqueness tag was applied to a field ('{key_entry.name}') whose value ('{value_entry}') is not a string. Ignoring.")
             continue
 
+        key_data_tag_name = keymaster.get_data_tag_for_key(key_entry)
+        canonical_value = match.canonical(value_entry)
+
+        key_buckets = []
+        for tag in key_entry.getTags():
+
+            tag_prefix, tag_data_tag_name, tag_field_tag_name, tag_comparison = tags.get_quad_tag_parts(tag)
+
+            if unique_tag_prefix != tag_prefix:
+                continue
+
+            if tag_comparison not in _EQUAL_COMPARISONS:
+                # Only equal values can be grouped
+                key_buckets = None
+                break
+
+            bucket = (tag_data_tag_name, tag_field_tag_name, canonical_value)
+            buckets.setdefault(bucket, (tag, value_entry))
+            # Checking that tables don't match, but values do, so values in the same table don't count
+            compare = tag_comparison != "value_not_table" or key_data_tag_name != tag_data_tag_name
+            key_buckets.append((tag, bucket, compare))
+
+        unique_entries.append((key_entry, value_entry, key_buckets))
+
+    return unique_entries, buckets
+
+def _resolve(model, buckets:dict) -> dict:
+    """ Returns the keys (and values) each bucket refers to, i.e. the keys with the field tag, in the table with the data tag, with an equal value """
+
+    resolved = {}
+    for bucket, (tag, value_entry) in buckets.items():
+        tag_data_tag_name, tag_field_tag_name, _ = bucket
+        if (targets := reference.get_reference_targets(model, tag, tag_data_tag_name, tag_field_tag_name)) is None:
+            resolved[bucket] = []
+            continue
+        resolved[bucket] = [targets.entries[position] for position in targets.equal_positions(value_entry)]
+
+    return resolved
+
+def verify(common_config:dict, verifier_config:dict, model:dict, template_model:dict) -> list:
+
+    verify_return_list = []
+
+    unique_tag_prefix = verifier_config["unique-tag-prefix"]
+
+    unique_entries, buckets = _group(model, unique_tag_prefix)
+    resolved = _resolve(model, buckets)
+
+    previously_referenced = set()
+
+    for key_entry, value_entry, key_buckets in unique_entries:
+
         # Since non-unique values will always be in at least 2 places, we don't want to report errors for both places as really it's the same issue
         if key_entry in previously_referenced:
             continue
 
-        callback_config = {"key_data_tag_name": keymaster.get_data_tag_for_key(key_entry)}
-
-        referenced = reference.get_references(model, unique_tag_prefix, key_entry, value_entry, reference_callback, callback_config)
+        if key_buckets is None:
+            callback_config = {"key_data_tag_name": keymaster.get_data_tag_for_key(key_entry)}
+            referenced = reference.get_references(model, unique_tag_prefix, key_entry, value_entry, reference_callback, callback_config)
+        else:
+            # The same references as reference.get_references with reference_callback i.e. by tag, then in model order
+            referenced = []
+            for tag, bucket, compare in key_buckets:
+                if compare:
+                    referenced.extend((tag, found_key, found_value) for found_key, found_value in resolved[bucket])
 
         # If len(referenced) > 1 then this key/value has been found in a different section
-        # If len(referenced) == 1 then we do an object reference compare ("is") against what was found. reference.get_references will return only the first instance it finds of a matching key/value,
-        # so the "referenced[0][1] is not key_entry" will be true when the current 'for' loop is the 2ND instance of the key/value combination i.e. 'for' loop is on duplicate, reference.get_references 
-        # returns first instance, and these are different 'key' objects.  This is what finds duplicates in the same section/table
+        # If len(referenced) == 1 then we do an object reference compare ("is") against what was found. The references are only the first instance found of a matching key/value,
+        # so the "referenced[0][1] is not key_entry" will be true when the current 'for' loop is the 2ND instance of the key/value combination i.e. 'for' loop is on duplicate, the references
+        # are the first instance, and these are different 'key' objects.  This is what finds duplicates in the same section/table
         if len(referenced) > 1 or (len(referenced) == 1 and referenced[0][1] is not key_entry):
 
             uniq_section_ref = reference.get_reference_descriptions(model, unique_tag_prefix, key_entry)
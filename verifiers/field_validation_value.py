@@ -7,7 +7,7 @@ from data import find
 import logging
 from verifiers.verifier_error import ErrorType
 from verifiers.verifier_error import VerifierIssue
-from validators.validators import Validator
+from validators.validators import get_validator
 from validators.validator_output import ValidatorOutput
 from utils import match
 
@@ -20,7 +20,7 @@ def verify(common_config:dict, verifier_config:dict, model:dict, template_model:
     verify_return_list = []
 
     validator_config = verifier_config.get("validator-config", {})
-    vlad = Validator(validator_config)
+    vlad = get_validator(validator_config)
 
     non_mandatory_tag = verifier_config["not-mandatory-tag"]
 
@@ -37,6 +37,10 @@ def verify(common_config:dict, verifier_config:dict, model:dict, template_model:
     references['model'] = model
     references['template-model'] = template_model
 
+    # Group the values to validate by validator tag, so each validator validates all its values in one batch
+    validating = []
+    keys_values_by_tag = {}
+
     for tagged_key, tagged_value in tagged_data:
 
         if match.is_empty(tagged_value) and tagged_key.hasTag(non_mandatory_tag):
@@ -44,51 +48,49 @@ def verify(common_config:dict, verifier_config:dict, model:dict, template_model:
             # so validations still succeed for empty values if the configured 'not-mandatory-tag' tag is present on the key
             continue
 
-        tagged_value_validates = False
-        a_validator_failed = False
-        validatorOutput_list =[]
-
         # For each configured validator, check if it is a tag on the current key
-        tagged_key_validator = [v for v in configured_validators if tagged_key.hasTag(v["tag"])]
+        tagged_key_validator = [v["tag"] for v in configured_validators if tagged_key.hasTag(v["tag"])]
         logger.debug(f"Validators configured for key '{tagged_key.name}' - {tagged_key_validator}")
 
         # Since we get data passed on tag prefix and not configured validators, it's possible that this tagged data has no configured validator.  No validator means no error
-        at_least_one_validator_ran = False
-        
-        for validator_entry in tagged_key_validator:
+        if len(tagged_key_validator) == 0:
+            continue
 
-            at_least_one_validator_ran = True
+        for validator_tag in tagged_key_validator:
+            keys_values_by_tag.setdefault(validator_tag, []).append((tagged_key, tagged_value))
+        validating.append((tagged_key, tagged_value, tagged_key_validator))
 
-            validatorOutput = vlad.validate(validator_entry["tag"], tagged_key, tagged_value, references)
+    results_by_tag = {validator_tag:iter(vlad.validate_batch(validator_tag, keys_values, references)) for validator_tag, keys_values in keys_values_by_tag.items()}
 
-            # Culmultatively record success
-            tagged_value_validates = tagged_value_validates or validatorOutput.validator_result
+    for tagged_key, tagged_value, tagged_key_validator in validating:
 
-            # Track if a validator fails though
-            if not validatorOutput.validator_result:
-                a_validator_failed = True
+        results = [next(results_by_tag[validator_tag]) for validator_tag in tagged_key_validator]
+
+        # Culmultatively record success, but track if a validator fails
+        tagged_value_validates = any(results)
+        a_validator_failed = not all(results)
+
+        if not a_validator_failed:
+            continue
 
-            # Gather the responses from each validator so we can report them in the error
-            validatorOutput_list.append(validatorOutput)
-        
+        # Gather the responses from each validator so we can report them in the error
         issue_dict = {}
         issue_dict["issue_key"] = tagged_key
         issue_dict["issue_value"] = tagged_value
-        issue_dict["errordata"] = validatorOutput_list
-
-        if at_least_one_validator_ran:
-            if not tagged_value_validates:    
-                verify_return_list.append(VerifierIssue(
-                    error_text_key="value-invalid", 
-                    error_data_key="value-error-data",
-                    fix_text_key=None, 
-                    issue_dict=issue_dict))
-            elif a_validator_failed:
-                verify_return_list.append(VerifierIssue(
-                    error_text_key="value-valid", 
-                    error_data_key="value-error-data",
-                    fix_text_key=None,
-                    issue_dict=issue_dict,
-                    errortype=ErrorType.INFO))
+        issue_dict["errordata"] = [vlad.output(validator_tag, tagged_key, tagged_value, result) for validator_tag, result in zip(tagged_key_validator, results)]
+
+        if not tagged_value_validates:    
+            verify_return_list.append(VerifierIssue(
+                error_text_key="value-invalid", 
+                error_data_key="value-error-data",
+                fix_text_key=None, 
+                issue_dict=issue_dict))
+        else:
+            verify_return_list.append(VerifierIssue(
+                error_text_key="value-valid", 
+                error_data_key="value-error-data",
+                fix_text_key=None,
+                issue_dict=issue_dict,
+                errortype=ErrorType.INFO))
 
     return verify_return_list
\ No newline at end of file
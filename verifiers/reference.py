@@ -5,8 +5,10 @@ Helper methods for dealing with references
 
 import logging
 import data.find as find
+from data import model_index
 from data.key import key as Key
 import utils.match as match
+import utils.transform as transform
 import utils.tags as tags
 import utils.keymaster as keymaster
 
@@ -14,11 +16,71 @@ import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
 
 
+class ReferenceTargets:
+    """ The keys (and values) a reference can point to i.e. the keys with a field tag in the table with a data tag """
+
+    def __init__(self, result_list:list):
+
+        self.entries = result_list
+        # Positions of entries by canonicalised value, for values that are strings (or lists of strings)
+        self.by_value = {}
+        # Positions of entries whose values can't be canonicalised in advance
+        self.unindexed = []
+
+        for position, (_, found_value) in enumerate(result_list):
+            values = found_value if isinstance(found_value, list) else [found_value]
+            if not all(value is None or isinstance(value, str) for value in values):
+                self.unindexed.append(position)
+                continue
+            for value in values:
+                positions = self.by_value.setdefault(transform.c14n(value if value is not None else ""), [])
+                if not positions or positions[-1] != position:
+                    positions.append(position)
+
+    def equal_positions(self, ref_value:str) -> list:
+        """ Returns the positions of the entries whose values equal the ref_value (as per match.equals) """
+
+        positions = self.by_value.get(transform.c14n(ref_value), [])
+        if self.unindexed:
+            positions = sorted(positions + [position for position in self.unindexed if match.equals(ref_value, self.entries[position][1])])
+        return positions
+
+def get_reference_targets(model, tag:str, tag_data_tag_name:str, tag_field_tag_name:str) -> ReferenceTargets:
+    """ Returns the keys the reference tag can point to, which are cached if the model is indexed (see data.model_index) """
+
+    index = model_index.get_index(model)
+    if index is not None:
+        reference_targets = index.derived.setdefault("reference-targets", {})
+        if (tag_data_tag_name, tag_field_tag_name) in reference_targets:
+            targets = reference_targets[(tag_data_tag_name, tag_field_tag_name)]
+            if targets is None:
+                logger.warning(f"Reference '{tag}' included a data tag location of '{tag_data_tag_name}' which could not be found")
+            return targets
+
+    # Get the table to search for the value
+    table_key, table_value = find.key_with_tag(model, tag_data_tag_name)
+
+    targets = None
+    if table_key is None:
+        logger.warning(f"Reference '{tag}' included a data tag location of '{tag_data_tag_name}' which could not be found")
+    else:
+        targets = ReferenceTargets(find.keys_with_tag(table_value, tag_field_tag_name))
+
+    if index is not None:
+        reference_targets[(tag_data_tag_name, tag_field_tag_name)] = targets
+
+    return targets
+
+def _is_equals_comparison(tag_tuple, ref_value) -> bool:
+    # check_tag_comparison compares 'equals' references using match.equals, before trying the callback
+    return tag_tuple[3] in ["", "equals"] and isinstance(ref_value, str)
+
 def get_references(model, ref_type, ref_key, ref_value, callback, callback_config):
     """
     Gets all reference tag references a value that matches/compares to the passed in value
 
-    References are returned from the location where the tag points to i.e. a data section
+    References are returned from the location where the tag points to i.e. a data section.  For 'equals' references the
+    values that match are looked up (by canonicalised value), so the callback is only called for the values that don't match.
 
     Parameters
     ----------
@@ -53,31 +115,62 @@ def get_references(model, ref_type, ref_key, ref_value, callback, callback_confi
             # We are only looking at tags with the desired prefix
             continue
 
-        # Get the table to search for the value
-        table_key, table_value = find.key_with_tag(model, tag_data_tag_name)
-
-        if table_key is None:
-            logger.warning(f"Reference '{tag}' included a data tag location of '{tag_data_tag_name}' which could not be found")
+        if (targets := get_reference_targets(model, tag, tag_data_tag_name, tag_field_tag_name)) is None:
             continue
 
-        result_list = find.keys_with_tag(table_value, tag_field_tag_name)
-
-        if len(result_list) == 0:
+        if len(targets.entries) == 0:
             logger.debug(f"Reference '{tag}' included a field tag location of '{tag_field_tag_name}' which could not be found")
             continue
 
-        for found_key, found_value in result_list:
-            if tags.check_tag_comparison(tag_tuple, ref_value, found_key, found_value, callback, callback_config):
-                found_referenced = (tag, found_key, found_value)
-                if found_referenced not in referenced:
-                    referenced.append(found_referenced)
+        if _is_equals_comparison(tag_tuple, ref_value):
+            equal_positions = targets.equal_positions(ref_value)
+            if callback is None:
+                positions = equal_positions
+            else:
+                equal_position_set = set(equal_positions)
+                positions = [position for position, (found_key, found_value) in enumerate(targets.entries) 
+                             if position in equal_position_set or callback(callback_config, tag_tuple, ref_value, found_key, found_value)]
+        else:
+            positions = [position for position, (found_key, found_value) in enumerate(targets.entries) 
+                         if tags.check_tag_comparison(tag_tuple, ref_value, found_key, found_value, callback, callback_config)]
+
+        for position in positions:
+            found_key, found_value = targets.entries[position]
+            found_referenced = (tag, found_key, found_value)
+            if found_referenced not in referenced:
+                referenced.append(found_referenced)
     
     #logger.info(f"Exiting get_references")
     return referenced
 
 def check_reference(model, ref_type, ref_key, ref_value, callback, callback_config):
+    """ Returns True if the reference tags of the ref_key reference a value that matches/compares to ref_value (see get_references) """
+
+    for tag in ref_key.getTags():
+
+        tag_tuple = tags.get_quad_tag_parts(tag)
+        tag_prefix, tag_data_tag_name, tag_field_tag_name, tag_comparison = tag_tuple
+
+        if ref_type != tag_prefix:
+            continue
+
+        if (targets := get_reference_targets(model, tag, tag_data_tag_name, tag_field_tag_name)) is None:
+            continue
+
+        if _is_equals_comparison(tag_tuple, ref_value):
+            # Any equal value is enough, and otherwise only the callback can find a match
+            if targets.equal_positions(ref_value):
+                return True
+            if callback is not None:
+                for found_key, found_value in targets.entries:
+                    if callback(callback_config, tag_tuple, ref_value, found_key, found_value):
+                        return True
+        else:
+            for found_key, found_value in targets.entries:
+                if tags.check_tag_comparison(tag_tuple, ref_value, found_key, found_value, callback, callback_config):
+                    return True
 
-    return len(get_references(model, ref_type, ref_key, ref_value, callback, callback_config)) > 0
+    return False
     
 
 def check_reference_row(row, ref_type, ref_key, ref_value, callback, callback_config, only_callback):
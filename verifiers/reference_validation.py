@@ -27,7 +27,7 @@ def template_reference_callback(callback_config, tag_tuple, compare_value, compa
         preApproved = compare_to_key.getProperty("templatePreApproved")
         # For pre-approved template values, we allow 'context' to be added in the TM e.g. in-memory (component).  But we strip this when matching to the pre-approved value
         #if preApproved is not None and match.equals(compare_value, compare_to_value, lambda val : _strip_context(strip_config, val)):
-        if preApproved is not None and match.equals(compare_value, compare_to_value, transform.strip(strip_config["start-char"], strip_config["end-char"])):
+        if preApproved is not None and match.equals(compare_value, compare_to_value, transform.StripContext(strip_config["start-char"], strip_config["end-char"])):
             # TODO: Does not currently validate that the tag of the preApproved value matches the tag of the reference being checked e.g. pre-approved in functional assets table wouldn't match a ref tagged with just the the technical assets table.  This would restrict ref matches, so may not be a good thing.
             return True
 
@@ -38,7 +38,7 @@ def reference_callback(callback_config, tag_tuple, compare_value, compare_to_key
     tag_prefix, tag_data_tag_name, tag_field_tag_name, tag_comparison = tag_tuple
 
     strip_config = callback_config["strip-context"]
-    strip_fn = transform.strip(strip_config["start-char"], strip_config["end-char"])
+    strip_fn = transform.StripContext(strip_config["start-char"], strip_config["end-char"])
 
     # We want to strip any context for the purpose of copmarison of references
     if match.equals(compare_value, compare_to_value, strip_fn):
@@ -7,6 +7,7 @@ import logging
 from utils import match
 from utils.load_yaml import yaml_register_class
 from verifiers.verifiers_config import VerifiersConfig
+from verifiers.coverage_validation import get_coverage_index
 from data import find
 from data import key as Key
 
@@ -79,33 +80,13 @@ class ThreatCoverage:
 
         covered_assets = []
 
-        common_config = self.config.verifiers_config_dict["common"]
-
-        # Get a list of out-of-scope components
-        out_of_scope_components = []
-        components_key, components_data = find.key_with_tag(model, common_config["component-tags"]["component-data-tag"])
-        for component_row in components_data:
-            component_row_id_key, component_row_id_data = find.key_with_tag(component_row, "row-identifier")
-            in_scope_key, in_scope_data = find.key_with_tag(component_row, common_config["component-tags"]["component-in-scope-tag"])
-            if not match.equals(in_scope_data, common_config["component-tags"]["component-in-scope-value"]):
-                out_of_scope_components.append(component_row_id_data)
-
-        # Get all the data required to do the validation
-        tagged_asset_data_list = common_config["asset-tags"]["asset-data-tag"]
-        all_assets = []
-        for tag in tagged_asset_data_list:
-            tag_asset_data_key, tag_asset_data_value = find.key_with_tag(model, tag)
-            if not isinstance(tag_asset_data_value, list):
-                logger.error(f"Expecting the data tagged with '{tag}' to be a list, but it was a '{type(tag_asset_data_value)}'. Ignoring.")
-                continue
-        
-            all_assets.append((tag, tag_asset_data_key, tag_asset_data_value))
+        common_config = self.config.common_config
 
-        if len(all_assets) == 0:
-            logger.error(f"Could not find any asset data tagged with '{common_config['asset-tags']['asset-data-tag']}'")
+        # The components and assets are looked up once for both verifying and reporting coverage
+        coverage_index = get_coverage_index(common_config, model)
 
         # Loop through the asset data tables
-        for asset_data_tag, asset_data_key, asset_data_value in all_assets:
+        for asset_data_tag, asset_data_key, asset_data_value in coverage_index.asset_tables:
 
             # Loop through the actual rows of assets in a data table
             for asset in asset_data_value:
@@ -118,7 +99,7 @@ class ThreatCoverage:
                 # Get the storage-locations for the asset
                 for storage_location_key, storage_location_value in find.keys_with_tag(asset, common_config["asset-tags"]['asset-location-tag']):
 
-                    if storage_location_value in out_of_scope_components:
+                    if storage_location_value in coverage_index.out_of_scope_components:
                         logger.debug(f"Ignoring coverage report on asset '{row_id_key.name}' in storage location '{storage_location_value}' as '{storage_location_value}' is out of scope")
                         continue
 
@@ -133,8 +114,7 @@ class ThreatCoverage:
                         # Get required information about threat
                         for threat in covering_threats:
 
-                            threat_description = find.key_with_tag(threat, common_config["threat-tags"]["threat-description-tag"])[1]
-                            threat_controls = find.keys_with_tag(threat, common_config["threat-tags"]["threat-control-tag"])
+                            threat_description, threat_controls = coverage_index.threat_details(threat)
 
                             covering_threats_list.append(CoveringThreat(threat_description, threat_controls))
 
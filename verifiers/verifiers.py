@@ -4,11 +4,15 @@ Loads verifiers dynamically
 """
 
 import logging
+from functools import partial
 from verifiers.verifiers_config import VerifiersConfig
 from language.translate import Translate
 from utils import keymaster
 from utils import tags
 import data.find as find
+from utils.model import annotate
+from utils import executor
+from utils.timings import Timings
 import verifiers.reference as reference
 
 import utils.logging
@@ -25,6 +29,7 @@ class Verifiers:
     def __init__(self, config:VerifiersConfig):
 
         self.config = config
+        self._tags_by_key_name = None
 
         VerifierIssue.issue_config = self.config.verifiers_config_dict.get("common", {}).get("errors", VerifierIssue.issue_config)
         VerifierIssue.templated_error_texts = self.config.verifiers_texts_dict.get("output-texts", {})
@@ -48,29 +53,45 @@ class Verifiers:
         list : A list of VerifierError objects represents the issues discovered by the invoked verifiers
         """
 
-        self.assign_key_tags(model)
-        self.assign_row_identifiers(None, model)
-        self.assign_key_tags(template_model)
-        self.assign_template_pre_approved(template_model)
+        # A single walk of each model assigns the default tags, parent keys and row identifiers, and indexes the tags (which 
+        # verifiers look up many times)
+        with Timings.stage("verify.annotate"):
+            annotate(model, self._tags_dict())
+            template_index = annotate(template_model, self._tags_dict(), row_identifiers=False)
+            # A cached template (see convertors.template_cache) already has its pre-approved values
+            pre_approved_mark = ("template-pre-approved", self.config.verifiers_config_dict["common"]["references"]["templ-tag-prefix"], self.config.verifiers_config_dict["common"]["references"]["doc-tag-prefix"])
+            if pre_approved_mark not in template_index.marks:
+                self.assign_template_pre_approved(template_model)
+                template_index.marks.add(pre_approved_mark)
 
         verifier_errors_list = []
 
-        common_config = self.config.verifiers_config_dict["common"]
-        #common_config["grouped-text"] = self.config.verifiers_texts_dict["grouped-text"]
-        common_config["output-texts"] = self.config.verifiers_texts_dict["output-texts"]
+        common_config = self.config.common_config
 
+        tasks = {}
         for verifier in self.config.dispatch:
 
             if verifier in self.config.disable:
                 logger.warning(f"Verifier '{verifier}' has not been run because it was configured as disabled")
 
-            verifier_config = self.config.verifiers_config_dict[verifier]
+            if verifier in self.config.dispatch_process:
+                tasks[verifier] = partial(self._run_verifier_for_process, verifier, common_config, model, template_model)
+            else:
+                tasks[verifier] = partial(self._run_verifier, verifier, common_config, model, template_model)
 
-            logger.info(f"Entering verifier '{verifier}'")
-            
-            errors_list = self.config.dispatch[verifier](common_config, verifier_config, model, template_model)
+        execution = self.config.execution
+        results = executor.run(tasks, execution.get("mode", executor.SEQUENTIAL), execution.get("max-workers"), 
+                               after=self.config.dispatch_after, process_tasks=self.config.dispatch_process, models=[model, template_model])
+
+        # Errors are returned in dispatch order, however the verifiers were run
+        for verifier, errors_list in results.items():
 
-            logger.info(f"Exiting verifier '{verifier}'")
+            if verifier in self.config.dispatch_process:
+                issue_states, timing = errors_list
+                errors_list = [self._issue_from_state(issue_state) for issue_state in issue_states]
+                if timing is not None:
+                    # Timings recorded in a forked process (and logged there) are added to the timings of this process
+                    Timings.add(timing, log=False)
 
             # Update errors to provide more useful output information
             for error in errors_list:
@@ -80,6 +101,36 @@ class Verifiers:
 
         return verifier_errors_list
 
+    def _run_verifier(self, verifier:str, common_config:dict, model:dict, template_model:dict, timing:list = None) -> list:
+
+        verifier_config = self.config.verifiers_config_dict[verifier]
+
+        logger.info(f"Entering verifier '{verifier}'")
+        
+        with Timings.stage("verify.verifier", verifier=verifier) as record:
+            errors_list = self.config.dispatch[verifier](common_config, verifier_config, model, template_model)
+            Timings.count("issues", len(errors_list))
+
+        logger.info(f"Exiting verifier '{verifier}'")
+
+        if timing is not None:
+            timing.append(record)
+
+        return errors_list
+
+    def _run_verifier_for_process(self, verifier:str, common_config:dict, model:dict, template_model:dict) -> tuple:
+        # VerifierIssue pickles as its output (see VerifierIssue.__getstate__), so return the state of the issues (which can be
+        # returned from a forked process) instead, along with the timing of the verifier
+        timing = []
+        errors_list = self._run_verifier(verifier, common_config, model, template_model, timing)
+        return [issue.__dict__ for issue in errors_list], timing[0]
+
+    def _issue_from_state(self, issue_state:dict) -> VerifierIssue:
+
+        issue = VerifierIssue.__new__(VerifierIssue)
+        issue.__dict__.update(issue_state)
+        return issue
+
     def assign_key_tags(self, model:dict):
         """
         Assigns default tags to data.key.Keys in a model.  Tags are the basis for verifiers.
@@ -97,77 +148,27 @@ class Verifiers:
         Nothings.  Keys are updated in place.
         """
 
-        tags_list = self.config.tag_mapping
+        with Timings.stage("verify.annotate"):
+            annotate(model, self._tags_dict(), row_identifiers=False)
+
+        return
 
-        tags_dict = {}
+    def _tags_dict(self) -> dict:
         # Create dict of tags key-name (as key) and tags list (as value) to easily match on key-name
-        for tag_entry in tags_list:
-            tags_dict[Translate.localise(tag_entry["key-name"])] = tag_entry["tags"]
-        
-        def _assign_tags(parentKey, model):
-
-            if isinstance(model, dict):
-                for dict_key, dict_value in model.items():
-                    dict_key.addProperty("parentKey", parentKey)
-                    if dict_key.name in tags_dict:
-                        if not dict_key.hasTag("no-defaults"):
-                            # Append the tags
-                            dict_key.addTags(tags_dict[dict_key.name])
-                                
-                    if isinstance(dict_value, dict) or isinstance(dict_value, list):
-                        _assign_tags(dict_key, dict_value)
-
-            if isinstance(model, list):
-                for list_entry in model:
-                    if isinstance(list_entry, dict) or isinstance(list_entry, list):
-                        _assign_tags(parentKey, list_entry)
-                
-            return
-
-        # Create recursive function that for each dict key checks if a tag from the file needs to be added.
-        _assign_tags(None, model)
+        if self._tags_by_key_name is None:
+            self._tags_by_key_name = {}
+            for tag_entry in self.config.tag_mapping:
+                self._tags_by_key_name[Translate.localise(tag_entry["key-name"])] = tag_entry["tags"]
 
-        return
+        return self._tags_by_key_name
 
     # In order to report the location of verification errors we need to tag keys with the rows they are in
     def assign_row_identifiers(self, rowIDKey, model):
+        """ Assigns row identifiers to the keys in the model (rowIDKey is always None for a whole model, and is otherwise ignored) """
 
-        if isinstance(model, dict):
-            for dict_key, dict_value in model.items():
-                # We dont know where in the hierarchy we are, but for dicts we just add the rowIDKey
-                if rowIDKey is not None:
-                    dict_key.addProperty("rowID", rowIDKey)
-                            
-                if isinstance(dict_value, dict) or isinstance(dict_value, list):
-                    self.assign_row_identifiers(rowIDKey, dict_value)
-
-        if isinstance(model, list):
-            # This could be a row, let's try and find a "row-identifier" tag
-            for list_entry in model:
-                if isinstance(list_entry, dict):
-                    local_rowIDKey = rowIDKey
-                    # Rows are stored as dict
-                    for dict_key, dict_value in list_entry.items():
-                        if dict_key.hasTag("row-identifier"):
-                            #print(f"Found key tagged with 'row-identifier - {dict_key}")
-                            # We found a "row-identifier" for an entry in this row, let's use that from now on
-                            local_rowIDKey = dict_key
-                            # We need to report errors with the value for the "row-identiifer" key, so let's store the value as a property of the key
-                            dict_key.addProperty("value", dict_value)
-                            # We need to be able to get sibling data in a row, so also store a reference to the whole row against the 'row-identifier' key
-                            dict_key.addProperty("row", list_entry)
-
-                            # There should only be 1 row-identifier per row
-                            break
-                    # Let's assign the the rowIDKey to all elements of this row (the 'row-identifier' field might not have been the first)
-                    # This will include child elements as well
-                    self.assign_row_identifiers(local_rowIDKey, list_entry)
-                else:
-                    # Not a row so recurse using existing rowIDKey
-                    self.assign_row_identifiers(rowIDKey, list_entry)
-            
-        return
+        annotate(model, parent_keys=False)
 
+        return
 
     def assign_template_pre_approved(self, template_model:dict):
         """ 
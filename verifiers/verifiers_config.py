@@ -8,7 +8,7 @@ import importlib
 from pathlib import Path
 from utils.config import ConfigBase
 from language.translate import Translate
-from utils.load_yaml import yaml_file_to_dict
+from utils.load_yaml import yaml_config_file_to_dict
 
 import utils.logging
 logger = logging.getLogger(utils.logging.getLoggerName(__name__))
@@ -38,9 +38,15 @@ class VerifiersConfig:
         if self.validators_config is None:
             self.validators_config = {}
 
+        # Verifiers can declare the verifiers they must run 'after', and whether they can run in a forked 'process'
+        self.dispatch_after = {}
+        self.dispatch_process = []
         self.dispatch = self._load_verifiers_dispatch(verifiers_dispatch_yaml_path)
         self.verifiers_config_dict = self._load_verifiers_config(verifiers_config_yaml_path)
+        self.execution = self.verifiers_config_dict.get("execution") or {}
         self.verifiers_texts_dict = self._load_verifiers_texts(ConfigBase.getConfigPath(self.verifiers_config_dict.get("output").get("template-text-file")))
+        # The config common to all verifiers, along with the texts they output (loaded config is shared, so this is a copy)
+        self.common_config = self.verifiers_config_dict["common"] | {"output-texts":self.verifiers_texts_dict["output-texts"]}
         self.tag_mapping = self._load_tag_mapping(ConfigBase.getConfigPath(self.verifiers_config_dict.get("common").get("default-verifier-tag-mapping")))
 
     def _load_verifiers_config(self, verifiers_config_yaml_path) -> dict:
@@ -51,7 +57,7 @@ class VerifiersConfig:
 
     def _load_verifiers_dispatch(self, verifiers_dispatch_yaml_path:str):
         
-        yaml_dict = yaml_file_to_dict(verifiers_dispatch_yaml_path) 
+        yaml_dict = yaml_config_file_to_dict(verifiers_dispatch_yaml_path)
         
         all_verifiers = yaml_dict["verifiers-dispatch"]
 
@@ -59,7 +65,14 @@ class VerifiersConfig:
 
         for verifier_name in all_verifiers:
             verifier_code = all_verifiers.get(verifier_name, "")
-            if verifier_code == "":
+            if isinstance(verifier_code, dict):
+                verifier_entry = verifier_code
+                verifier_code = verifier_entry.get("module", "")
+                if (after := verifier_entry.get("after")) is not None:
+                    self.dispatch_after[verifier_name] = [after] if isinstance(after, str) else list(after)
+                if verifier_entry.get("process", False) is True:
+                    self.dispatch_process.append(verifier_name)
+            if verifier_code is None or verifier_code == "":
                 logger.warning(f"No value specified for verifier '{verifier_name}'")
                 continue
             
@@ -74,11 +87,16 @@ class VerifiersConfig:
             else:
                 logger.warning(f"Verifier file '{verifier_code}' did not have a 'verify' method")
 
+        for verifier_name, after in self.dispatch_after.items():
+            for dependency in after:
+                if dependency not in verifiers_dict:
+                    logger.warning(f"Verifier '{verifier_name}' is configured to run after unknown verifier '{dependency}', which is ignored")
+
         return verifiers_dict
 
     def _load_verifiers_texts(self, verifiers_texts_yaml_path:str):
 
-        return yaml_file_to_dict(verifiers_texts_yaml_path) 
+        return yaml_config_file_to_dict(verifiers_texts_yaml_path)
 
     def _load_tag_mapping(self, tag_mapping_yaml_path) -> list:
     